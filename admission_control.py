@@ -0,0 +1,153 @@
+"""Queue-pressure admission control that degrades cards to plain links."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Optional
+
+
+DEFAULT_SHED_QUEUE_DEPTH = 100
+DEFAULT_SHED_P95_MS = 10_000
+DEFAULT_SHED_LOOP_LAG_MS = 250
+DEFAULT_RECOVERY_FRACTION = 0.4
+DEFAULT_MIN_SHED_SECONDS = 10.0
+DEFAULT_SAMPLE_INTERVAL_SECONDS = 0.5
+SHED_REASON_LABELS = {
+    "queue": "send backlog",
+    "latency": "slow deliveries",
+    "loop_lag": "event-loop lag",
+}
+
+
+@dataclass(frozen=True)
+class AdmissionSnapshot:
+    shedding: bool
+    reason: Optional[str]
+    shed_links: int
+    shed_episodes: int
+    queue_depth: int
+    p95_ms: int
+    loop_lag_ms: int
+
+
+class AdmissionController:
+    """Decide whether new messages may spend work on rich cards.
+
+    Shedding starts when any signal crosses its threshold and stops only
+    once every signal is back under ``recovery_fraction`` of its threshold
+    and at least ``min_shed_seconds`` have passed, so the bot does not
+    flap between modes at the edge of a threshold. Delivery latency only
+    counts while sends are queued; a quiet queue cannot be made worse by
+    new cards, whatever the last burst's p95 was.
+    """
+
+    def __init__(
+        self,
+        *,
+        shed_queue_depth: int = DEFAULT_SHED_QUEUE_DEPTH,
+        shed_p95_ms: int = DEFAULT_SHED_P95_MS,
+        shed_loop_lag_ms: int = DEFAULT_SHED_LOOP_LAG_MS,
+        recovery_fraction: float = DEFAULT_RECOVERY_FRACTION,
+        min_shed_seconds: float = DEFAULT_MIN_SHED_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.shed_thresholds = {
+            "queue": max(1, int(shed_queue_depth)),
+            "latency": max(1, int(shed_p95_ms)),
+            "loop_lag": max(1, int(shed_loop_lag_ms)),
+        }
+        fraction = min(max(float(recovery_fraction), 0.0), 1.0)
+        self.recover_thresholds = {
+            signal: threshold * fraction
+            for signal, threshold in self.shed_thresholds.items()
+        }
+        self.min_shed_seconds = float(min_shed_seconds)
+        self.clock = clock
+        self.shedding = False
+        self.reason: Optional[str] = None
+        self._shed_since = 0.0
+        self._signals = {"queue": 0, "latency": 0, "loop_lag": 0}
+        self.shed_links = 0
+        self.shed_episodes = 0
+
+    def observe(self, *, queue_depth: int, p95_ms: int, loop_lag_ms: int) -> None:
+        self._signals = {
+            "queue": max(0, int(queue_depth)),
+            "latency": max(0, int(p95_ms)) if queue_depth > 0 else 0,
+            "loop_lag": max(0, int(loop_lag_ms)),
+        }
+        if not self.shedding:
+            for signal, threshold in self.shed_thresholds.items():
+                if self._signals[signal] >= threshold:
+                    self.shedding = True
+                    self.reason = signal
+                    self._shed_since = self.clock()
+                    self.shed_episodes += 1
+                    return
+            return
+        if self.clock() - self._shed_since < self.min_shed_seconds:
+            return
+        if all(
+            self._signals[signal] <= threshold
+            for signal, threshold in self.recover_thresholds.items()
+        ):
+            self.shedding = False
+            self.reason = None
+
+    def admit_cards(self, count: int = 1) -> bool:
+        """Return False, counting ``count`` shed links, while shedding."""
+        if not self.shedding:
+            return True
+        self.shed_links += max(0, int(count))
+        return False
+
+    def snapshot(self) -> AdmissionSnapshot:
+        return AdmissionSnapshot(
+            shedding=self.shedding,
+            reason=self.reason,
+            shed_links=self.shed_links,
+            shed_episodes=self.shed_episodes,
+            queue_depth=self._signals["queue"],
+            p95_ms=self._signals["latency"],
+            loop_lag_ms=self._signals["loop_lag"],
+        )
+
+
+async def sample_load(
+    controller: AdmissionController,
+    read_delivery_load: Callable[[], tuple[int, int]],
+    *,
+    interval_seconds: float = DEFAULT_SAMPLE_INTERVAL_SECONDS,
+) -> None:
+    """Feed queue depth, delivery p95, and loop lag to ``controller``.
+
+    Loop lag is how late this coroutine wakes from its own sleep.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval_seconds)
+        lag_ms = max(0.0, loop.time() - started - interval_seconds) * 1000
+        queue_depth, p95_ms = read_delivery_load()
+        controller.observe(
+            queue_depth=queue_depth,
+            p95_ms=p95_ms,
+            loop_lag_ms=round(lag_ms),
+        )
+
+
+def format_admission_health(snapshot: AdmissionSnapshot) -> str:
+    """Render load-shedding state for the Reliability page."""
+    link_label = "link" if snapshot.shed_links == 1 else "links"
+    episode_label = "episode" if snapshot.shed_episodes == 1 else "episodes"
+    if snapshot.shedding:
+        state = f"Active ({SHED_REASON_LABELS.get(snapshot.reason, 'load')})"
+    else:
+        state = "Off"
+    return (
+        f"**Load shedding:** {state} · {snapshot.shed_links} {link_label} sent "
+        f"link-only in {snapshot.shed_episodes} {episode_label}"
+    )
@@ -5,11 +5,11 @@ from __future__ import annotations
 from typing import Any, Mapping, Optional
 from urllib.parse import quote
 
-import aiohttp
 import discord
 
 from component_emojis import format_component_stats
 from embed_footer import FooterBranding, build_component_footer, translated_source_name
+from http_client import http_session
 from card_preferences import CardPreferences, apply_caption_preferences
 from timestamp_utils import parse_post_timestamp
 
@@ -120,15 +120,14 @@ def build_bluesky_layout(
     return view
 
 
-async def _fetch_bluesky_payload(
+async def fetch_bluesky_payload(
     source_url: str,
     translation_language: Optional[str] = None,
 ) -> Mapping[str, Any]:
     api_url = f"{FIXEMBED_API}?url={quote(source_url, safe='')}"
     if translation_language:
         api_url += f"&lang={quote(translation_language, safe='')}"
-    timeout = aiohttp.ClientTimeout(total=15)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async with http_session("metadata") as session:
         async with session.get(api_url) as response:
             response.raise_for_status()
             body = await response.json()
@@ -148,7 +147,7 @@ async def fetch_bluesky_layout(
 ) -> discord.ui.LayoutView:
     """Fetch first-party metadata and return a Bluesky Components V2 card."""
     return build_bluesky_layout(
-        await _fetch_bluesky_payload(source_url, translation_language),
+        await fetch_bluesky_payload(source_url, translation_language),
         converted_url,
         footer_branding,
         card_preferences,
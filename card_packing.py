@@ -0,0 +1,94 @@
+"""Combine consecutive Components V2 cards into as few messages as possible."""
+
+from __future__ import annotations
+
+import copy
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import discord
+
+
+# Discord's per-message Components V2 limits.
+MAX_MESSAGE_COMPONENTS = 40
+MAX_MESSAGE_TEXT_LENGTH = 4000
+MAX_MESSAGE_ATTACHMENTS = 10
+
+
+@dataclass(frozen=True)
+class CardPack:
+    cards: tuple[Any, ...]
+    view: discord.ui.LayoutView
+    files: tuple[discord.File, ...]
+
+
+def _fits(components: int, text_length: int, files: int) -> bool:
+    return (
+        components <= MAX_MESSAGE_COMPONENTS
+        and text_length <= MAX_MESSAGE_TEXT_LENGTH
+        and files <= MAX_MESSAGE_ATTACHMENTS
+    )
+
+
+def plan_card_packs(cards: Sequence[Any]) -> list[list[Any]]:
+    """Group cards in order so each group fits in one message.
+
+    At most one card per group carries attachments: attachment names are
+    only unique within a card, and one carousel can already use most of
+    the upload limit.
+    """
+    packs: list[list[Any]] = []
+    components = text_length = files = 0
+    for card in cards:
+        card_components = card.view.total_children_count
+        card_text = card.view.content_length()
+        card_files = len(card.files)
+        if packs and _fits(
+            components + card_components,
+            text_length + card_text,
+            files + card_files,
+        ) and not (files and card_files):
+            packs[-1].append(card)
+            components += card_components
+            text_length += card_text
+            files += card_files
+            continue
+        packs.append([card])
+        components, text_length, files = card_components, card_text, card_files
+    return packs
+
+
+def _detached_copy(
+    item: discord.ui.Item,
+    view: discord.ui.LayoutView,
+) -> discord.ui.Item:
+    # The memo stops deepcopy at the source view, which holds futures.
+    return copy.deepcopy(item, {id(view): None})
+
+
+def pack_cards(cards: Sequence[Any]) -> list[CardPack]:
+    """Merge copies of each planned group's containers into one layout view.
+
+    ``LayoutView.add_item`` re-parents the item it is given, so merged
+    views hold copies and every card keeps its own view for the per-card
+    fallback.
+    """
+    packs = []
+    for group in plan_card_packs(cards):
+        if len(group) == 1:
+            card = group[0]
+            packs.append(CardPack(tuple(group), card.view, tuple(card.files)))
+            continue
+        view = discord.ui.LayoutView(timeout=None)
+        for card in group:
+            for item in card.view.children:
+                view.add_item(_detached_copy(item, card.view))
+        packs.append(
+            CardPack(
+                tuple(group),
+                view,
+                tuple(file for card in group for file in card.files),
+            )
+        )
+    return packs
@@ -83,6 +83,9 @@ def _bounded_status(error: BaseException) -> Optional[int]:
 
 def classify_build_failure(error: BaseException) -> str:
     """Map arbitrary exceptions onto a fixed, low-cardinality category set."""
+    cached_category = getattr(error, "failure_category", None)
+    if cached_category in FAILURE_LABELS:
+        return cached_category
     if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
         return "timeout"
     status = _bounded_status(error)
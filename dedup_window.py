@@ -0,0 +1,126 @@
+"""Bounded, self-expiring record of recently processed links."""
+
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+
+
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_RESOLUTION_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class DedupSnapshot:
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class DedupWindow:
+    """Time wheel of per-tick key slots with O(1) mark and check.
+
+    Each key lives in the slot of the tick it was last marked in; advancing
+    the wheel clears slots as they come round again, so memory tracks only
+    the last ``window_seconds`` of traffic. A hard cap evicts from the
+    oldest slot when bursts exceed ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        *,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        resolution_seconds: float = DEFAULT_RESOLUTION_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_seconds = float(window_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.resolution_seconds = float(resolution_seconds)
+        self.clock = clock
+        slot_count = math.ceil(self.window_seconds / self.resolution_seconds) + 1
+        self._slots: list[set[Hashable]] = [set() for _ in range(slot_count)]
+        self._marked_at: dict[Hashable, tuple[float, int]] = {}
+        self._tick = self._tick_for(clock())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._marked_at)
+
+    def seen(self, key: Hashable) -> bool:
+        """Return whether ``key`` was marked within the window."""
+        now = self.clock()
+        self._advance(now)
+        marked = self._marked_at.get(key)
+        if marked is not None and now - marked[0] < self.window_seconds:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def mark(self, key: Hashable) -> None:
+        now = self.clock()
+        self._advance(now)
+        previous = self._marked_at.get(key)
+        if previous is not None:
+            self._slots[previous[1] % len(self._slots)].discard(key)
+        elif len(self._marked_at) >= self.max_entries:
+            self._evict_oldest()
+        self._marked_at[key] = (now, self._tick)
+        self._slots[self._tick % len(self._slots)].add(key)
+
+    def clear(self) -> None:
+        for slot in self._slots:
+            slot.clear()
+        self._marked_at.clear()
+
+    def snapshot(self) -> DedupSnapshot:
+        self._advance(self.clock())
+        return DedupSnapshot(
+            entries=len(self._marked_at),
+            max_entries=self.max_entries,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+    def _tick_for(self, now: float) -> int:
+        return int(now // self.resolution_seconds)
+
+    def _advance(self, now: float) -> None:
+        tick = self._tick_for(now)
+        if tick <= self._tick:
+            return
+        if tick - self._tick >= len(self._slots):
+            self.clear()
+        else:
+            for expired in range(self._tick + 1, tick + 1):
+                self._expire(self._slots[expired % len(self._slots)])
+        self._tick = tick
+
+    def _expire(self, slot: set[Hashable]) -> None:
+        for key in slot:
+            self._marked_at.pop(key, None)
+        slot.clear()
+
+    def _evict_oldest(self) -> None:
+        for offset in range(1, len(self._slots) + 1):
+            slot = self._slots[(self._tick + offset) % len(self._slots)]
+            if slot:
+                self._marked_at.pop(slot.pop(), None)
+                self.evictions += 1
+                return
+
+
+def format_dedup_health(snapshot: DedupSnapshot) -> str:
+    """Render duplicate-suppression memory use for the Reliability page."""
+    return (
+        f"**Recent-link dedup:** {snapshot.entries}/{snapshot.max_entries} tracked · "
+        f"{snapshot.hits} duplicates skipped"
+    )
@@ -11,11 +11,16 @@ import secrets
 import time
 from collections import Counter, deque
 from collections.abc import Awaitable, Callable
-from dataclasses import dataclass
-from typing import Literal, Optional
+from dataclasses import dataclass, field
+from typing import Literal, Mapping, Optional, Protocol
 
 
 DELIVERY_KINDS = frozenset({"card", "link"})
+PRIORITY_LABELS = {
+    "interactive": "Commands",
+    "automatic": "Automatic",
+    "background": "Background",
+}
 DOWNGRADE_REASONS = frozenset({"missing_manage_messages"})
 DEFAULT_CARD_DELIVERY_ATTEMPT_TIMEOUT_SECONDS = 15.0
 DEFAULT_LINK_DELIVERY_ATTEMPT_TIMEOUT_SECONDS = 15.0
@@ -32,12 +37,25 @@ FAILURE_LABELS = {
 LOGGER = logging.getLogger("fixembed.delivery")
 
 
+class SendRateController(Protocol):
+    rate: float
+    ceiling: float
+    backoffs: int
+
+    def succeeded(self) -> None: ...
+
+    def rate_limited(self) -> None: ...
+
+
 @dataclass
 class DeliveryTicket:
     request_id: str
     kind: str
     enqueued_at: float
     completed: bool = False
+    guild_id: Optional[int] = None
+    priority: str = "automatic"
+    started: bool = False
 
 
 @dataclass(frozen=True)
@@ -51,6 +69,12 @@ class DeliverySnapshot:
     primary_failure: Optional[str]
     mode_downgrades: int
     primary_downgrade: Optional[str]
+    busy_guilds: int = 0
+    max_guild_pending: int = 0
+    queue_wait_p95_ms: Mapping[str, int] = field(default_factory=dict)
+    send_rate: Optional[float] = None
+    send_rate_cap: Optional[float] = None
+    rate_backoffs: int = 0
 
     @property
     def completed(self) -> int:
@@ -72,6 +96,8 @@ def classify_delivery_failure(error: BaseException) -> str:
     """Map Discord/send errors onto fixed operational categories."""
     if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
         return "timeout"
+    if getattr(error, "retry_after", None) is not None:
+        return "rate_limited"
     status = _bounded_status(error)
     if status == 403:
         return "forbidden"
@@ -107,8 +133,10 @@ class DeliveryTelemetry:
         *,
         clock: Callable[[], float] = time.monotonic,
         sample_size: int = 200,
+        send_rate: Optional[SendRateController] = None,
     ):
         self.clock = clock
+        self.send_rate = send_rate
         self.sample_size = max(1, min(int(sample_size), 1_000))
         self._total_queued = 0
         self._direct_deliveries = 0
@@ -118,21 +146,53 @@ class DeliveryTelemetry:
         self._rescued_failures: Counter[str] = Counter()
         self._fatal_failures: Counter[str] = Counter()
         self._mode_downgrades: Counter[str] = Counter()
+        # Held only while a guild has unfinished sends.
+        self._pending_by_guild: Counter[int] = Counter()
+        self._queue_waits_ms = {
+            priority: deque(maxlen=self.sample_size) for priority in PRIORITY_LABELS
+        }
 
-    def queued(self, kind: object) -> DeliveryTicket:
+    def queued(
+        self,
+        kind: object,
+        *,
+        guild_id: Optional[int] = None,
+        priority: str = "automatic",
+    ) -> DeliveryTicket:
         candidate = str(kind or "")
         kind_label = candidate if candidate in DELIVERY_KINDS else "other"
         self._total_queued += 1
+        if guild_id is not None:
+            self._pending_by_guild[guild_id] += 1
         return DeliveryTicket(
             request_id=secrets.token_hex(8),
             kind=kind_label,
             enqueued_at=self.clock(),
+            guild_id=guild_id,
+            priority=priority if priority in PRIORITY_LABELS else "automatic",
+        )
+
+    def started(self, ticket: DeliveryTicket) -> None:
+        """Record how long a send waited in the queue for its class."""
+        if ticket.started:
+            return
+        ticket.started = True
+        wait_ms = max(
+            0,
+            min(round((self.clock() - ticket.enqueued_at) * 1000), 120_000),
         )
+        self._queue_waits_ms[ticket.priority].append(wait_ms)
+
+    def pending_for(self, guild_id: int) -> int:
+        """Unfinished sends queued by one guild."""
+        return self._pending_by_guild.get(guild_id, 0)
 
     def delivered(self, ticket: DeliveryTicket) -> None:
         if not self._complete(ticket):
             return
         self._direct_deliveries += 1
+        if self.send_rate is not None:
+            self.send_rate.succeeded()
 
     def link_rescued(self, ticket: DeliveryTicket, error: BaseException) -> None:
         if not self._complete(ticket):
@@ -140,6 +200,7 @@ class DeliveryTelemetry:
         self._link_rescues += 1
         category = classify_delivery_failure(error)
         self._rescued_failures[category] += 1
+        self._observe_rate(category)
         self._log(
             logging.WARNING,
             event="discord_delivery_link_rescued",
@@ -154,6 +215,7 @@ class DeliveryTelemetry:
         self._failed += 1
         category = classify_delivery_failure(error)
         self._fatal_failures[category] += 1
+        self._observe_rate(category)
         self._log(
             logging.ERROR,
             event="discord_delivery_failed",
@@ -167,10 +229,20 @@ class DeliveryTelemetry:
         reason_label = candidate if candidate in DOWNGRADE_REASONS else "other"
         self._mode_downgrades[reason_label] += 1
 
+    def _observe_rate(self, category: str) -> None:
+        # A send stalled past its timeout is usually discord.py sleeping
+        # through 429s, so it counts as congestion too.
+        if category in ("rate_limited", "timeout") and self.send_rate is not None:
+            self.send_rate.rate_limited()
+
     def _complete(self, ticket: DeliveryTicket) -> bool:
         if ticket.completed:
             return False
         ticket.completed = True
+        if ticket.guild_id is not None:
+            self._pending_by_guild[ticket.guild_id] -= 1
+            if self._pending_by_guild[ticket.guild_id] <= 0:
+                del self._pending_by_guild[ticket.guild_id]
         duration_ms = max(
             0,
             min(round((self.clock() - ticket.enqueued_at) * 1000), 120_000),
@@ -226,6 +298,18 @@ class DeliveryTelemetry:
             primary_failure=primary_failure,
             mode_downgrades=sum(self._mode_downgrades.values()),
             primary_downgrade=primary_downgrade,
+            busy_guilds=len(self._pending_by_guild),
+            max_guild_pending=max(self._pending_by_guild.values(), default=0),
+            queue_wait_p95_ms={
+                priority: _percentile_95(list(waits))
+                for priority, waits in self._queue_waits_ms.items()
+                if waits
+            },
+            send_rate=self.send_rate.rate if self.send_rate is not None else None,
+            send_rate_cap=(
+                self.send_rate.ceiling if self.send_rate is not None else None
+            ),
+            rate_backoffs=self.send_rate.backoffs if self.send_rate is not None else 0,
         )
 
 
@@ -275,7 +359,12 @@ async def deliver_with_fallback(
         return "direct"
 
 
-def format_delivery_health(snapshot: DeliverySnapshot, *, pending: int) -> str:
+def format_delivery_health(
+    snapshot: DeliverySnapshot,
+    *,
+    pending: int,
+    guild_pending: Optional[int] = None,
+) -> str:
     """Render bounded Discord delivery health for the Reliability page."""
     try:
         pending_count = max(0, min(int(pending), 1_000_000))
@@ -301,6 +390,26 @@ def format_delivery_health(snapshot: DeliverySnapshot, *, pending: int) -> str:
         lines = [
             f"**Discord delivery:** No completed sends yet · {pending_count} pending"
         ]
+    if snapshot.queue_wait_p95_ms:
+        waits = " · ".join(
+            f"{PRIORITY_LABELS[priority]} {wait_ms}ms"
+            for priority, wait_ms in snapshot.queue_wait_p95_ms.items()
+        )
+        lines.append(f"**Queue wait p95:** {waits}")
+    if snapshot.send_rate is not None:
+        backoff_label = "backoff" if snapshot.rate_backoffs == 1 else "backoffs"
+        lines.append(
+            f"**Send rate:** {snapshot.send_rate:.1f}/s of "
+            f"{snapshot.send_rate_cap:.0f}/s cap · {snapshot.rate_backoffs} "
+            f"rate-limit {backoff_label}"
+        )
+    if guild_pending is not None and snapshot.busy_guilds:
+        server_label = "server" if snapshot.busy_guilds == 1 else "servers"
+        lines.append(
+            f"**Fair queue:** {max(0, int(guild_pending))} pending here · "
+            f"deepest {snapshot.max_guild_pending} across "
+            f"{snapshot.busy_guilds} busy {server_label}"
+        )
     if snapshot.mode_downgrades:
         downgrade_label = (
             "reply downgrade" if snapshot.mode_downgrades == 1 else "reply downgrades"
@@ -3,12 +3,10 @@
 from __future__ import annotations
 
 import asyncio
-from collections import OrderedDict
 from datetime import datetime, timezone
 from html.parser import HTMLParser
 import json
 import re
-import time
 from typing import Any, Mapping, Optional
 from urllib.parse import urlparse
 
@@ -18,6 +16,7 @@ from discord.utils import escape_markdown, escape_mentions
 
 from card_preferences import CardPreferences
 from embed_footer import FooterBranding
+from http_client import http_session
 from platform_embed import PlatformCardSpec, build_platform_layout, fetch_platform_payload
 
 
@@ -31,28 +30,26 @@ DEVIANTART_SPEC = PlatformCardSpec(
 DEVIANTART_OEMBED_URL = "https://backend.deviantart.com/oembed"
 MAX_OEMBED_BYTES = 512_000
 MAX_PROFILE_METADATA_BYTES = 256_000
-MAX_CACHE_ENTRIES = 256
-CACHE_TTL_SECONDS = 300
-NEGATIVE_CACHE_TTL_SECONDS = 30
 DEFAULT_RATE_LIMIT_SECONDS = 60
 MAX_RATE_LIMIT_SECONDS = 900
 MEDIA_HOST_SUFFIXES = ("wixmp.com", "deviantart.net", "deviantart.com")
 
-_payload_cache: OrderedDict[str, tuple[float, Mapping[str, Any]]] = OrderedDict()
-_negative_cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
-_inflight: dict[str, asyncio.Task[Mapping[str, Any]]] = {}
-_rate_limited_until = float("-inf")
-
 
 class DeviantArtSourceError(RuntimeError):
     """Raised when DeviantArt cannot provide safe public metadata."""
 
+    def __init__(self, message: str, *, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        if status is None:
+            self.failure_category = "invalid_response"
+
 
 class DeviantArtRateLimitError(DeviantArtSourceError):
     """Raised with a bounded cooldown when public oEmbed is throttled."""
 
     def __init__(self, retry_after_seconds: int):
-        super().__init__("DeviantArt rate limited metadata retrieval")
+        super().__init__("DeviantArt rate limited metadata retrieval", status=429)
         self.retry_after_seconds = retry_after_seconds
 
 
@@ -261,7 +258,10 @@ async def _read_oembed_response(response: aiohttp.ClientResponse) -> Mapping[str
             min(MAX_RATE_LIMIT_SECONDS, max(1, retry_after))
         )
     if response.status != 200:
-        raise DeviantArtSourceError(f"DeviantArt returned {response.status}")
+        raise DeviantArtSourceError(
+            f"DeviantArt returned {response.status}",
+            status=response.status,
+        )
     try:
         declared_length = int(response.headers.get("Content-Length", "0"))
     except ValueError as error:
@@ -289,16 +289,7 @@ async def _request_deviantart_oembed_payload(
     source_url: str,
 ) -> Mapping[str, Any]:
     canonical_url, _ = _source_identity(source_url)
-    timeout = aiohttp.ClientTimeout(total=8, connect=3, sock_read=5)
-    async with aiohttp.ClientSession(
-        timeout=timeout,
-        raise_for_status=False,
-        trust_env=False,
-        headers={
-            "Accept": "application/json",
-            "User-Agent": "FixEmbed/1.0 (+https://fixembed.app)",
-        },
-    ) as session:
+    async with http_session("deviantart") as session:
         async with session.get(
             DEVIANTART_OEMBED_URL,
             params={"url": canonical_url, "maxwidth": "1200"},
@@ -317,7 +308,7 @@ async def _request_deviantart_oembed_payload(
 
 
 async def _fetch_deviantart_profile_avatar(
-    session: aiohttp.ClientSession,
+    session: Any,
     author_url_value: Any,
 ) -> Optional[str]:
     author_url = _trusted_url(author_url_value, media=False)
@@ -348,68 +339,8 @@ async def _fetch_deviantart_profile_avatar(
 async def _fetch_deviantart_oembed_payload(
     source_url: str,
 ) -> Mapping[str, Any]:
-    global _rate_limited_until
-
     canonical_url, _ = _source_identity(source_url)
-    cached = _payload_cache.get(canonical_url)
-    if cached is not None:
-        expires_at, payload = cached
-        if expires_at > time.monotonic():
-            _payload_cache.move_to_end(canonical_url)
-            return payload
-        _payload_cache.pop(canonical_url, None)
-
-    now = time.monotonic()
-    if now < _rate_limited_until:
-        raise DeviantArtRateLimitError(
-            max(1, int(_rate_limited_until - now))
-        )
-
-    cached_error = _negative_cache.get(canonical_url)
-    if cached_error is not None:
-        expires_at, message = cached_error
-        if expires_at > time.monotonic():
-            _negative_cache.move_to_end(canonical_url)
-            raise DeviantArtSourceError(message)
-        _negative_cache.pop(canonical_url, None)
-
-    pending = _inflight.get(canonical_url)
-    if pending is None:
-        pending = asyncio.create_task(
-            _request_deviantart_oembed_payload(canonical_url)
-        )
-        _inflight[canonical_url] = pending
-    try:
-        payload = await pending
-    except (aiohttp.ClientError, asyncio.TimeoutError, DeviantArtSourceError) as error:
-        error_ttl = NEGATIVE_CACHE_TTL_SECONDS
-        if isinstance(error, DeviantArtRateLimitError):
-            error_ttl = error.retry_after_seconds
-            _rate_limited_until = max(
-                _rate_limited_until,
-                time.monotonic() + error_ttl,
-            )
-        _negative_cache[canonical_url] = (
-            time.monotonic() + error_ttl,
-            str(error),
-        )
-        _negative_cache.move_to_end(canonical_url)
-        while len(_negative_cache) > MAX_CACHE_ENTRIES:
-            _negative_cache.popitem(last=False)
-        raise
-    finally:
-        if _inflight.get(canonical_url) is pending:
-            _inflight.pop(canonical_url, None)
-
-    _negative_cache.pop(canonical_url, None)
-    _payload_cache[canonical_url] = (
-        time.monotonic() + CACHE_TTL_SECONDS,
-        payload,
-    )
-    _payload_cache.move_to_end(canonical_url)
-    while len(_payload_cache) > MAX_CACHE_ENTRIES:
-        _payload_cache.popitem(last=False)
-    return payload
+    return await _request_deviantart_oembed_payload(canonical_url)
 
 
 async def fetch_deviantart_payload(source_url: str) -> Mapping[str, Any]:
@@ -441,6 +372,20 @@ def build_deviantart_layout(
     )
 
 
+async def fetch_deviantart_card_payload(
+    source_url: str,
+    translation_language: Optional[str] = None,
+) -> Mapping[str, Any]:
+    """Use bot-runtime oEmbed unless the card needs Worker translation."""
+    if translation_language:
+        return await fetch_platform_payload(
+            source_url,
+            "deviantart",
+            translation_language,
+        )
+    return await fetch_deviantart_payload(source_url)
+
+
 async def fetch_deviantart_layout(
     source_url: str,
     converted_url: Optional[str] = None,
@@ -449,16 +394,8 @@ async def fetch_deviantart_layout(
     *,
     translation_language: Optional[str] = None,
 ) -> discord.ui.LayoutView:
-    if translation_language:
-        payload = await fetch_platform_payload(
-            source_url,
-            "deviantart",
-            translation_language,
-        )
-    else:
-        payload = await fetch_deviantart_payload(source_url)
     return build_deviantart_layout(
-        payload,
+        await fetch_deviantart_card_payload(source_url, translation_language),
         converted_url,
         footer_branding,
         card_preferences,
@@ -0,0 +1,122 @@
+"""Immutable per-guild settings resolved once for the message hot path."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Optional
+
+from card_preferences import CardPreferences, preferences_from_settings
+from embed_footer import FooterBranding
+from premium_controls import normalize_premium_controls
+
+
+CHANNEL_RULE_STATES = {"on": True, "off": False}
+
+
+@dataclass(frozen=True, slots=True)
+class GuildRuntimeConfig:
+    """Everything on_message needs about one guild, as O(1) lookups."""
+
+    guild_id: int
+    premium: bool
+    settings: Mapping[str, Any]
+    enabled_services: frozenset[str]
+    channel_rules: Mapping[tuple[int, str], bool]
+    mention_users: bool
+    delete_original: bool
+    delivery_mode: str
+    media_quality: str
+    card_preferences: CardPreferences
+    footer_branding: Optional[FooterBranding]
+    ignored_user_ids: frozenset[int]
+    ignored_role_ids: frozenset[int]
+
+    def service_enabled(self, channel_id: int, service: str) -> bool:
+        """Apply a channel's forced rule, else the guild's enabled services."""
+        rule = self.channel_rules.get((channel_id, service))
+        return service in self.enabled_services if rule is None else rule
+
+    def skips_author(self, author) -> bool:
+        """Match Premium exclusions; always False for non-Premium guilds."""
+        if int(author.id) in self.ignored_user_ids:
+            return True
+        if not self.ignored_role_ids:
+            return False
+        return any(
+            int(role.id) in self.ignored_role_ids
+            for role in getattr(author, "roles", ())
+        )
+
+
+def build_guild_runtime_config(
+    guild_id: int,
+    settings: Mapping[str, Any],
+    *,
+    premium: bool,
+    default_enabled_services: Iterable[str],
+    channel_rules: Mapping[tuple[int, str], str],
+    footer_branding: Optional[FooterBranding],
+) -> GuildRuntimeConfig:
+    ignored_user_ids: frozenset[int] = frozenset()
+    ignored_role_ids: frozenset[int] = frozenset()
+    if premium:
+        controls = normalize_premium_controls(settings)
+        ignored_user_ids = frozenset(controls["ignored_user_ids"])
+        ignored_role_ids = frozenset(controls["ignored_role_ids"])
+    return GuildRuntimeConfig(
+        guild_id=guild_id,
+        premium=premium,
+        settings=settings,
+        enabled_services=frozenset(
+            settings.get("enabled_services", default_enabled_services)
+        ),
+        channel_rules=MappingProxyType(
+            {
+                key: CHANNEL_RULE_STATES[action]
+                for key, action in channel_rules.items()
+                if action in CHANNEL_RULE_STATES
+            }
+        ),
+        mention_users=settings.get("mention_users", True),
+        delete_original=settings.get("delete_original", True),
+        delivery_mode=settings.get("delivery_mode", "suppress"),
+        media_quality=settings.get("media_quality", "balanced"),
+        card_preferences=preferences_from_settings(settings, premium=premium),
+        footer_branding=footer_branding,
+        ignored_user_ids=ignored_user_ids,
+        ignored_role_ids=ignored_role_ids,
+    )
+
+
+class GuildRuntimeConfigs:
+    """Per-guild config cache, invalidated whenever a guild's settings change.
+
+    Entries also carry the Premium state they were built for, so an
+    entitlement change resolves to a fresh config without an explicit hook.
+    """
+
+    def __init__(self) -> None:
+        self._configs: dict[int, GuildRuntimeConfig] = {}
+        self.builds = 0
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    def get(self, guild_id: int, *, premium: bool) -> Optional[GuildRuntimeConfig]:
+        config = self._configs.get(guild_id)
+        if config is None or config.premium != premium:
+            return None
+        return config
+
+    def put(self, config: GuildRuntimeConfig) -> GuildRuntimeConfig:
+        self._configs[config.guild_id] = config
+        self.builds += 1
+        return config
+
+    def invalidate(self, guild_id: int) -> None:
+        self._configs.pop(guild_id, None)
+
+    def clear(self) -> None:
+        self._configs.clear()
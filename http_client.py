@@ -0,0 +1,131 @@
+"""Process-wide pooled HTTP client shared by every platform fetcher."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import aiohttp
+
+
+POOL_MAX_CONNECTIONS = 100
+POOL_MAX_CONNECTIONS_PER_HOST = 32
+POOL_KEEPALIVE_SECONDS = 30
+DNS_CACHE_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class RequestProfile:
+    timeout: aiohttp.ClientTimeout
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+
+REQUEST_PROFILES = {
+    "metadata": RequestProfile(aiohttp.ClientTimeout(total=15)),
+    "deviantart": RequestProfile(
+        aiohttp.ClientTimeout(total=8, connect=3, sock_read=5),
+        {
+            "Accept": "application/json",
+            "User-Agent": "FixEmbed/1.0 (+https://fixembed.app)",
+        },
+    ),
+    "carousel": RequestProfile(aiohttp.ClientTimeout(total=6)),
+    "video": RequestProfile(aiohttp.ClientTimeout(total=60)),
+}
+
+
+def request_profile(name: str) -> RequestProfile:
+    try:
+        return REQUEST_PROFILES[name]
+    except KeyError as error:
+        raise ValueError(f"unknown HTTP request profile: {name}") from error
+
+
+class ProfiledSession:
+    """Apply one profile's timeout and headers to requests on a shared session."""
+
+    def __init__(self, session: aiohttp.ClientSession, profile: RequestProfile):
+        self._session = session
+        self._profile = profile
+
+    def get(self, url: Any, **kwargs: Any):
+        return self.request("GET", url, **kwargs)
+
+    def request(self, method: str, url: Any, **kwargs: Any):
+        kwargs.setdefault("timeout", self._profile.timeout)
+        if self._profile.headers:
+            kwargs["headers"] = {
+                **self._profile.headers,
+                **(kwargs.get("headers") or {}),
+            }
+        return self._session.request(method, url, **kwargs)
+
+
+class SharedHttpClient:
+    """Own one keep-alive connection pool for the lifetime of the bot."""
+
+    def __init__(
+        self,
+        *,
+        max_connections: int = POOL_MAX_CONNECTIONS,
+        max_connections_per_host: int = POOL_MAX_CONNECTIONS_PER_HOST,
+        keepalive_seconds: float = POOL_KEEPALIVE_SECONDS,
+        dns_cache_ttl_seconds: int = DNS_CACHE_TTL_SECONDS,
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_seconds = keepalive_seconds
+        self.dns_cache_ttl_seconds = dns_cache_ttl_seconds
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def open(self) -> None:
+        """Create the pool; repeated calls (for example on reconnect) are no-ops."""
+        if self.is_open:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            keepalive_timeout=self.keepalive_seconds,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl_seconds,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=REQUEST_PROFILES["metadata"].timeout,
+            raise_for_status=False,
+            trust_env=False,
+        )
+
+    async def close(self) -> None:
+        session, self._session = self._session, None
+        if session is not None and not session.closed:
+            await session.close()
+
+    @asynccontextmanager
+    async def session(self, profile: str = "metadata") -> AsyncIterator[Any]:
+        """Yield the pooled session, or a short-lived one before the bot is ready."""
+        selected = request_profile(profile)
+        if self.is_open:
+            yield ProfiledSession(self._session, selected)
+            return
+        async with aiohttp.ClientSession(
+            timeout=selected.timeout,
+            headers=dict(selected.headers) or None,
+            raise_for_status=False,
+            trust_env=False,
+        ) as transient:
+            yield transient
+
+
+shared_http_client = SharedHttpClient()
+
+
+def http_session(profile: str = "metadata"):
+    """Single injection point used by the platform fetchers."""
+    return shared_http_client.session(profile)
@@ -3,11 +3,11 @@
 from __future__ import annotations
 
 import asyncio
-import io
+import contextlib
 import logging
 import time
 from dataclasses import dataclass
-from typing import Any, Mapping, Optional, Sequence
+from typing import Any, BinaryIO, Mapping, Optional, Sequence, Union
 from urllib.parse import quote, urlsplit
 
 import aiohttp
@@ -15,6 +15,17 @@ import discord
 
 from component_emojis import format_component_stats
 from embed_footer import FooterBranding, build_component_footer, translated_source_name
+from http_client import http_session
+from media_budget import MediaBudget, MediaBudgetExhausted
+from media_cache import MediaCache
+from media_optimizer import MediaOptimizer
+from media_spool import (
+    SPOOL_CHUNK_BYTES,
+    close_media,
+    media_file,
+    media_size,
+    spool_chunks,
+)
 from card_preferences import CardPreferences, apply_caption_preferences
 from timestamp_utils import parse_post_datetime, parse_post_timestamp
 
@@ -29,7 +40,6 @@ INSTAGRAM_WEB_APP_ID = "936619743392459"
 INSTAGRAM_PROFILE_API_HOSTS = ("www.instagram.com", "i.instagram.com")
 INSTAGRAM_HD_AVATAR_COOLDOWN_SECONDS = 30 * 60
 INSTAGRAM_AVATAR_ENRICHMENT_TIMEOUT_SECONDS = 1.5
-INSTAGRAM_CAROUSEL_DOWNLOAD_TIMEOUT_SECONDS = 6
 INSTAGRAM_CAROUSEL_MAX_ITEMS = 10
 INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES = 10 * 1024 * 1024
 INSTAGRAM_ATTACHMENT_MAX_TOTAL_BYTES = 25 * 1024 * 1024
@@ -92,7 +102,7 @@ def _relay_instagram_media_url(value: str) -> str:
 
 async def _upgrade_instagram_avatar(
     payload: Mapping[str, Any],
-    session: aiohttp.ClientSession,
+    session: Any,
 ) -> Mapping[str, Any]:
     global _instagram_avatar_blocked_until
 
@@ -219,6 +229,7 @@ def build_instagram_layout(
     footer_branding: Optional[FooterBranding] = None,
     card_preferences: Optional[CardPreferences] = None,
     gallery_media_urls: Optional[Sequence[str]] = None,
+    gallery_description: Optional[str] = None,
 ) -> discord.ui.LayoutView:
     """Build an Embedded-style Components V2 card with remotely unfurled media."""
     name = str(payload.get("authorName") or "Instagram").strip().lstrip("@")
@@ -277,7 +288,7 @@ def build_instagram_layout(
                     *(
                         discord.MediaGalleryItem(
                             url,
-                            description=(
+                            description=gallery_description or (
                                 f"Instagram {media_kind} {index + 1} of {total_media}"
                             ),
                             spoiler=payload.get("sensitive") is True,
@@ -317,12 +328,16 @@ def build_instagram_layout(
 
 def build_instagram_delivery(
     payload: Mapping[str, Any],
-    downloaded_images: Sequence[tuple[bytes, str]],
+    downloaded_images: Sequence[tuple[Union[bytes, BinaryIO], str]],
     converted_url: Optional[str] = None,
     footer_branding: Optional[FooterBranding] = None,
     card_preferences: Optional[CardPreferences] = None,
 ) -> InstagramDelivery:
-    """Build a V2 gallery backed by message attachments."""
+    """Build a V2 gallery backed by message attachments.
+
+    Spooled downloads are attached as they are, without reading them back
+    into memory; the caller closes them once the message is delivered.
+    """
     image_urls = payload.get("images") if isinstance(payload.get("images"), list) else []
     if len(downloaded_images) != len(image_urls):
         raise ValueError("downloaded Instagram image count does not match carousel")
@@ -338,15 +353,16 @@ def build_instagram_delivery(
     total_bytes = 0
     for index, (content, content_type) in enumerate(downloaded_images, start=1):
         extension = extensions.get(content_type.lower().split(";", 1)[0].strip())
-        if not content or extension is None:
+        size = media_size(content)
+        if not size or extension is None:
             raise ValueError("Instagram carousel returned an unsupported image")
-        if len(content) > INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES:
+        if size > INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES:
             raise ValueError("Instagram carousel image exceeds the attachment limit")
-        total_bytes += len(content)
+        total_bytes += size
         if total_bytes > INSTAGRAM_ATTACHMENT_MAX_TOTAL_BYTES:
             raise ValueError("Instagram carousel exceeds the attachment limit")
         filename = f"instagram-{index:02d}.{extension}"
-        files.append(discord.File(io.BytesIO(content), filename=filename))
+        files.append(media_file(content, filename))
         attachment_urls.append(f"attachment://{filename}")
 
     return InstagramDelivery(
@@ -361,14 +377,87 @@ def build_instagram_delivery(
     )
 
 
+def _host_slot(media_budget: Optional[MediaBudget], url: str):
+    if media_budget is None:
+        return contextlib.nullcontext()
+    return media_budget.host_slot(urlsplit(url).hostname or "")
+
+
+def build_instagram_mosaic_delivery(
+    payload: Mapping[str, Any],
+    mosaic: bytes,
+    image_count: int,
+    converted_url: Optional[str] = None,
+    footer_branding: Optional[FooterBranding] = None,
+    card_preferences: Optional[CardPreferences] = None,
+) -> InstagramDelivery:
+    """Build a V2 card whose gallery is one composed carousel grid."""
+    if len(mosaic) > INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES:
+        raise ValueError("Instagram carousel mosaic exceeds the attachment limit")
+    filename = "instagram-mosaic.jpg"
+    return InstagramDelivery(
+        layout=build_instagram_layout(
+            payload,
+            converted_url,
+            footer_branding,
+            card_preferences,
+            gallery_media_urls=[f"attachment://{filename}"],
+            gallery_description=f"Instagram carousel of {image_count} images",
+        ),
+        files=(media_file(mosaic, filename),),
+    )
+
+
+async def _compose_instagram_mosaic(
+    payload: Mapping[str, Any],
+    downloads: Sequence[tuple[Union[bytes, BinaryIO], str]],
+    media_optimizer: MediaOptimizer,
+    converted_url: Optional[str],
+    footer_branding: Optional[FooterBranding],
+    card_preferences: Optional[CardPreferences],
+) -> Optional[InstagramDelivery]:
+    contents = []
+    for content, _ in downloads:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            contents.append(bytes(content))
+        else:
+            contents.append(content.read())
+            content.seek(0)
+    mosaic = await media_optimizer.mosaic(contents)
+    if mosaic is None:
+        return None
+    delivery = build_instagram_mosaic_delivery(
+        payload,
+        mosaic.content,
+        len(contents),
+        converted_url,
+        footer_branding,
+        card_preferences,
+    )
+    close_media(content for content, _ in downloads)
+    return delivery
+
+
 async def _download_instagram_image(
-    session: aiohttp.ClientSession,
+    session: Any,
     source_url: str,
-) -> tuple[bytes, str]:
+    media_budget: Optional[MediaBudget] = None,
+    media_cache: Optional[MediaCache] = None,
+    media_optimizer: Optional[MediaOptimizer] = None,
+) -> tuple[Union[bytes, BinaryIO], str]:
     if not _is_instagram_avatar_url(source_url):
         raise ValueError("Instagram carousel returned an untrusted image URL")
 
-    async with session.get(_relay_instagram_media_url(source_url)) as response:
+    relayed_url = _relay_instagram_media_url(source_url)
+    optimize = media_optimizer is not None and media_optimizer.enabled
+    # Re-encoded and original images are separate entries, so a mosaic's
+    # raw inputs never stand in for another repost's optimized attachments.
+    cache_key = f"{relayed_url}#optimized" if optimize else relayed_url
+    if media_cache is not None:
+        cached = await media_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    async with _host_slot(media_budget, relayed_url), session.get(relayed_url) as response:
         response.raise_for_status()
         content_type = str(response.headers.get("Content-Type") or "")
         normalized_type = content_type.lower().split(";", 1)[0].strip()
@@ -380,45 +469,91 @@ async def _download_instagram_image(
         ):
             raise ValueError("Instagram carousel image exceeds the attachment limit")
 
-        content = bytearray()
-        async for chunk in response.content.iter_chunked(64 * 1024):
-            content.extend(chunk)
-            if len(content) > INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES:
-                raise ValueError("Instagram carousel image exceeds the attachment limit")
-        return bytes(content), normalized_type
+        # Hold the advertised size, or the per-file limit when the relay
+        # does not send one, until the attachment is closed after delivery.
+        reservation = None
+        if media_budget is not None:
+            reservation = await media_budget.reserve(
+                response.content_length or INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES
+            )
+        try:
+            spooled = await spool_chunks(
+                response.content.iter_chunked(SPOOL_CHUNK_BYTES),
+                INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES,
+                on_close=reservation.release if reservation is not None else None,
+            )
+        except BaseException:
+            if reservation is not None:
+                reservation.release()
+            raise
+        if spooled is None:
+            raise ValueError("Instagram carousel image exceeds the attachment limit")
+        spool, size = spooled
+        content = None
+        # Copy the spool into memory only for a re-encode or a cache entry
+        # that fits, so oversized images stay off the heap.
+        if optimize or (media_cache is not None and media_cache.admits(size)):
+            content = spool.read()
+            spool.seek(0)
+        if optimize:
+            # The cache keeps the re-encoded image so reposts skip the work.
+            optimized = await media_optimizer.optimize(content, normalized_type)
+            if optimized is not None:
+                content, normalized_type = optimized.content, optimized.content_type
+                spool.truncate(0)
+                spool.write(content)
+                spool.seek(0)
+                size = len(content)
+        if reservation is not None:
+            reservation.shrink(size)
+        if media_cache is not None and content is not None:
+            await media_cache.put(cache_key, content, normalized_type)
+        return spool, normalized_type
 
 
 async def _download_instagram_carousel(
     image_urls: Sequence[str],
-) -> tuple[tuple[bytes, str], ...]:
+    media_budget: Optional[MediaBudget] = None,
+    media_cache: Optional[MediaCache] = None,
+    media_optimizer: Optional[MediaOptimizer] = None,
+) -> tuple[tuple[Union[bytes, BinaryIO], str], ...]:
     if not 2 <= len(image_urls) <= INSTAGRAM_CAROUSEL_MAX_ITEMS:
         raise ValueError("Instagram carousel attachment count is unsupported")
 
-    timeout = aiohttp.ClientTimeout(
-        total=INSTAGRAM_CAROUSEL_DOWNLOAD_TIMEOUT_SECONDS,
-    )
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        downloads = await asyncio.gather(
+    async with http_session("carousel") as session:
+        results = await asyncio.gather(
             *(
-                _download_instagram_image(session, str(image_url))
+                _download_instagram_image(
+                    session,
+                    str(image_url),
+                    media_budget,
+                    media_cache,
+                    media_optimizer,
+                )
                 for image_url in image_urls
-            )
+            ),
+            return_exceptions=True,
         )
 
-    if sum(len(content) for content, _ in downloads) > INSTAGRAM_ATTACHMENT_MAX_TOTAL_BYTES:
+    downloads = tuple(result for result in results if not isinstance(result, BaseException))
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        close_media(content for content, _ in downloads)
+        raise failures[0]
+    if sum(media_size(content) for content, _ in downloads) > INSTAGRAM_ATTACHMENT_MAX_TOTAL_BYTES:
+        close_media(content for content, _ in downloads)
         raise ValueError("Instagram carousel exceeds the attachment limit")
-    return tuple(downloads)
+    return downloads
 
 
-async def _fetch_instagram_payload(
+async def fetch_instagram_payload(
     source_url: str,
     translation_language: Optional[str] = None,
 ) -> Mapping[str, Any]:
     api_url = f"{FIXEMBED_API}?url={quote(source_url, safe='')}"
     if translation_language:
         api_url += f"&lang={quote(translation_language, safe='')}"
-    timeout = aiohttp.ClientTimeout(total=15)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async with http_session("metadata") as session:
         async with session.get(api_url) as response:
             response.raise_for_status()
             body = await response.json()
@@ -448,7 +583,7 @@ async def fetch_instagram_card(
 ) -> InstagramCard:
     """Fetch first-party metadata and return an exact Instagram card."""
     return build_instagram_card(
-        await _fetch_instagram_payload(source_url, translation_language),
+        await fetch_instagram_payload(source_url, translation_language),
         footer_icon_url,
     )
 
@@ -463,7 +598,7 @@ async def fetch_instagram_layout(
 ) -> discord.ui.LayoutView:
     """Fetch first-party metadata and return a playable Components V2 card."""
     return build_instagram_layout(
-        await _fetch_instagram_payload(source_url, translation_language),
+        await fetch_instagram_payload(source_url, translation_language),
         converted_url,
         footer_branding,
         card_preferences,
@@ -477,9 +612,44 @@ async def fetch_instagram_delivery(
     card_preferences: Optional[CardPreferences] = None,
     *,
     translation_language: Optional[str] = None,
+    media_budget: Optional[MediaBudget] = None,
+    media_cache: Optional[MediaCache] = None,
+    media_optimizer: Optional[MediaOptimizer] = None,
+    mosaic: bool = False,
 ) -> InstagramDelivery:
     """Fetch Instagram metadata and prepare a fast Components V2 delivery."""
-    payload = await _fetch_instagram_payload(source_url, translation_language)
+    return await prepare_instagram_delivery(
+        await fetch_instagram_payload(source_url, translation_language),
+        converted_url,
+        footer_branding,
+        card_preferences,
+        media_budget=media_budget,
+        media_cache=media_cache,
+        media_optimizer=media_optimizer,
+        mosaic=mosaic,
+    )
+
+
+async def prepare_instagram_delivery(
+    payload: Mapping[str, Any],
+    converted_url: Optional[str] = None,
+    footer_branding: Optional[FooterBranding] = None,
+    card_preferences: Optional[CardPreferences] = None,
+    *,
+    media_budget: Optional[MediaBudget] = None,
+    media_cache: Optional[MediaCache] = None,
+    media_optimizer: Optional[MediaOptimizer] = None,
+    mosaic: bool = False,
+) -> InstagramDelivery:
+    """Attach carousel images when needed, otherwise keep remote media.
+
+    When ``media_budget`` cannot admit the carousel, the card keeps the
+    remote gallery instead of waiting for memory to free up. Images found
+    in ``media_cache`` skip the download and the budget; new downloads
+    pass through ``media_optimizer`` before they are attached. With
+    ``mosaic``, the carousel is attached as one composed grid image when
+    ``media_optimizer`` can build it, and as separate images otherwise.
+    """
     video = payload.get("video")
     video_url = str(video.get("url") or "") if isinstance(video, Mapping) else ""
     raw_image_urls = payload.get("images")
@@ -492,14 +662,43 @@ async def fetch_instagram_delivery(
         not video_url
         and 2 <= len(image_urls) <= INSTAGRAM_CAROUSEL_MAX_ITEMS
     ):
-        downloads = await _download_instagram_carousel(tuple(image_urls))
-        return build_instagram_delivery(
-            payload,
-            downloads,
-            converted_url,
-            footer_branding,
-            card_preferences,
-        )
+        try:
+            downloads = await _download_instagram_carousel(
+                tuple(image_urls),
+                media_budget,
+                media_cache,
+                # Mosaic cells are resized anyway; skip per-image re-encoding.
+                None if mosaic else media_optimizer,
+            )
+        except MediaBudgetExhausted:
+            logging.info("Instagram carousel sent as a remote gallery: media budget exhausted")
+        else:
+            try:
+                if mosaic and media_optimizer is not None:
+                    delivery = await _compose_instagram_mosaic(
+                        payload,
+                        downloads,
+                        media_optimizer,
+                        converted_url,
+                        footer_branding,
+                        card_preferences,
+                    )
+                    if delivery is not None:
+                        return delivery
+                if mosaic:
+                    logging.info(
+                        "Instagram mosaic sent as separate attachments: grid unavailable"
+                    )
+                return build_instagram_delivery(
+                    payload,
+                    downloads,
+                    converted_url,
+                    footer_branding,
+                    card_preferences,
+                )
+            except Exception:
+                close_media(content for content, _ in downloads)
+                raise
 
     return InstagramDelivery(
         layout=build_instagram_layout(
@@ -519,19 +718,36 @@ async def fetch_instagram_embed(
     return (await fetch_instagram_card(source_url, footer_icon_url)).embed
 
 
-async def download_instagram_video(video_url: str, max_bytes: int) -> Optional[bytes]:
-    """Download a playable Instagram video without exceeding Discord's upload limit."""
-    timeout = aiohttp.ClientTimeout(total=60)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+async def download_instagram_video(
+    video_url: str,
+    max_bytes: int,
+    media_budget: Optional[MediaBudget] = None,
+) -> Optional[bytes]:
+    """Download a playable Instagram video without exceeding Discord's upload limit.
+
+    Returns None when the video is too large or ``media_budget`` cannot
+    hold it while it downloads.
+    """
+    async with _host_slot(media_budget, video_url), http_session("video") as session:
         async with session.get(video_url) as response:
             response.raise_for_status()
             content_length = response.content_length
             if content_length is not None and content_length > max_bytes:
                 return None
 
-            video = bytearray()
-            async for chunk in response.content.iter_chunked(64 * 1024):
-                video.extend(chunk)
-                if len(video) > max_bytes:
+            reservation = None
+            if media_budget is not None:
+                try:
+                    reservation = await media_budget.reserve(content_length or max_bytes)
+                except MediaBudgetExhausted:
                     return None
-            return bytes(video)
+            try:
+                video = bytearray()
+                async for chunk in response.content.iter_chunked(SPOOL_CHUNK_BYTES):
+                    video.extend(chunk)
+                    if len(video) > max_bytes:
+                        return None
+                return bytes(video)
+            finally:
+                if reservation is not None:
+                    reservation.release()
@@ -0,0 +1,79 @@
+"""Bounded, order-preserving concurrency for the links of one message."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import Optional, TypeVar, Union
+
+
+T = TypeVar("T")
+
+MAX_LINK_BUILDS_PER_MESSAGE = 4
+
+
+async def stream_bounded(
+    jobs: Sequence[Callable[[], Awaitable[T]]],
+    *,
+    limit: int = MAX_LINK_BUILDS_PER_MESSAGE,
+    discard: Optional[Callable[[T], None]] = None,
+) -> AsyncIterator[list[tuple[int, Union[T, Exception]]]]:
+    """Run jobs at most ``limit`` at a time and stream results in job order.
+
+    Each yield is the run of ``(sequence, result)`` pairs that became
+    deliverable together: the next result in sequence plus every later one
+    that had already finished. A failing job yields its exception in its own
+    slot instead of failing the batch. Unconsumed jobs are cancelled when the
+    stream is closed early; ``discard`` receives any result they produce
+    anyway, including ones that finished before the stream was closed.
+    """
+    semaphore = asyncio.Semaphore(max(1, int(limit)))
+
+    async def run(job: Callable[[], Awaitable[T]]) -> Union[T, Exception]:
+        async with semaphore:
+            try:
+                return await job()
+            except Exception as error:
+                return error
+
+    tasks = [asyncio.ensure_future(run(job)) for job in jobs]
+    next_sequence = 0
+    try:
+        while next_sequence < len(tasks):
+            await tasks[next_sequence]
+            batch = []
+            while next_sequence < len(tasks) and tasks[next_sequence].done():
+                batch.append((next_sequence, tasks[next_sequence].result()))
+                next_sequence += 1
+            yield batch
+    finally:
+        for task in tasks[next_sequence:]:
+            task.cancel()
+            if discard is not None:
+                task.add_done_callback(_discard_result(discard))
+
+
+def _discard_result(
+    discard: Callable[[T], None],
+) -> Callable[[asyncio.Future[Union[T, Exception]]], None]:
+    def callback(task: asyncio.Future[Union[T, Exception]]) -> None:
+        if task.cancelled():
+            return
+        result = task.result()
+        if not isinstance(result, Exception):
+            discard(result)
+
+    return callback
+
+
+async def gather_bounded(
+    jobs: Sequence[Callable[[], Awaitable[T]]],
+    *,
+    limit: int = MAX_LINK_BUILDS_PER_MESSAGE,
+) -> list[Union[T, Exception]]:
+    """Collect ``stream_bounded`` results into one list in job order."""
+    return [
+        result
+        async for batch in stream_bounded(jobs, limit=limit)
+        for _, result in batch
+    ]
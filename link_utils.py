@@ -1,9 +1,10 @@
 """Pure URL helpers shared by the Discord bot's link entry points."""
 
 from dataclasses import dataclass
+from functools import lru_cache
 import re
-from typing import List, Optional
-from urllib.parse import parse_qs, quote, urlparse, urlunparse
+from typing import Callable, List, NamedTuple, Optional
+from urllib.parse import ParseResult, parse_qs, quote, urlparse, urlunparse
 
 
 URL_PATTERN = re.compile(r"https?://[^\s<>]+", re.IGNORECASE)
@@ -36,16 +37,45 @@ class SupportedLink:
     mode: Optional[str] = None
 
 
-def _hostname(url: str) -> str:
-    hostname = (urlparse(url).hostname or "").lower()
-    return hostname[4:] if hostname.startswith("www.") else hostname
+LINK_MEMO_SIZE = 4096
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+TIKTOK_HANDLE_PATTERN = re.compile(r"[\w.-]+")
+TUMBLR_BLOG_PATTERN = re.compile(r"[\w-]+")
+TWITCH_CHANNEL_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+PINTEREST_PIN_ID_PATTERN = re.compile(r"(\d+)$")
+LANGUAGE_MODIFIER_PATTERN = re.compile(r"[A-Za-z]{2}")
 
 
-def _unwrap_fixembed_url(url: str) -> str:
-    parsed = urlparse(url)
-    if _hostname(url) != "fixembed.app" or parsed.path.rstrip("/") != "/embed":
+class _CanonicalLink(NamedTuple):
+    service: str
+    canonical_url: str
+    display_text: str
+    language: Optional[str] = None
+    mode: Optional[str] = None
+
+
+class _ParsedUrl(NamedTuple):
+    parsed: ParseResult
+    host: str
+    segments: List[str]
+
+
+def _parse_url(url: str) -> Optional[_ParsedUrl]:
+    try:
+        parsed = urlparse(url)
+        hostname = (parsed.hostname or "").lower()
+    except ValueError:
+        return None
+    host = hostname[4:] if hostname.startswith("www.") else hostname
+    return _ParsedUrl(parsed, host, [segment for segment in parsed.path.split("/") if segment])
+
+
+def _unwrap_parsed(url: _ParsedUrl) -> Optional[_ParsedUrl]:
+    """Follow a fixembed.app/embed wrapper to the source URL it carries."""
+    if url.host != "fixembed.app" or url.parsed.path.rstrip("/") != "/embed":
         return url
-    return parse_qs(parsed.query).get("url", [url])[0]
+    target = parse_qs(url.parsed.query).get("url")
+    return _parse_url(target[0]) if target else url
 
 
 def _strict_https_authority(parsed) -> bool:
@@ -60,212 +90,332 @@ def _strict_https_authority(parsed) -> bool:
         return False
 
 
+SERVICE_HOSTS = {
+    **{host: "Twitter" for host in TWITTER_HOSTS},
+    "instagram.com": "Instagram",
+    "reddit.com": "Reddit",
+    "old.reddit.com": "Reddit",
+    "pixiv.net": "Pixiv",
+    "threads.net": "Threads",
+    "threads.com": "Threads",
+    "bsky.app": "Bluesky",
+    "bskyx.app": "Bluesky",
+    "bilibili.com": "Bilibili",
+    "b23.tv": "Bilibili",
+    "youtube.com": "YouTube",
+    "pinterest.com": "Pinterest",
+    "pin.it": "Pinterest",
+    "tiktok.com": "TikTok",
+    "vm.tiktok.com": "TikTok",
+    "vt.tiktok.com": "TikTok",
+    "tumblr.com": "Tumblr",
+    "twitch.tv": "Twitch",
+    "clips.twitch.tv": "Twitch",
+    "deviantart.com": "DeviantArt",
+    "sta.sh": "DeviantArt",
+}
+# Any known host right after "//", "." (subdomains) or "@" (userinfo). This
+# may over-match; it must never miss a link extract_supported_links accepts.
+KNOWN_HOST_PATTERN = re.compile(
+    r"[/.@](?:"
+    + "|".join(
+        re.escape(host)
+        for host in sorted(set(SERVICE_HOSTS) | PRECONVERTED_HOSTS, key=len, reverse=True)
+    )
+    + ")",
+    re.IGNORECASE,
+)
+
+
+def may_contain_supported_link(text: str) -> bool:
+    """Cheaply reject message text that cannot hold a supported or proxy link."""
+    if "http" not in text and "://" not in text:
+        return False
+    return KNOWN_HOST_PATTERN.search(text) is not None
+
+
+def _is_tumblr_blog_host(host: str) -> bool:
+    return host.endswith(".tumblr.com") and host != "www.tumblr.com"
+
+
 def social_service(url: str) -> Optional[str]:
     """Return the supported service for a URL based on its hostname."""
-    hostname = _hostname(_unwrap_fixembed_url(url))
-    if hostname.endswith(".tumblr.com") and hostname != "www.tumblr.com":
+    parsed = _parse_url(url)
+    parsed = _unwrap_parsed(parsed) if parsed else None
+    if parsed is None:
+        return None
+    if _is_tumblr_blog_host(parsed.host):
         return "Tumblr"
-    hosts = {
-        **{host: "Twitter" for host in TWITTER_HOSTS},
-        "instagram.com": "Instagram",
-        "reddit.com": "Reddit",
-        "old.reddit.com": "Reddit",
-        "pixiv.net": "Pixiv",
-        "threads.net": "Threads",
-        "threads.com": "Threads",
-        "bsky.app": "Bluesky",
-        "bskyx.app": "Bluesky",
-        "bilibili.com": "Bilibili",
-        "b23.tv": "Bilibili",
-        "youtube.com": "YouTube",
-        "pinterest.com": "Pinterest",
-        "pin.it": "Pinterest",
-        "tiktok.com": "TikTok",
-        "vm.tiktok.com": "TikTok",
-        "vt.tiktok.com": "TikTok",
-        "tumblr.com": "Tumblr",
-        "twitch.tv": "Twitch",
-        "clips.twitch.tv": "Twitch",
-        "deviantart.com": "DeviantArt",
-        "sta.sh": "DeviantArt",
-    }
-    return hosts.get(hostname)
-
-
-def _canonicalize(url: str) -> Optional[tuple[str, str, str]]:
-    url = _unwrap_fixembed_url(url)
-    parsed = urlparse(url)
-    host = _hostname(url)
-    segments = [segment for segment in parsed.path.split("/") if segment]
-
-    if host in TWITTER_HOSTS and len(segments) >= 3 and segments[1].lower() == "status" and segments[2].isdigit():
-        username, post_id = segments[0], segments[2]
-        return "Twitter", f"https://x.com/{username}/status/{post_id}", f"Twitter • {username}"
-
-    if host == "instagram.com" and len(segments) >= 2 and segments[0].lower() in {"p", "reel", "reels"}:
+    return SERVICE_HOSTS.get(parsed.host)
+
+
+def _twitter_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) < 3 or segments[1].lower() != "status" or not segments[2].isdigit():
+        return None
+    username, post_id = segments[0], segments[2]
+    language = None
+    mode = None
+    for modifier in segments[3:]:
+        if LANGUAGE_MODIFIER_PATTERN.fullmatch(modifier):
+            language = modifier.lower()
+        elif modifier.lower() in {"gallery", "mosaic"}:
+            mode = modifier.lower()
+    return _CanonicalLink(
+        "Twitter",
+        f"https://x.com/{username}/status/{post_id}",
+        f"Twitter • {username}",
+        language,
+        mode,
+    )
+
+
+def _instagram_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 2 and segments[0].lower() in {"p", "reel", "reels"}:
         kind = "p" if segments[0].lower() == "p" else "reel"
         shortcode = segments[1]
-        return "Instagram", f"https://www.instagram.com/{kind}/{shortcode}/", f"Instagram • {shortcode}"
-
-    if (
-        host == "instagram.com"
-        and len(segments) >= 3
-        and segments[0].lower() == "share"
-        and segments[1].lower() in {"p", "reel"}
-    ):
+        # "/mosaic" asks for a carousel as one composed grid image.
+        mode = "mosaic" if kind == "p" and "mosaic" in (
+            modifier.lower() for modifier in segments[2:]
+        ) else None
+        return _CanonicalLink(
+            "Instagram",
+            f"https://www.instagram.com/{kind}/{shortcode}/",
+            f"Instagram • {shortcode}",
+            mode=mode,
+        )
+    if len(segments) >= 3 and segments[0].lower() == "share" and segments[1].lower() in {"p", "reel"}:
         share_type, share_token = segments[1].lower(), segments[2]
-        canonical = f"https://www.instagram.com/share/{share_type}/{share_token}/"
-        return "Instagram", canonical, f"Instagram • {share_token}"
+        return _CanonicalLink(
+            "Instagram",
+            f"https://www.instagram.com/share/{share_type}/{share_token}/",
+            f"Instagram • {share_token}",
+        )
+    return None
+
 
-    if host in {"reddit.com", "old.reddit.com"} and len(segments) >= 4 and segments[0].lower() == "r" and segments[2].lower() in {"comments", "s"}:
+def _reddit_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 4 and segments[0].lower() == "r" and segments[2].lower() in {"comments", "s"}:
         community = segments[1]
-        canonical = urlunparse(("https", "www.reddit.com", parsed.path, "", "", ""))
-        return "Reddit", canonical, f"Reddit • r/{community}"
+        canonical = urlunparse(("https", "www.reddit.com", url.parsed.path, "", "", ""))
+        return _CanonicalLink("Reddit", canonical, f"Reddit • r/{community}")
+    return None
 
-    if host == "pixiv.net" and len(segments) >= 2:
-        artwork_index = 1 if segments[0].lower() == "artworks" else 2 if segments[:2] == ["en", "artworks"] else -1
-        if artwork_index >= 0 and len(segments) > artwork_index and segments[artwork_index].isdigit():
-            artwork_id = segments[artwork_index]
-            return "Pixiv", f"https://www.pixiv.net/en/artworks/{artwork_id}", f"Pixiv • {artwork_id}"
 
-    if host in {"threads.net", "threads.com"} and len(segments) >= 3 and segments[0].startswith("@") and segments[1].lower() == "post":
+def _pixiv_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) < 2:
+        return None
+    artwork_index = 1 if segments[0].lower() == "artworks" else 2 if segments[:2] == ["en", "artworks"] else -1
+    if artwork_index >= 0 and len(segments) > artwork_index and segments[artwork_index].isdigit():
+        artwork_id = segments[artwork_index]
+        return _CanonicalLink("Pixiv", f"https://www.pixiv.net/en/artworks/{artwork_id}", f"Pixiv • {artwork_id}")
+    return None
+
+
+def _threads_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 3 and segments[0].startswith("@") and segments[1].lower() == "post":
         username, post_id = segments[0][1:], segments[2]
-        return "Threads", f"https://www.threads.net/@{username}/post/{post_id}", f"Threads • @{username}"
+        return _CanonicalLink("Threads", f"https://www.threads.net/@{username}/post/{post_id}", f"Threads • @{username}")
+    return None
+
 
-    if host in {"bsky.app", "bskyx.app"} and len(segments) >= 4 and segments[0].lower() == "profile" and segments[2].lower() == "post":
+def _bluesky_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 4 and segments[0].lower() == "profile" and segments[2].lower() == "post":
         handle, post_id = segments[1], segments[3]
-        return "Bluesky", f"https://bsky.app/profile/{handle}/post/{post_id}", f"Bluesky • {handle}"
+        return _CanonicalLink("Bluesky", f"https://bsky.app/profile/{handle}/post/{post_id}", f"Bluesky • {handle}")
+    return None
+
 
-    if host == "bilibili.com" and len(segments) >= 2 and segments[0].lower() == "video":
+def _bilibili_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 2 and segments[0].lower() == "video":
         video_id = segments[1]
-        return "Bilibili", f"https://www.bilibili.com/video/{video_id}", f"Bilibili • {video_id}"
+        return _CanonicalLink("Bilibili", f"https://www.bilibili.com/video/{video_id}", f"Bilibili • {video_id}")
+    return None
+
+
+def _bilibili_short_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    if url.segments:
+        video_id = url.segments[0]
+        return _CanonicalLink("Bilibili", f"https://b23.tv/{video_id}", f"Bilibili • {video_id}")
+    return None
 
-    if host == "b23.tv" and segments:
-        video_id = segments[0]
-        return "Bilibili", f"https://b23.tv/{video_id}", f"Bilibili • {video_id}"
 
-    if host == "youtube.com" and len(segments) >= 2 and segments[0].lower() == "post":
+def _youtube_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 2 and segments[0].lower() == "post":
         post_id = segments[1]
-        return "YouTube", f"https://www.youtube.com/post/{post_id}", "YouTube • Community Post"
+        return _CanonicalLink("YouTube", f"https://www.youtube.com/post/{post_id}", "YouTube • Community Post")
+    return None
+
 
-    if host == "pinterest.com" and len(segments) >= 2 and segments[0].lower() == "pin":
-        pin_id_match = re.search(r"(\d+)$", segments[1])
+def _pinterest_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 2 and segments[0].lower() == "pin":
+        pin_id_match = PINTEREST_PIN_ID_PATTERN.search(segments[1])
         if pin_id_match:
             pin_id = pin_id_match.group(1)
-            return "Pinterest", f"https://www.pinterest.com/pin/{pin_id}/", f"Pinterest • {pin_id}"
+            return _CanonicalLink("Pinterest", f"https://www.pinterest.com/pin/{pin_id}/", f"Pinterest • {pin_id}")
+    return None
 
-    if host == "pin.it" and segments and re.fullmatch(r"[A-Za-z0-9_-]+", segments[0]):
-        token = segments[0]
-        return "Pinterest", f"https://pin.it/{token}", f"Pinterest • {token}"
 
+def _pinterest_short_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    if url.segments and TOKEN_PATTERN.fullmatch(url.segments[0]):
+        token = url.segments[0]
+        return _CanonicalLink("Pinterest", f"https://pin.it/{token}", f"Pinterest • {token}")
+    return None
+
+
+def _deviantart_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
     if (
-        _strict_https_authority(parsed)
-        and host == "deviantart.com"
+        _strict_https_authority(url.parsed)
         and len(segments) == 3
         and segments[1].lower() == "art"
-        and re.fullmatch(r"[A-Za-z0-9_-]+", segments[0])
-        and re.fullmatch(r"[A-Za-z0-9_-]+", segments[2])
+        and TOKEN_PATTERN.fullmatch(segments[0])
+        and TOKEN_PATTERN.fullmatch(segments[2])
     ):
         artist, slug = segments[0], segments[2]
         canonical = f"https://www.deviantart.com/{artist}/art/{slug}"
-        return "DeviantArt", canonical, f"DeviantArt • {artist}"
+        return _CanonicalLink("DeviantArt", canonical, f"DeviantArt • {artist}")
+    return None
+
 
+def _stash_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
     if (
-        _strict_https_authority(parsed)
-        and host == "sta.sh"
+        _strict_https_authority(url.parsed)
         and len(segments) == 1
-        and re.fullmatch(r"[A-Za-z0-9_-]+", segments[0])
+        and TOKEN_PATTERN.fullmatch(segments[0])
     ):
         token = segments[0]
-        return "DeviantArt", f"https://sta.sh/{token}", "DeviantArt • Sta.sh"
+        return _CanonicalLink("DeviantArt", f"https://sta.sh/{token}", "DeviantArt • Sta.sh")
+    return None
 
+
+def _tiktok_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
     if (
-        host == "tiktok.com"
-        and len(segments) >= 3
+        len(segments) >= 3
         and segments[0].startswith("@")
         and segments[1].lower() == "video"
         and segments[2].isdigit()
     ):
         handle, post_id = segments[0][1:], segments[2]
-        if re.fullmatch(r"[\w.-]+", handle):
-            return (
+        if TIKTOK_HANDLE_PATTERN.fullmatch(handle):
+            return _CanonicalLink(
                 "TikTok",
                 f"https://www.tiktok.com/@{handle}/video/{post_id}",
                 f"TikTok • @{handle}",
             )
+    if len(segments) >= 2 and segments[0].lower() == "t":
+        token = segments[1]
+        if TOKEN_PATTERN.fullmatch(token):
+            return _CanonicalLink("TikTok", f"https://www.tiktok.com/t/{token}/", f"TikTok • {token}")
+    return None
 
-    if host in {"vm.tiktok.com", "vt.tiktok.com"} and segments:
-        token = segments[0]
-        if re.fullmatch(r"[A-Za-z0-9_-]+", token):
-            return "TikTok", f"https://{host}/{token}/", f"TikTok • {token}"
 
-    if host == "tiktok.com" and len(segments) >= 2 and segments[0].lower() == "t":
-        token = segments[1]
-        if re.fullmatch(r"[A-Za-z0-9_-]+", token):
-            return "TikTok", f"https://www.tiktok.com/t/{token}/", f"TikTok • {token}"
+def _tiktok_short_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    if url.segments and TOKEN_PATTERN.fullmatch(url.segments[0]):
+        token = url.segments[0]
+        return _CanonicalLink("TikTok", f"https://{url.host}/{token}/", f"TikTok • {token}")
+    return None
 
-    if host == "tumblr.com" and len(segments) >= 2 and segments[1].isdigit():
-        blog, post_id = segments[0], segments[1]
-        if re.fullmatch(r"[\w-]+", blog):
-            slug = f"/{segments[2]}" if len(segments) >= 3 else ""
-            canonical = f"https://{blog}.tumblr.com/post/{post_id}{slug}"
-            return "Tumblr", canonical, f"Tumblr • @{blog}"
 
-    if (
-        host.endswith(".tumblr.com")
-        and host != "www.tumblr.com"
-        and len(segments) >= 2
-        and segments[0].lower() == "post"
-        and segments[1].isdigit()
-    ):
-        blog = host.removesuffix(".tumblr.com")
-        if re.fullmatch(r"[\w-]+", blog):
-            post_id = segments[1]
-            slug = f"/{segments[2]}" if len(segments) >= 3 else ""
-            canonical = f"https://{blog}.tumblr.com/post/{post_id}{slug}"
-            return "Tumblr", canonical, f"Tumblr • @{blog}"
-
-    if host == "clips.twitch.tv" and segments:
-        slug = segments[0]
-        if re.fullmatch(r"[A-Za-z0-9_-]+", slug):
-            return (
-                "Twitch",
-                f"https://clips.twitch.tv/{slug}",
-                f"Twitch • Clip {slug}",
-            )
+def _tumblr_post_link(blog: str, segments: List[str], post_index: int) -> Optional[_CanonicalLink]:
+    if not TUMBLR_BLOG_PATTERN.fullmatch(blog):
+        return None
+    post_id = segments[post_index]
+    slug = f"/{segments[post_index + 1]}" if len(segments) > post_index + 1 else ""
+    canonical = f"https://{blog}.tumblr.com/post/{post_id}{slug}"
+    return _CanonicalLink("Tumblr", canonical, f"Tumblr • @{blog}")
 
-    if host == "twitch.tv" and len(segments) >= 3 and segments[1].lower() == "clip":
-        channel, slug = segments[0], segments[2]
-        if re.fullmatch(r"[A-Za-z0-9_]+", channel) and re.fullmatch(r"[A-Za-z0-9_-]+", slug):
-            return (
-                "Twitch",
-                f"https://clips.twitch.tv/{slug}",
-                f"Twitch • Clip {slug}",
-            )
 
-    if host == "twitch.tv" and len(segments) >= 2 and segments[0].lower() == "videos" and segments[1].isdigit():
-        video_id = segments[1]
-        return (
-            "Twitch",
-            f"https://www.twitch.tv/videos/{video_id}",
-            f"Twitch • VOD {video_id}",
-        )
+def _tumblr_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 2 and segments[1].isdigit():
+        return _tumblr_post_link(segments[0], segments, 1)
+    return None
+
+
+def _tumblr_blog_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 2 and segments[0].lower() == "post" and segments[1].isdigit():
+        return _tumblr_post_link(url.host.removesuffix(".tumblr.com"), segments, 1)
+    return None
 
-    if host == "twitch.tv" and len(segments) == 1:
-        channel = segments[0]
-        if (
-            channel.casefold() not in TWITCH_RESERVED_PATHS
-            and re.fullmatch(r"[A-Za-z0-9_]+", channel)
-        ):
-            return (
-                "Twitch",
-                f"https://www.twitch.tv/{channel.casefold()}",
-                f"Twitch • @{channel}",
-            )
 
+def _twitch_clip_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    if url.segments and TOKEN_PATTERN.fullmatch(url.segments[0]):
+        slug = url.segments[0]
+        return _CanonicalLink("Twitch", f"https://clips.twitch.tv/{slug}", f"Twitch • Clip {slug}")
+    return None
+
+
+def _twitch_link(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    segments = url.segments
+    if len(segments) >= 3 and segments[1].lower() == "clip":
+        channel, slug = segments[0], segments[2]
+        if TWITCH_CHANNEL_PATTERN.fullmatch(channel) and TOKEN_PATTERN.fullmatch(slug):
+            return _CanonicalLink("Twitch", f"https://clips.twitch.tv/{slug}", f"Twitch • Clip {slug}")
+    if len(segments) >= 2 and segments[0].lower() == "videos" and segments[1].isdigit():
+        video_id = segments[1]
+        return _CanonicalLink("Twitch", f"https://www.twitch.tv/videos/{video_id}", f"Twitch • VOD {video_id}")
+    if len(segments) == 1:
+        channel = segments[0]
+        if channel.casefold() not in TWITCH_RESERVED_PATHS and TWITCH_CHANNEL_PATTERN.fullmatch(channel):
+            return _CanonicalLink("Twitch", f"https://www.twitch.tv/{channel.casefold()}", f"Twitch • @{channel}")
     return None
 
 
+CANONICALIZERS: dict[str, Callable[[_ParsedUrl], Optional[_CanonicalLink]]] = {
+    **{host: _twitter_link for host in TWITTER_HOSTS},
+    "instagram.com": _instagram_link,
+    "reddit.com": _reddit_link,
+    "old.reddit.com": _reddit_link,
+    "pixiv.net": _pixiv_link,
+    "threads.net": _threads_link,
+    "threads.com": _threads_link,
+    "bsky.app": _bluesky_link,
+    "bskyx.app": _bluesky_link,
+    "bilibili.com": _bilibili_link,
+    "b23.tv": _bilibili_short_link,
+    "youtube.com": _youtube_link,
+    "pinterest.com": _pinterest_link,
+    "pin.it": _pinterest_short_link,
+    "deviantart.com": _deviantart_link,
+    "sta.sh": _stash_link,
+    "tiktok.com": _tiktok_link,
+    "vm.tiktok.com": _tiktok_short_link,
+    "vt.tiktok.com": _tiktok_short_link,
+    "tumblr.com": _tumblr_link,
+    "clips.twitch.tv": _twitch_clip_link,
+    "twitch.tv": _twitch_link,
+}
+
+
+def _canonicalize(url: _ParsedUrl) -> Optional[_CanonicalLink]:
+    canonicalizer = CANONICALIZERS.get(url.host)
+    if canonicalizer is None and _is_tumblr_blog_host(url.host):
+        canonicalizer = _tumblr_blog_link
+    return canonicalizer(url) if canonicalizer else None
+
+
+@lru_cache(maxsize=LINK_MEMO_SIZE)
+def _resolve_link(raw_url: str) -> tuple[str, Optional[_CanonicalLink]]:
+    """Parse one raw URL once; return its own host and canonical link, if any."""
+    parsed = _parse_url(raw_url)
+    if parsed is None:
+        return "", None
+    source = _unwrap_parsed(parsed)
+    return parsed.host, _canonicalize(source) if source else None
+
+
 def extract_supported_links(
     text: str,
     include_suppressed: bool = False,
@@ -280,24 +430,22 @@ def extract_supported_links(
         suppressed = match.start() > 0 and end < len(text) and text[match.start() - 1] == "<" and text[end] == ">"
         if suppressed and not include_suppressed:
             continue
-        hostname = _hostname(raw_url)
+        hostname, canonical = _resolve_link(raw_url)
         allow_first_party = include_fixembed and hostname == "fixembed.app"
         if not include_preconverted and hostname in PRECONVERTED_HOSTS and not allow_first_party:
             continue
-
-        canonical = _canonicalize(raw_url)
         if canonical:
-            service, canonical_url, display_text = canonical
-            language = None
-            mode = None
-            if service == "Twitter":
-                segments = [segment for segment in urlparse(_unwrap_fixembed_url(raw_url)).path.split("/") if segment]
-                for modifier in segments[3:]:
-                    if re.fullmatch(r"[A-Za-z]{2}", modifier):
-                        language = modifier.lower()
-                    elif modifier.lower() in {"gallery", "mosaic"}:
-                        mode = modifier.lower()
-            links.append(SupportedLink(service, canonical_url, display_text, match.start(), end, language, mode))
+            links.append(
+                SupportedLink(
+                    canonical.service,
+                    canonical.canonical_url,
+                    canonical.display_text,
+                    match.start(),
+                    end,
+                    canonical.language,
+                    canonical.mode,
+                )
+            )
     return links
 
 
@@ -308,7 +456,8 @@ def build_fixembed_url(link: SupportedLink, quality: Optional[str] = None) -> st
         url = f"{url}&quality={quote(quality, safe='')}"
     if link.language:
         url = f"{url}&lang={quote(link.language, safe='')}"
-    if link.mode:
+    # Instagram's mosaic is composed by the bot, not the FixEmbed page.
+    if link.mode and link.service == "Twitter":
         url = f"{url}&mode={quote(link.mode, safe='')}"
     return url
 
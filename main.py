@@ -1,5 +1,6 @@
 import logging
 import asyncio
+import contextlib
 from discord.ext import commands, tasks
 from discord import app_commands, ui
 from typing import Optional
@@ -10,26 +11,76 @@ from dotenv import load_dotenv
 import itertools
 import aiosqlite
 import sqlite3
-import time
 import ast
-from collections import deque
 from dataclasses import dataclass, replace
 from translations import get_text, LANGUAGE_NAMES, TRANSLATIONS
-from link_utils import build_automatic_url, build_fixembed_url, chunk_lines, extract_supported_links
-from instagram_embed import fetch_instagram_delivery
+from link_utils import (
+    build_automatic_url,
+    build_fixembed_url,
+    chunk_lines,
+    extract_supported_links,
+    may_contain_supported_link,
+)
+from instagram_embed import fetch_instagram_payload, prepare_instagram_delivery
 from twitter_embed import build_twitter_layout, fetch_twitter_payload
-from reddit_embed import fetch_reddit_layout
-from threads_embed import fetch_threads_layout
-from bluesky_embed import fetch_bluesky_layout
-from pixiv_embed import fetch_pixiv_layout
+from reddit_embed import build_reddit_layout, fetch_reddit_payload
+from threads_embed import build_threads_layout, fetch_threads_payload
+from bluesky_embed import build_bluesky_layout, fetch_bluesky_payload
+from pixiv_embed import build_pixiv_layout, fetch_pixiv_payload
 from pixiv_relay import start_pixiv_relay
-from bilibili_embed import fetch_bilibili_layout
-from youtube_embed import fetch_youtube_community_layout
-from pinterest_embed import fetch_pinterest_layout
-from tiktok_embed import fetch_tiktok_layout
-from tumblr_embed import fetch_tumblr_layout
-from twitch_embed import fetch_twitch_layout
-from deviantart_embed import fetch_deviantart_layout
+from bilibili_embed import build_bilibili_layout, fetch_bilibili_payload
+from youtube_embed import (
+    build_youtube_community_layout,
+    fetch_youtube_community_payload,
+)
+from pinterest_embed import build_pinterest_layout, fetch_pinterest_payload
+from tiktok_embed import build_tiktok_layout, fetch_tiktok_payload
+from tumblr_embed import build_tumblr_layout, fetch_tumblr_payload
+from twitch_embed import build_twitch_layout, fetch_twitch_payload
+from deviantart_embed import build_deviantart_layout, fetch_deviantart_card_payload
+from http_client import shared_http_client
+from payload_cache import DEFAULT_MAX_STALE_SECONDS, PayloadCache, PayloadKey
+from payload_store import DEFAULT_STORE_PATH, PayloadStore
+from link_fanout import stream_bounded
+from card_packing import pack_cards
+from media_budget import (
+    DEFAULT_MEDIA_BUDGET_BYTES,
+    DEFAULT_PER_HOST_DOWNLOADS,
+    MediaBudget,
+    format_media_budget_health,
+)
+from media_cache import (
+    DEFAULT_MEDIA_CACHE_BYTES,
+    DEFAULT_MEDIA_CACHE_DISK_BYTES,
+    MediaCache,
+    format_media_cache_health,
+)
+from media_optimizer import (
+    DEFAULT_MAX_DIMENSION,
+    DEFAULT_OPTIMIZER_WORKERS,
+    MediaOptimizer,
+    format_media_optimizer_health,
+)
+from media_spool import close_files, rewrap_files
+from dedup_window import DedupWindow, format_dedup_health
+from guild_runtime import GuildRuntimeConfigs, build_guild_runtime_config
+from admission_control import (
+    DEFAULT_SHED_LOOP_LAG_MS,
+    DEFAULT_SHED_P95_MS,
+    DEFAULT_SHED_QUEUE_DEPTH,
+    AdmissionController,
+    format_admission_health,
+    sample_load,
+)
+from send_scheduler import (
+    DEFAULT_GLOBAL_RATE,
+    DEFAULT_GLOBAL_RATE_CAP,
+    DEFAULT_SEND_WORKERS,
+    SendScheduler,
+    watch_discord_rate_limits,
+)
+from source_cleanup import DEFAULT_BATCH_WINDOW_SECONDS, SourceMessageCleaner
+from premium_entitlements import DEFAULT_REFRESH_INTERVAL_SECONDS, PremiumEntitlementIndex
 from embed_footer import FooterBranding, escape_component_text
 from card_preferences import preferences_from_settings
 from premium_controls import (
@@ -39,7 +90,6 @@ from premium_controls import (
     record_processing_outcome,
     resolve_translation_language,
     save_premium_controls,
-    should_skip_automatic,
 )
 from message_context import format_tagged_users
 from command_components import render_command_layout, render_settings_layout
@@ -89,6 +139,12 @@ class ComponentsV2Delivery:
     files: tuple[discord.File, ...] = ()
 
 
+def release_delivery(delivery):
+    """Close a built card's attachments; safe to repeat after it was sent."""
+    if isinstance(delivery, ComponentsV2Delivery):
+        close_files(delivery.files)
+
+
 # Service configuration for link processing
 # All services now use the unified FixEmbed service at fixembed.app
 SERVICES = {
@@ -254,10 +310,30 @@ def get_service_display_icon(guild: Optional[discord.Guild], service: str) -> st
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 
+class FixEmbedBot(commands.AutoShardedBot):
+    async def close(self):
+        try:
+            # Queued source deletes and sends still need discord.py's HTTP
+            # session, so settle them before it is torn down.
+            try:
+                await source_cleanup.close()
+                await SEND_QUEUE.close()
+            finally:
+                await super().close()
+        finally:
+            await shared_http_client.close()
+            await close_payload_store()
+            media_optimizer.close()
+            if admission_task is not None:
+                admission_task.cancel()
+            if premium_entitlements_task is not None:
+                premium_entitlements_task.cancel()
+
+
 # Bot configuration
 intents = discord.Intents.default()
 intents.message_content = True
-client = commands.AutoShardedBot(
+client = FixEmbedBot(
     command_prefix=commands.when_mentioned,
     intents=intents,
     shard_count=10,
@@ -266,22 +342,181 @@ client = commands.AutoShardedBot(
 # In-memory storage for channel states and settings
 channel_states = {}
 bot_settings = {}
+# guild_id -> {(channel_id, service): "on" | "off"}
 channel_service_rules = {}
+guild_runtime_configs = GuildRuntimeConfigs()
 
-# Rate-limiting configuration
-MESSAGE_LIMIT = 5
-TIME_WINDOW = 1  # Time window in seconds
-
-message_timestamps = deque()
-
-SEND_QUEUE = asyncio.Queue()
-processed_link_cache = {}
+SEND_QUEUE = SendScheduler(
+    workers=int(os.getenv("SEND_WORKERS", DEFAULT_SEND_WORKERS)),
+    global_rate=float(os.getenv("SEND_GLOBAL_RATE", DEFAULT_GLOBAL_RATE)),
+    global_rate_cap=float(os.getenv("SEND_GLOBAL_RATE_CAP", DEFAULT_GLOBAL_RATE_CAP)),
+)
+# Premium guilds get this many send slots per fair-queue round.
+PREMIUM_SEND_WEIGHT = float(os.getenv("PREMIUM_SEND_WEIGHT", "2"))
 DEDUP_WINDOW_SECONDS = 10
+processed_links = DedupWindow(DEDUP_WINDOW_SECONDS)
 reliability_client = ReliabilityClient(
     local_checks=(probe_deviantart_bot_health,),
 )
 conversion_telemetry = ConversionTelemetry(supported_services=SERVICE_NAMES)
-delivery_telemetry = DeliveryTelemetry()
+payload_cache = PayloadCache(
+    max_stale_seconds=float(
+        os.getenv("PAYLOAD_MAX_STALE_SECONDS", DEFAULT_MAX_STALE_SECONDS)
+    ),
+)
+delivery_telemetry = DeliveryTelemetry(send_rate=SEND_QUEUE.global_rate)
+watch_discord_rate_limits(SEND_QUEUE.global_rate)
+admission_controller = AdmissionController(
+    shed_queue_depth=int(os.getenv("SHED_QUEUE_DEPTH", DEFAULT_SHED_QUEUE_DEPTH)),
+    shed_p95_ms=int(os.getenv("SHED_P95_MS", DEFAULT_SHED_P95_MS)),
+    shed_loop_lag_ms=int(os.getenv("SHED_LOOP_LAG_MS", DEFAULT_SHED_LOOP_LAG_MS)),
+)
+media_budget = MediaBudget(
+    int(os.getenv("MEDIA_BUDGET_BYTES", DEFAULT_MEDIA_BUDGET_BYTES)),
+    per_host_limit=int(os.getenv("MEDIA_HOST_DOWNLOADS", DEFAULT_PER_HOST_DOWNLOADS)),
+)
+media_cache = MediaCache(
+    max_bytes=int(os.getenv("MEDIA_CACHE_BYTES", DEFAULT_MEDIA_CACHE_BYTES)),
+    disk_path=os.getenv("MEDIA_CACHE_DIR") or None,
+    disk_max_bytes=int(
+        os.getenv("MEDIA_CACHE_DISK_BYTES", DEFAULT_MEDIA_CACHE_DISK_BYTES)
+    ),
+)
+media_optimizer = MediaOptimizer(
+    enabled=os.getenv("MEDIA_OPTIMIZE", "0") == "1",
+    workers=int(os.getenv("MEDIA_OPTIMIZE_WORKERS", DEFAULT_OPTIMIZER_WORKERS)),
+    max_dimension=int(os.getenv("MEDIA_MAX_DIMENSION", DEFAULT_MAX_DIMENSION)),
+)
+admission_task = None
+payload_store_task = None
+
+
+def schedule_source_cleanup(channel, flush):
+    # Source deletes wait behind card sends; their own route gets its own bucket.
+    guild = getattr(channel, "guild", None)
+    return SEND_QUEUE.submit(
+        ("delete", channel.id),
+        flush,
+        guild_key=guild.id if guild is not None else None,
+        priority="background",
+    )
+
+
+source_cleanup = SourceMessageCleaner(
+    window_seconds=float(
+        os.getenv("SOURCE_DELETE_WINDOW_SECONDS", DEFAULT_BATCH_WINDOW_SECONDS)
+    ),
+    schedule=schedule_source_cleanup,
+)
+
+
+def read_delivery_load():
+    return SEND_QUEUE.qsize(), delivery_telemetry.snapshot().p95_ms
+
+
+def start_admission_sampler():
+    global admission_task
+    if admission_task is None:
+        admission_task = asyncio.create_task(
+            sample_load(admission_controller, read_delivery_load)
+        )
+
+
+async def start_payload_store():
+    global payload_store_task
+    store = await PayloadStore.open(os.getenv("PAYLOAD_STORE_PATH", DEFAULT_STORE_PATH))
+    payload_cache.attach_store(store)
+    warmed = await payload_cache.warm()
+    logging.info("payload_store_warmed entries=%s", warmed)
+    payload_store_task = asyncio.create_task(
+        store.run(max_stale_seconds=payload_cache.max_stale_seconds)
+    )
+
+
+async def close_payload_store():
+    global payload_store_task
+    store = payload_cache.store
+    if payload_store_task is not None:
+        payload_store_task.cancel()
+        payload_store_task = None
+    if store is not None:
+        payload_cache.attach_store(None)
+        await store.close()
+
+async def schedule_delivery(
+    ticket,
+    channel_key,
+    primary_send,
+    fallback_send=None,
+):
+    """Queue one send in its priority class and wait for its outcome."""
+    completion = asyncio.get_running_loop().create_future()
+
+    async def deliver():
+        delivery_telemetry.started(ticket)
+        try:
+            return await deliver_with_fallback(
+                ticket,
+                telemetry=delivery_telemetry,
+                primary_send=primary_send,
+                fallback_send=fallback_send,
+            )
+        except Exception as error:
+            delivery_telemetry.failed(ticket, error)
+            return "failed"
+
+    SEND_QUEUE.submit(
+        channel_key,
+        deliver,
+        completion,
+        guild_key=ticket.guild_id,
+        weight=(
+            PREMIUM_SEND_WEIGHT
+            if ticket.guild_id is not None and guild_premium_status(ticket.guild_id)
+            else 1
+        ),
+        priority=ticket.priority,
+    )
+    return await asyncio.shield(completion)
+
+async def send_card_pack(channel, pack, allowed_mentions=None):
+    """Send merged cards as one message, or one by one if it is rejected.
+
+    Returns one delivery outcome per message attempted.
+    """
+    guild = getattr(channel, "guild", None)
+    ticket = delivery_telemetry.queued(
+        "card",
+        guild_id=guild.id if guild is not None else None,
+    )
+
+    async def primary_send():
+        send_options = {
+            "view": pack.view,
+            "allowed_mentions": allowed_mentions,
+            "silent": True,
+        }
+        if pack.files:
+            send_options["files"] = list(pack.files)
+        return await channel.send(**send_options)
+
+    outcome = await schedule_delivery(ticket, channel.id, primary_send)
+    if outcome != "failed":
+        return [outcome]
+    # Each card is its own queued send, with its own bucket token, timeout,
+    # link fallback, and outcome.
+    outcomes = []
+    for card in pack.cards:
+        outcomes.append(
+            await rate_limited_send(
+                channel,
+                view=card.view,
+                files=rewrap_files(card.files),
+                fallback_content=card.fallback_url,
+                allowed_mentions=allowed_mentions,
+            )
+        )
+    return outcomes
 
 async def rate_limited_send(
     channel,
@@ -292,85 +527,37 @@ async def rate_limited_send(
     view=None,
     fallback_content=None,
 ):
-    ticket = delivery_telemetry.queued("card" if view is not None else "link")
-    completion = asyncio.get_running_loop().create_future()
-    await SEND_QUEUE.put(
-        (
-            ticket,
-            completion,
-            channel,
-            content,
-            embed,
-            files,
-            allowed_mentions,
-            view,
-            fallback_content,
-        )
+    guild = getattr(channel, "guild", None)
+    ticket = delivery_telemetry.queued(
+        "card" if view is not None else "link",
+        guild_id=guild.id if guild is not None else None,
     )
-    return await asyncio.shield(completion)
 
-async def send_worker():
-    while True:
-        (
-            ticket,
-            completion,
-            channel,
-            content,
-            embed,
-            files,
-            allowed_mentions,
-            view,
-            fallback_content,
-        ) = await SEND_QUEUE.get()
-        try:
-            current_time = time.time()
-            while message_timestamps and current_time - message_timestamps[0] >= TIME_WINDOW:
-                message_timestamps.popleft()
-
-            while len(message_timestamps) >= MESSAGE_LIMIT:
-                await asyncio.sleep(0.1)
-                current_time = time.time()
-                while message_timestamps and current_time - message_timestamps[0] >= TIME_WINDOW:
-                    message_timestamps.popleft()
-
-            message_timestamps.append(time.time())
-            async def primary_send():
-                send_options = {
-                    "content": content,
-                    "embed": embed,
-                    "allowed_mentions": allowed_mentions,
-                    "view": view,
-                    "silent": True,
-                }
-                if files:
-                    send_options["files"] = list(files)
-                return await channel.send(**send_options)
-
-            async def fallback_send():
-                return await channel.send(
-                    content=fallback_content,
-                    allowed_mentions=allowed_mentions,
-                    silent=True,
-                )
+    async def primary_send():
+        send_options = {
+            "content": content,
+            "embed": embed,
+            "allowed_mentions": allowed_mentions,
+            "view": view,
+            "silent": True,
+        }
+        if files:
+            send_options["files"] = list(files)
+        return await channel.send(**send_options)
+
+    async def fallback_send():
+        return await channel.send(
+            content=fallback_content,
+            allowed_mentions=allowed_mentions,
+            silent=True,
+        )
 
-            outcome = await deliver_with_fallback(
-                ticket,
-                telemetry=delivery_telemetry,
-                primary_send=primary_send,
-                fallback_send=fallback_send if fallback_content else None,
-            )
-            if not completion.done():
-                completion.set_result(outcome)
-        except asyncio.CancelledError:
-            if not completion.done():
-                completion.cancel()
-            raise
-        except Exception as error:
-            delivery_telemetry.failed(ticket, error)
-            if not completion.done():
-                completion.set_result("failed")
-        finally:
-            SEND_QUEUE.task_done()
+    return await schedule_delivery(
+        ticket,
+        channel.id,
+        primary_send,
+        fallback_send if fallback_content else None,
+    )
 
 # Premium SKU ID (loaded from .env at bottom of file)
 PREMIUM_SKU_ID = None
@@ -383,24 +570,64 @@ def get_guild_lang(guild_id):
         return "en"
     return bot_settings.get(guild_id, {}).get("language", "en")
 
+premium_entitlements = PremiumEntitlementIndex()
+premium_entitlements_task = None
+# Keeps a pre-scan lookup inside an interaction's three-second reply window.
+PREMIUM_LOOKUP_TIMEOUT_SECONDS = 2.0
+
+
+def scan_premium_entitlements():
+    return client.entitlements(
+        limit=None,
+        skus=[discord.Object(id=int(PREMIUM_SKU_ID))],
+        exclude_ended=True,
+    )
+
+
+async def start_premium_entitlements():
+    global premium_entitlements_task
+    premium_entitlements.sku_id = int(PREMIUM_SKU_ID)
+    try:
+        guilds = await premium_entitlements.refresh(scan_premium_entitlements())
+    except Exception as error:
+        # The periodic task retries the scan; lookups use the API until then.
+        logging.exception("Premium entitlement scan failed: %s", error)
+    else:
+        logging.info("premium_entitlements_loaded guilds=%s", guilds)
+    premium_entitlements_task = asyncio.create_task(
+        premium_entitlements.run(
+            scan_premium_entitlements,
+            interval_seconds=float(os.getenv(
+                "PREMIUM_REFRESH_SECONDS", DEFAULT_REFRESH_INTERVAL_SECONDS
+            )),
+        )
+    )
+
+
+def guild_premium_status(guild_id):
+    """Premium state from the entitlement index; never calls Discord."""
+    return bool(PREMIUM_SKU_ID) and premium_entitlements.is_premium(guild_id)
+
+
 async def is_guild_premium(guild_id):
     """Check if a guild has an active premium subscription."""
     if not PREMIUM_SKU_ID:
         return False
-    # Check cache first
-    cached = bot_settings.get(guild_id, {}).get("is_premium")
-    if cached is not None:
-        return cached
-    # Query entitlements
+    if premium_entitlements.knows(guild_id):
+        return premium_entitlements.is_premium(guild_id)
+    # Until a full scan succeeds, each guild is looked up once on first use
+    # so Premium guilds keep their features after a restart.
     try:
         guild = client.get_guild(guild_id)
         if guild is None:
             return False
-        entitlements = [e async for e in client.entitlements(guild=guild, skus=[discord.Object(id=int(PREMIUM_SKU_ID))])]
-        is_premium = any(not e.is_expired() for e in entitlements)
-        if guild_id in bot_settings:
-            bot_settings[guild_id]["is_premium"] = is_premium
-        return is_premium
+        return await asyncio.wait_for(
+            premium_entitlements.load_guild(
+                guild_id,
+                client.entitlements(guild=guild, skus=[discord.Object(id=int(PREMIUM_SKU_ID))]),
+            ),
+            timeout=PREMIUM_LOOKUP_TIMEOUT_SECONDS,
+        )
     except Exception as e:
         logging.error(f"Error checking premium status: {e}")
         return False
@@ -421,6 +648,28 @@ def get_footer_branding(guild, settings, premium):
             emoji = str(guild_emoji)
     return FooterBranding(name=guild.name, emoji=emoji)
 
+
+def get_guild_runtime_config(guild, premium):
+    """Resolve a guild's settings once per change instead of per message."""
+    config = guild_runtime_configs.get(guild.id, premium=premium)
+    if config is not None:
+        return config
+    guild_settings = bot_settings.get(guild.id, {
+        "enabled_services": DEFAULT_ENABLED_SERVICES,
+        "mention_users": True,
+        "delete_original": True
+    })
+    return guild_runtime_configs.put(
+        build_guild_runtime_config(
+            guild.id,
+            guild_settings,
+            premium=premium,
+            default_enabled_services=DEFAULT_ENABLED_SERVICES,
+            channel_rules=channel_service_rules.get(guild.id, {}),
+            footer_branding=get_footer_branding(guild, guild_settings, premium),
+        )
+    )
+
 def get_premium_color(guild_id):
     """Get custom embed color for a premium guild, or None."""
     color_hex = bot_settings.get(guild_id, {}).get("embed_color")
@@ -547,6 +796,7 @@ async def load_channel_states(db):
                 channel_states[channel.id] = True
 
 async def load_settings(db):
+    guild_runtime_configs.clear()
     async with db.execute('SELECT guild_id, enabled_services, mention_users, delete_original, language, embed_color, delivery_mode, media_quality, footer_branding_enabled, footer_emoji_id FROM guild_settings') as cursor:
         async for row in cursor:
             guild_id = row[0]
@@ -617,6 +867,7 @@ async def update_setting(
                 ),
             )
             await db.commit()
+            guild_runtime_configs.invalidate(guild_id)
             break
         except sqlite3.OperationalError as e:
             if 'locked' in str(e):
@@ -625,22 +876,32 @@ async def update_setting(
                 raise
 
 async def load_channel_service_rules(db):
+    channel_service_rules.clear()
     async with db.execute('SELECT guild_id, channel_id, service, action FROM channel_service_rules') as cursor:
         async for guild_id, channel_id, service, action in cursor:
-            channel_service_rules[(guild_id, channel_id, service)] = action
+            channel_service_rules.setdefault(guild_id, {})[(channel_id, service)] = action
+    guild_runtime_configs.clear()
 
 async def set_channel_service_rule(db, guild_id, channel_id, service, action):
     await db.execute('INSERT OR REPLACE INTO channel_service_rules (guild_id, channel_id, service, action) VALUES (?, ?, ?, ?)', (guild_id, channel_id, service, action))
     await db.commit()
-    channel_service_rules[(guild_id, channel_id, service)] = action
+    channel_service_rules.setdefault(guild_id, {})[(channel_id, service)] = action
+    guild_runtime_configs.invalidate(guild_id)
 
-def get_service_rule(guild_id, channel_id, service, default_enabled=True):
-    rule = channel_service_rules.get((guild_id, channel_id, service))
-    if rule == "on":
-        return True
-    if rule == "off":
-        return False
-    return default_enabled
+async def delete_channel_service_rule(db, guild_id, channel_id, service):
+    await db.execute("DELETE FROM channel_service_rules WHERE guild_id = ? AND channel_id = ? AND service = ?", (guild_id, channel_id, service))
+    await db.commit()
+    channel_service_rules.get(guild_id, {}).pop((channel_id, service), None)
+    guild_runtime_configs.invalidate(guild_id)
+
+@client.event
+async def on_guild_update(before, after):
+    # Footer branding is resolved from the guild name and emojis.
+    guild_runtime_configs.invalidate(after.id)
+
+@client.event
+async def on_guild_emojis_update(guild, before, after):
+    guild_runtime_configs.invalidate(guild.id)
 
 @client.event
 async def on_ready():
@@ -654,6 +915,15 @@ async def on_ready():
             client.pixiv_relay_runner = await start_pixiv_relay()
         except Exception as error:
             logging.exception("Pixiv relay startup failed: %s", error)
+    await shared_http_client.open()
+    if (
+        os.getenv("PAYLOAD_STORE_ENABLED") == "1"
+        and payload_cache.store is None
+    ):
+        try:
+            await start_payload_store()
+        except Exception as error:
+            logging.exception("Payload store startup failed: %s", error)
     client.db = await init_db()
     await init_premium_controls(client.db)
     await migrate_youtube_service_default(client.db)
@@ -674,6 +944,11 @@ async def on_ready():
             },
         ).update(controls)
     await load_channel_service_rules(client.db)
+    if PREMIUM_SKU_ID and premium_entitlements_task is None:
+        try:
+            await start_premium_entitlements()
+        except Exception as error:
+            logging.exception("Premium entitlement index startup failed: %s", error)
     if PREMIUM_SKU_ID:
         try:
             await reconcile_supporter_roles(
@@ -685,7 +960,8 @@ async def on_ready():
         except Exception as error:
             logging.exception("Premium supporter role reconciliation failed: %s", error)
     change_status.start()
-    client.loop.create_task(send_worker())
+    SEND_QUEUE.start()
+    start_admission_sampler()
 
     try:
         synced = await client.tree.sync()
@@ -708,6 +984,77 @@ async def change_status():
         logging.error(f"Failed to change status: {e}")
 
 
+async def fetch_card_payload(item, translation_language):
+    """Fetch one uncached source payload for a supported link."""
+    if item.service == "Instagram":
+        return await fetch_instagram_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "Twitter":
+        return await fetch_twitter_payload(
+            item.canonical_url,
+            translation_language,
+            item.mode,
+        )
+    if item.service == "Reddit":
+        return await fetch_reddit_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "Threads":
+        return await fetch_threads_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "Pixiv":
+        return await fetch_pixiv_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "Bluesky":
+        return await fetch_bluesky_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "Bilibili":
+        return await fetch_bilibili_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "YouTube":
+        return await fetch_youtube_community_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "Pinterest":
+        return await fetch_pinterest_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "TikTok":
+        return await fetch_tiktok_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "Tumblr":
+        return await fetch_tumblr_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "Twitch":
+        return await fetch_twitch_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    if item.service == "DeviantArt":
+        return await fetch_deviantart_card_payload(
+            item.canonical_url,
+            translation_language=translation_language,
+        )
+    raise ValueError("unsupported rich-card service")
+
+
 async def build_components_v2_link(
     item,
     guild_settings,
@@ -725,26 +1072,35 @@ async def build_components_v2_link(
         media_quality,
         os.getenv("AUTO_TWITTER_PROVIDER", "fixembed"),
     )
+    payload_key = PayloadKey(
+        item.service,
+        item.canonical_url,
+        translation_language,
+        item.mode,
+        media_quality,
+    )
     request_id = new_request_id()
     files: tuple[discord.File, ...] = ()
     async with conversion_telemetry.observe(item.service, request_id):
+        payload = await payload_cache.get_or_fetch(
+            payload_key,
+            lambda: fetch_card_payload(item, translation_language),
+        )
         if item.service == "Instagram":
-            instagram_delivery = await fetch_instagram_delivery(
-                item.canonical_url,
+            instagram_delivery = await prepare_instagram_delivery(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
+                media_budget=media_budget,
+                media_cache=media_cache,
+                media_optimizer=media_optimizer,
+                mosaic=item.mode == "mosaic",
             )
             layout = instagram_delivery.layout
             files = instagram_delivery.files
         elif item.service == "Twitter":
             fixed_url = build_fixembed_url(translated_item, media_quality)
-            payload = await fetch_twitter_payload(
-                item.canonical_url,
-                translation_language,
-                item.mode,
-            )
             layout = build_twitter_layout(
                 payload,
                 fixed_url,
@@ -752,92 +1108,81 @@ async def build_components_v2_link(
                 card_preferences,
             )
         elif item.service == "Reddit":
-            layout = await fetch_reddit_layout(
-                item.canonical_url,
+            layout = build_reddit_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "Threads":
-            layout = await fetch_threads_layout(
-                item.canonical_url,
+            layout = build_threads_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "Pixiv":
-            layout = await fetch_pixiv_layout(
-                item.canonical_url,
+            layout = build_pixiv_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "Bluesky":
-            layout = await fetch_bluesky_layout(
-                item.canonical_url,
+            layout = build_bluesky_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "Bilibili":
-            layout = await fetch_bilibili_layout(
-                item.canonical_url,
+            layout = build_bilibili_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "YouTube":
-            layout = await fetch_youtube_community_layout(
-                item.canonical_url,
+            layout = build_youtube_community_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "Pinterest":
-            layout = await fetch_pinterest_layout(
-                item.canonical_url,
+            layout = build_pinterest_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "TikTok":
-            layout = await fetch_tiktok_layout(
-                item.canonical_url,
+            layout = build_tiktok_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "Tumblr":
-            layout = await fetch_tumblr_layout(
-                item.canonical_url,
+            layout = build_tumblr_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "Twitch":
-            layout = await fetch_twitch_layout(
-                item.canonical_url,
+            layout = build_twitch_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         elif item.service == "DeviantArt":
-            layout = await fetch_deviantart_layout(
-                item.canonical_url,
+            layout = build_deviantart_layout(
+                payload,
                 automatic_url,
                 footer_branding,
                 card_preferences,
-                translation_language=translation_language,
             )
         else:
             raise ValueError("unsupported rich-card service")
@@ -874,6 +1219,9 @@ async def send_components_v2_links(interaction, links):
     card_preferences = preferences_from_settings(guild_settings, premium=premium)
 
     await interaction.response.defer()
+    # Followups use the interaction webhook rather than the channel route,
+    # and run ahead of queued automatic conversions.
+    followup_key = ("interaction", interaction.id)
     for item in links:
         translated_item = with_translation_language(item, guild_settings)
         fallback_url = build_automatic_url(
@@ -895,21 +1243,31 @@ async def send_components_v2_links(interaction, links):
                 item.service,
                 type(error).__name__,
             )
-            await interaction.followup.send(fallback_url)
+            ticket = delivery_telemetry.queued(
+                "link", guild_id=guild_id, priority="interactive"
+            )
+
+            async def send_fallback_url():
+                return await interaction.followup.send(fallback_url)
+
+            await schedule_delivery(ticket, followup_key, send_fallback_url)
             continue
 
-        try:
+        ticket = delivery_telemetry.queued(
+            "card", guild_id=guild_id, priority="interactive"
+        )
+
+        async def primary_send():
             send_options = {"view": delivery.view}
             if delivery.files:
                 send_options["files"] = list(delivery.files)
-            await interaction.followup.send(**send_options)
-        except discord.HTTPException as error:
-            logging.warning(
-                "Components V2 command delivery failed for %s: %s",
-                item.service,
-                type(error).__name__,
-            )
-            await interaction.followup.send(delivery.fallback_url)
+            return await interaction.followup.send(**send_options)
+
+        async def fallback_send():
+            return await interaction.followup.send(delivery.fallback_url)
+
+        await schedule_delivery(ticket, followup_key, primary_send, fallback_send)
+        close_files(delivery.files)
 
 @client.tree.command(
     name='activate',
@@ -1555,9 +1913,7 @@ class ChannelRulesSettingsView(SettingsPageView):
         guild_id = self.interaction.guild.id
         key = (guild_id, self.selected_channel_id, self.selected_service)
         if self.selected_action == "default":
-            await client.db.execute("DELETE FROM channel_service_rules WHERE guild_id = ? AND channel_id = ? AND service = ?", key)
-            await client.db.commit()
-            channel_service_rules.pop(key, None)
+            await delete_channel_service_rule(client.db, *key)
         else:
             await set_channel_service_rule(client.db, *key, self.selected_action)
         self.render()
@@ -1601,9 +1957,15 @@ class ReliabilitySettingsView(SettingsPageView):
                 self.interaction.guild, service
             ),
         )
+        status += "\n\n" + format_dedup_health(processed_links.snapshot())
+        status += "\n\n" + format_admission_health(admission_controller.snapshot())
+        status += "\n\n" + format_media_budget_health(media_budget.snapshot())
+        status += "\n" + format_media_cache_health(media_cache.snapshot())
+        status += "\n" + format_media_optimizer_health(media_optimizer.snapshot())
         status += "\n\n" + format_delivery_health(
             delivery_telemetry.snapshot(),
             pending=SEND_QUEUE.qsize(),
+            guild_pending=delivery_telemetry.pending_for(self.interaction.guild.id),
         )
         controls = ((
             ReliabilityRefreshButton(self),
@@ -1668,6 +2030,7 @@ class PremiumControlsPage(SettingsPageView):
         await save_premium_controls(
             client.db, self.interaction.guild.id, self.settings
         )
+        guild_runtime_configs.invalidate(self.interaction.guild.id)
 
     def render_locked(self, *, title, description):
         controls = ()
@@ -1819,6 +2182,7 @@ class TranslationSettingsView(SettingsPageView):
         await save_premium_controls(
             client.db, self.interaction.guild.id, self.settings
         )
+        guild_runtime_configs.invalidate(self.interaction.guild.id)
 
     def render(self):
         current = self.settings.get("translation_language")
@@ -2142,9 +2506,7 @@ async def quality(interaction: discord.Interaction, profile: app_commands.Choice
 async def rule(interaction: discord.Interaction, channel: discord.TextChannel, service: app_commands.Choice[str], action: app_commands.Choice[str]):
     guild_id = interaction.guild.id
     if action.value == "default":
-        await client.db.execute("DELETE FROM channel_service_rules WHERE guild_id = ? AND channel_id = ? AND service = ?", (guild_id, channel.id, service.value))
-        await client.db.commit()
-        channel_service_rules.pop((guild_id, channel.id, service.value), None)
+        await delete_channel_service_rule(client.db, guild_id, channel.id, service.value)
     else:
         await set_channel_service_rule(client.db, guild_id, channel.id, service.value, action.value)
     view = SettingsNoticeView(
@@ -2176,25 +2538,25 @@ async def on_message(message):
     if message.author == client.user:
         return
 
+    # Most messages carry no link at all; reject them before any guild work.
+    if not may_contain_supported_link(message.content):
+        return
+
     if not message.guild:
         return
 
     guild_id = message.guild.id
-    guild_settings = bot_settings.get(guild_id, {
-        "enabled_services": DEFAULT_ENABLED_SERVICES,
-        "mention_users": True,
-        "delete_original": True
-    })
-    enabled_services = guild_settings.get("enabled_services", DEFAULT_ENABLED_SERVICES)
-    mention_users = guild_settings.get("mention_users", True)
-    delete_original = guild_settings.get("delete_original", True)
-    delivery_mode = guild_settings.get("delivery_mode", "suppress")
-    media_quality = guild_settings.get("media_quality", "balanced")
     premium = await is_guild_premium(guild_id)
-    if should_skip_automatic(message, guild_settings, premium=premium):
+    runtime = get_guild_runtime_config(message.guild, premium)
+    if runtime.skips_author(message.author):
         return
-    footer_branding = get_footer_branding(message.guild, guild_settings, premium)
-    card_preferences = preferences_from_settings(guild_settings, premium=premium)
+    guild_settings = runtime.settings
+    mention_users = runtime.mention_users
+    delete_original = runtime.delete_original
+    delivery_mode = runtime.delivery_mode
+    media_quality = runtime.media_quality
+    footer_branding = runtime.footer_branding
+    card_preferences = runtime.card_preferences
 
     # Premium perk: skip bot messages only if NOT premium
     if message.author.bot and not premium:
@@ -2207,17 +2569,13 @@ async def on_message(message):
                 include_preconverted=False,
                 include_fixembed=False,
             )
-            formatted_links = []
-            component_layouts = []
+            accepted_links = []
             for item in links:
-                default_enabled = item.service in enabled_services
-                service_enabled = get_service_rule(guild_id, message.channel.id, item.service, default_enabled)
+                service_enabled = runtime.service_enabled(message.channel.id, item.service)
                 dedup_key = (message.channel.id, item.canonical_url)
-                cache_time = processed_link_cache.get(dedup_key, 0)
-                recently_processed = (time.time() - cache_time) < DEDUP_WINDOW_SECONDS
+                recently_processed = processed_links.seen(dedup_key)
 
                 if service_enabled and not recently_processed:
-                    rich_card_built = False
                     translated_item = with_translation_language(
                         item,
                         guild_settings,
@@ -2227,39 +2585,10 @@ async def on_message(message):
                         media_quality,
                         os.getenv("AUTO_TWITTER_PROVIDER", "fixembed"),
                     )
-                    if item.service in SERVICE_NAMES:
-                        try:
-                            delivery = await build_components_v2_link(
-                                item,
-                                guild_settings,
-                                footer_branding,
-                                card_preferences,
-                                premium=premium,
-                            )
-                            component_layouts.append(delivery)
-                            rich_card_built = True
-                        except Exception:
-                            formatted_links.append(automatic_url)
-                    else:
-                        formatted_links.append(
-                            f"[{item.display_text}]({automatic_url})"
-                        )
-                    if premium:
-                        try:
-                            await record_processing_outcome(
-                                client.db,
-                                guild_id,
-                                item.service,
-                                rich=rich_card_built,
-                            )
-                        except Exception as error:
-                            logging.warning(
-                                "Premium analytics write failed for guild %s: %s",
-                                guild_id,
-                                error,
-                            )
-                    processed_link_cache[dedup_key] = time.time()
-            if formatted_links or component_layouts:
+                    accepted_links.append((item, automatic_url))
+                    processed_links.mark(dedup_key)
+
+            if accepted_links:
                 permissions = message.channel.permissions_for(message.guild.me)
                 delivery_decision = resolve_delivery_mode(
                     delivery_mode,
@@ -2275,63 +2604,139 @@ async def on_message(message):
                 async def suppress_source_message():
                     return await message.edit(suppress=True)
 
+                attribution_lines = []
+                allowed_mentions = None
                 if effective_delivery_mode == "delete":
-                    delivery_outcomes = []
                     if not premium:
                         sender = message.author.mention if mention_users else message.author.display_name
-                        formatted_links.append(f"Sent by {sender}")
+                        attribution_lines.append(f"Sent by {sender}")
                     tagged_users = format_tagged_users(message.mentions, message.author.id)
                     if tagged_users:
-                        formatted_links.append(tagged_users)
+                        attribution_lines.append(tagged_users)
                     allowed_mentions = discord.AllowedMentions(
                         users=[message.author] if mention_users and not premium else [],
                         roles=False,
                         everyone=False,
                         replied_user=False,
                     )
-                    for chunk in chunk_lines(formatted_links):
+
+                delivery_outcomes = []
+                formatted_links = []
+                component_layouts = []
+                pending_cards = []
+                processing_outcomes = []
+
+                # Consecutive ready cards share one message where Discord's
+                # component, text, and attachment limits allow.
+                async def send_pending_cards():
+                    for pack in pack_cards(pending_cards):
+                        if len(pack.cards) > 1:
+                            delivery_outcomes.extend(
+                                await send_card_pack(
+                                    message.channel,
+                                    pack,
+                                    allowed_mentions,
+                                )
+                            )
+                            continue
+                        delivery = pack.cards[0]
                         delivery_outcomes.append(
                             await rate_limited_send(
                                 message.channel,
-                                content=chunk,
+                                view=delivery.view,
+                                files=delivery.files,
+                                fallback_content=delivery.fallback_url,
                                 allowed_mentions=allowed_mentions,
                             )
                         )
-                    for delivery in component_layouts:
+                    # Attachments may be spooled to disk; release them once sent.
+                    for delivery in pending_cards:
+                        close_files(delivery.files)
+                    pending_cards.clear()
+
+                async def send_formatted_links(extra_lines=()):
+                    for chunk in chunk_lines([*formatted_links, *extra_lines]):
                         delivery_outcomes.append(
                             await rate_limited_send(
                                 message.channel,
-                                view=delivery.view,
-                                files=delivery.files,
-                                fallback_content=delivery.fallback_url,
+                                content=chunk,
                                 allowed_mentions=allowed_mentions,
                             )
                         )
+                    formatted_links.clear()
+
+                # Under queue pressure, skip card builds and send links.
+                shed_cards = not admission_controller.admit_cards(
+                    sum(item.service in SERVICE_NAMES for item, _ in accepted_links)
+                )
+
+                def build_job(item):
+                    if item.service in SERVICE_NAMES and not shed_cards:
+                        return lambda: build_components_v2_link(
+                            item,
+                            guild_settings,
+                            footer_branding,
+                            card_preferences,
+                            premium=premium,
+                        )
+                    # Plain-link services have nothing to build.
+                    return lambda: asyncio.sleep(0)
+
+                # Cards build concurrently but ship in link order as soon as
+                # every earlier link has shipped; failed builds go out as
+                # link-only chunks at their place in the sequence.
+                batch = ()
+                try:
+                    async with contextlib.aclosing(
+                        stream_bounded(
+                            [build_job(item) for item, _ in accepted_links],
+                            discard=release_delivery,
+                        )
+                    ) as ready_batches:
+                        async for batch in ready_batches:
+                            for sequence, delivery in batch:
+                                item, automatic_url = accepted_links[sequence]
+                                rich_card_built = False
+                                if item.service not in SERVICE_NAMES:
+                                    formatted_links.append(
+                                        f"[{item.display_text}]({automatic_url})"
+                                    )
+                                elif shed_cards or isinstance(delivery, Exception):
+                                    formatted_links.append(automatic_url)
+                                else:
+                                    if formatted_links:
+                                        await send_pending_cards()
+                                        await send_formatted_links()
+                                    component_layouts.append(delivery)
+                                    pending_cards.append(delivery)
+                                    rich_card_built = True
+                                processing_outcomes.append((item.service, rich_card_built))
+                            await send_pending_cards()
+                            # Hold the last links back so attribution joins them.
+                            if batch[-1][0] < len(accepted_links) - 1:
+                                await send_formatted_links()
+                    await send_formatted_links(attribution_lines)
+                finally:
+                    # Spooled attachments hold disk and media budget until
+                    # closed, so release cards an error or cancellation
+                    # stranded before they were sent.
+                    for delivery in pending_cards:
+                        release_delivery(delivery)
+                    for _, delivery in batch:
+                        release_delivery(delivery)
+
+                if effective_delivery_mode == "delete":
                     if should_apply_source_message_action(
                         "delete", delivery_outcomes
                     ):
                         await apply_source_message_action(
                             "delete",
-                            delete_message=message.delete,
+                            delete_message=lambda: source_cleanup.delete(message),
                             suppress_message=suppress_source_message,
                             forbidden_errors=(discord.Forbidden,),
                             on_permission_recovery=delivery_telemetry.mode_downgraded,
                         )
                 elif effective_delivery_mode == "suppress":
-                    delivery_outcomes = []
-                    for chunk in chunk_lines(formatted_links):
-                        delivery_outcomes.append(
-                            await rate_limited_send(message.channel, content=chunk)
-                        )
-                    for delivery in component_layouts:
-                        delivery_outcomes.append(
-                            await rate_limited_send(
-                                message.channel,
-                                view=delivery.view,
-                                files=delivery.files,
-                                fallback_content=delivery.fallback_url,
-                            )
-                        )
                     if should_apply_source_message_action(
                         "suppress", delivery_outcomes
                     ):
@@ -2342,16 +2747,22 @@ async def on_message(message):
                             forbidden_errors=(discord.Forbidden,),
                             on_permission_recovery=delivery_telemetry.mode_downgraded,
                         )
-                else:
-                    for chunk in chunk_lines(formatted_links):
-                        await rate_limited_send(message.channel, content=chunk)
-                    for delivery in component_layouts:
-                        await rate_limited_send(
-                            message.channel,
-                            view=delivery.view,
-                            files=delivery.files,
-                            fallback_content=delivery.fallback_url,
-                        )
+
+                if premium:
+                    for service, rich_card_built in processing_outcomes:
+                        try:
+                            await record_processing_outcome(
+                                client.db,
+                                guild_id,
+                                service,
+                                rich=rich_card_built,
+                            )
+                        except Exception as error:
+                            logging.warning(
+                                "Premium analytics write failed for guild %s: %s",
+                                guild_id,
+                                error,
+                            )
 
         except discord.Forbidden as error:
             logging.warning("Missing permissions in channel %s: %s", message.channel.id, error)
@@ -2500,8 +2911,7 @@ async def on_entitlement_create(entitlement):
     """Called when a user subscribes to premium."""
     if entitlement.guild_id:
         guild_id = entitlement.guild_id
-        if guild_id in bot_settings:
-            bot_settings[guild_id]["is_premium"] = True
+        premium_entitlements.apply(entitlement)
         logging.info(f"Premium activated for guild {guild_id}")
     if PREMIUM_SKU_ID:
         await sync_supporter_role(
@@ -2513,8 +2923,7 @@ async def on_entitlement_update(entitlement):
     if entitlement.guild_id:
         guild_id = entitlement.guild_id
         is_active = not entitlement.is_expired()
-        if guild_id in bot_settings:
-            bot_settings[guild_id]["is_premium"] = is_active
+        premium_entitlements.apply(entitlement, active=is_active)
         logging.info(f"Premium {'activated' if is_active else 'deactivated'} for guild {guild_id}")
     if PREMIUM_SKU_ID:
         await sync_supporter_role(
@@ -2525,8 +2934,7 @@ async def on_entitlement_delete(entitlement):
     """Called when a user's subscription to premium is removed."""
     if entitlement.guild_id:
         guild_id = entitlement.guild_id
-        if guild_id in bot_settings:
-            bot_settings[guild_id]["is_premium"] = False
+        premium_entitlements.apply(entitlement, active=False)
         logging.info(f"Premium removed for guild {guild_id}")
     if PREMIUM_SKU_ID:
         await sync_supporter_role(
@@ -2555,4 +2963,6 @@ async def on_member_join(member):
 load_dotenv()
 bot_token = os.getenv('BOT_TOKEN')
 PREMIUM_SKU_ID = os.getenv('PREMIUM_SKU_ID')
+# Fork image workers before the event loop starts any threads.
+media_optimizer.start()
 client.run(bot_token)
@@ -0,0 +1,168 @@
+"""Process-wide byte budget and per-host download caps for attached media."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+
+
+DEFAULT_MEDIA_BUDGET_BYTES = 128 * 1024 * 1024
+DEFAULT_PER_HOST_DOWNLOADS = 8
+DEFAULT_BUDGET_WAIT_SECONDS = 2.0
+
+
+class MediaBudgetExhausted(Exception):
+    """Raised when media bytes cannot be reserved in time."""
+
+
+@dataclass(frozen=True)
+class MediaBudgetSnapshot:
+    used_bytes: int
+    max_bytes: int
+    peak_bytes: int
+    reservations: int
+    waiting: int
+    exhausted: int
+
+
+class MediaReservation:
+    """Bytes held against a ``MediaBudget`` until released."""
+
+    def __init__(self, budget: MediaBudget, nbytes: int):
+        self._budget = budget
+        self.nbytes = nbytes
+
+    @property
+    def released(self) -> bool:
+        return self._budget is None
+
+    def shrink(self, nbytes: int) -> None:
+        """Return bytes beyond ``nbytes`` once the real size is known."""
+        nbytes = max(0, int(nbytes))
+        if self._budget is None or nbytes >= self.nbytes:
+            return
+        self._budget._return(self.nbytes - nbytes)
+        self.nbytes = nbytes
+
+    def release(self) -> None:
+        budget, self._budget = self._budget, None
+        if budget is not None:
+            budget._return(self.nbytes, reservation=True)
+
+
+class MediaBudget:
+    """Byte-weighted semaphore shared by every media download.
+
+    Reservations are granted in arrival order, so a large carousel image
+    cannot be starved by a stream of small ones. A caller that cannot be
+    admitted within ``wait_seconds`` gets ``MediaBudgetExhausted`` and is
+    expected to fall back to remote media. ``host_slot`` caps concurrent
+    requests to one host; extra requests queue on its semaphore.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MEDIA_BUDGET_BYTES,
+        *,
+        per_host_limit: int = DEFAULT_PER_HOST_DOWNLOADS,
+        wait_seconds: float = DEFAULT_BUDGET_WAIT_SECONDS,
+    ):
+        self.max_bytes = max(1, int(max_bytes))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.wait_seconds = max(0.0, float(wait_seconds))
+        self.used_bytes = 0
+        self.peak_bytes = 0
+        self.reservations = 0
+        self.exhausted = 0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+
+    def host_slot(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = self._hosts[host] = asyncio.Semaphore(self.per_host_limit)
+        return semaphore
+
+    async def reserve(self, nbytes: int) -> MediaReservation:
+        nbytes = max(0, int(nbytes))
+        if nbytes > self.max_bytes:
+            self.exhausted += 1
+            raise MediaBudgetExhausted(f"{nbytes} bytes exceeds the media budget")
+        if not self._waiters and self.used_bytes + nbytes <= self.max_bytes:
+            return self._grant(nbytes)
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (nbytes, waiter)
+        self._waiters.append(entry)
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), self.wait_seconds)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return waiter.result()
+            self._abandon(entry)
+            self.exhausted += 1
+            raise MediaBudgetExhausted("media budget is exhausted") from None
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                waiter.result().release()
+            else:
+                self._abandon(entry)
+            raise
+
+    def snapshot(self) -> MediaBudgetSnapshot:
+        return MediaBudgetSnapshot(
+            used_bytes=self.used_bytes,
+            max_bytes=self.max_bytes,
+            peak_bytes=self.peak_bytes,
+            reservations=self.reservations,
+            waiting=len(self._waiters),
+            exhausted=self.exhausted,
+        )
+
+    def _grant(self, nbytes: int) -> MediaReservation:
+        self.used_bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+        self.reservations += 1
+        return MediaReservation(self, nbytes)
+
+    def _abandon(self, entry: tuple[int, asyncio.Future]) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            pass
+        entry[1].cancel()
+        # A blocked head may have been holding back smaller waiters.
+        self._wake()
+
+    def _return(self, nbytes: int, *, reservation: bool = False) -> None:
+        self.used_bytes = max(0, self.used_bytes - nbytes)
+        if reservation:
+            self.reservations -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            nbytes, waiter = self._waiters[0]
+            if waiter.done():
+                self._waiters.popleft()
+                continue
+            if self.used_bytes + nbytes > self.max_bytes:
+                return
+            self._waiters.popleft()
+            waiter.set_result(self._grant(nbytes))
+
+
+def _megabytes(nbytes: int) -> str:
+    return f"{nbytes / (1024 * 1024):.1f} MB"
+
+
+def format_media_budget_health(snapshot: MediaBudgetSnapshot) -> str:
+    """Render media budget usage for the Reliability page."""
+    refused_label = "download" if snapshot.exhausted == 1 else "downloads"
+    return (
+        f"**Media budget:** {_megabytes(snapshot.used_bytes)} of "
+        f"{_megabytes(snapshot.max_bytes)} in use "
+        f"(peak {_megabytes(snapshot.peak_bytes)}) · {snapshot.waiting} waiting · "
+        f"{snapshot.exhausted} {refused_label} refused"
+    )
@@ -0,0 +1,179 @@
+"""Byte-bounded LRU cache of downloaded media with an optional disk tier.
+
+Entries are keyed by the relayed media URL, which embeds the signed CDN
+URL, plus whether the bytes were re-encoded, so a key always names the
+same bytes and entries never expire.
+Memory hits hand back the cached ``bytes`` (``io.BytesIO`` shares them
+without copying); memory evictions spill to the disk tier when one is
+configured, and disk hits open the file for the upload to read directly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+
+DEFAULT_MEDIA_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_MEDIA_CACHE_DISK_BYTES = 512 * 1024 * 1024
+MEDIA_FILE_SUFFIX = ".media"
+
+
+@dataclass
+class _DiskEntry:
+    path: Path
+    size: int
+    content_type: str
+
+
+@dataclass(frozen=True)
+class MediaCacheSnapshot:
+    entries: int
+    bytes_used: int
+    max_bytes: int
+    disk_entries: int
+    disk_bytes_used: int
+    hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+
+
+class MediaCache:
+    """Share downloaded media between reposts of the same post."""
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = DEFAULT_MEDIA_CACHE_BYTES,
+        disk_path: Optional[Union[str, Path]] = None,
+        disk_max_bytes: int = DEFAULT_MEDIA_CACHE_DISK_BYTES,
+    ):
+        self.max_bytes = max(0, int(max_bytes))
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+        self.disk_path = Path(disk_path) if disk_path else None
+        self._entries: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+        self._disk: OrderedDict[str, _DiskEntry] = OrderedDict()
+        self._bytes_used = 0
+        self._disk_bytes_used = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        if self.disk_path is not None:
+            # The disk index lives in memory, so earlier files are orphans.
+            self.disk_path.mkdir(parents=True, exist_ok=True)
+            for orphan in self.disk_path.glob(f"*{MEDIA_FILE_SUFFIX}"):
+                orphan.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._disk)
+
+    async def get(self, key: str) -> Optional[tuple[Union[bytes, BinaryIO], str]]:
+        """Return cached content and its type, or None on a miss.
+
+        Disk hits return an open file the caller must close.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+        disk_entry = self._disk.get(key)
+        if disk_entry is not None:
+            try:
+                content = await asyncio.to_thread(open, disk_entry.path, "rb")
+            except OSError:
+                self._discard_disk(key)
+            else:
+                self._disk.move_to_end(key)
+                self._disk_hits += 1
+                return content, disk_entry.content_type
+        self._misses += 1
+        return None
+
+    def admits(self, size: int) -> bool:
+        """Whether content of ``size`` bytes fits the memory tier."""
+        return 0 < size <= self.max_bytes
+
+    async def put(self, key: str, content: bytes, content_type: str) -> None:
+        size = len(content)
+        self._discard(key)
+        if not self.admits(size):
+            return
+        self._entries[key] = (bytes(content), content_type)
+        self._bytes_used += size
+        while self._bytes_used > self.max_bytes and self._entries:
+            oldest, (evicted, evicted_type) = self._entries.popitem(last=False)
+            self._bytes_used -= len(evicted)
+            self._evictions += 1
+            await self._spill(oldest, evicted, evicted_type)
+
+    def snapshot(self) -> MediaCacheSnapshot:
+        return MediaCacheSnapshot(
+            entries=len(self._entries),
+            bytes_used=self._bytes_used,
+            max_bytes=self.max_bytes,
+            disk_entries=len(self._disk),
+            disk_bytes_used=self._disk_bytes_used,
+            hits=self._hits,
+            disk_hits=self._disk_hits,
+            misses=self._misses,
+            evictions=self._evictions,
+        )
+
+    async def _spill(self, key: str, content: bytes, content_type: str) -> None:
+        if self.disk_path is None or len(content) > self.disk_max_bytes:
+            return
+        path = self.disk_path / (
+            hashlib.sha256(key.encode("utf-8")).hexdigest() + MEDIA_FILE_SUFFIX
+        )
+        self._discard_disk(key)
+        try:
+            await asyncio.to_thread(path.write_bytes, content)
+        except OSError as error:
+            logging.warning("media_cache_spill_failed error=%s", error)
+            return
+        self._disk[key] = _DiskEntry(path, len(content), content_type)
+        self._disk_bytes_used += len(content)
+        while self._disk_bytes_used > self.disk_max_bytes and self._disk:
+            self._discard_disk(next(iter(self._disk)))
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes_used -= len(entry[0])
+        self._discard_disk(key)
+
+    def _discard_disk(self, key: str) -> None:
+        entry = self._disk.pop(key, None)
+        if entry is None:
+            return
+        self._disk_bytes_used -= entry.size
+        # Unlinking is safe while an upload still has the file open.
+        entry.path.unlink(missing_ok=True)
+
+
+def format_media_cache_health(snapshot: MediaCacheSnapshot) -> str:
+    """Render carousel media cache use for the Reliability page."""
+    lookups = snapshot.hits + snapshot.disk_hits + snapshot.misses
+    hit_rate = (
+        round((snapshot.hits + snapshot.disk_hits) * 100 / lookups) if lookups else 0
+    )
+    image_label = "image" if snapshot.entries == 1 else "images"
+    line = (
+        f"**Media cache:** {hit_rate}% hits · {snapshot.entries} {image_label}, "
+        f"{snapshot.bytes_used / (1024 * 1024):.1f} of "
+        f"{snapshot.max_bytes / (1024 * 1024):.1f} MB in memory"
+    )
+    if snapshot.disk_entries:
+        line += (
+            f" · {snapshot.disk_entries} on disk "
+            f"({snapshot.disk_bytes_used / (1024 * 1024):.1f} MB)"
+        )
+    return line
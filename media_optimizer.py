@@ -0,0 +1,347 @@
+"""Optional Pillow re-encoding of attachment images in worker processes."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import io
+import logging
+import math
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it uploads stay as downloaded.
+    Image = ImageOps = None
+
+
+DEFAULT_OPTIMIZER_WORKERS = 2
+# Longest edge Discord's full-screen viewer shows on a 1080p display.
+DEFAULT_MAX_DIMENSION = 1920
+DEFAULT_JPEG_QUALITY = 85
+DEFAULT_WEBP_QUALITY = 80
+DEFAULT_MIN_PNG_BYTES = 512 * 1024
+DEFAULT_MOSAIC_WIDTH = 1600
+MOSAIC_GAP = 4
+MOSAIC_BACKGROUND = (43, 45, 49)
+ENCODE_SAMPLE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class OptimizedImage:
+    content: bytes
+    content_type: str
+    original_bytes: int
+    encode_ms: float
+
+
+@dataclass(frozen=True)
+class MediaOptimizerSnapshot:
+    enabled: bool
+    images: int
+    optimized: int
+    bytes_in: int
+    bytes_saved: int
+    encode_p95_ms: int
+    failures: int
+    mosaics: int = 0
+    pool_broken: bool = False
+    available: bool = True
+    mosaic_fallbacks: int = 0
+
+
+def optimizer_available() -> bool:
+    return Image is not None and "fork" in multiprocessing.get_all_start_methods()
+
+
+def optimize_image(
+    content: bytes,
+    content_type: str,
+    *,
+    max_dimension: int = DEFAULT_MAX_DIMENSION,
+    jpeg_quality: int = DEFAULT_JPEG_QUALITY,
+    webp_quality: int = DEFAULT_WEBP_QUALITY,
+    min_png_bytes: int = DEFAULT_MIN_PNG_BYTES,
+) -> Optional[OptimizedImage]:
+    """Downscale and re-encode one image; None when it would not shrink.
+
+    Runs in a worker process. GIFs are left alone so animation survives;
+    JPEG and WebP are only re-encoded when they need downscaling, and PNGs
+    of at least ``min_png_bytes`` become JPEG, or WebP if they carry
+    transparency. Aspect ratio is always kept.
+    """
+    started = time.perf_counter()
+    if content_type == "image/gif":
+        return None
+    with Image.open(io.BytesIO(content)) as image:
+        oversized = max(image.size) > max_dimension
+        large_png = content_type == "image/png" and len(content) >= min_png_bytes
+        if not oversized and not large_png:
+            return None
+        image.load()
+        if oversized:
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        output = io.BytesIO()
+        if content_type == "image/webp" or (content_type == "image/png" and has_alpha):
+            image.save(output, "WEBP", quality=webp_quality, method=4)
+            optimized_type = "image/webp"
+        else:
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            image.save(output, "JPEG", quality=jpeg_quality, optimize=True, progressive=True)
+            optimized_type = "image/jpeg"
+    optimized = output.getvalue()
+    if len(optimized) >= len(content):
+        return None
+    return OptimizedImage(
+        content=optimized,
+        content_type=optimized_type,
+        original_bytes=len(content),
+        encode_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+def mosaic_grid(count: int) -> tuple[int, int]:
+    """Return (columns, rows) for a near-square grid of ``count`` cells."""
+    columns = max(1, math.ceil(math.sqrt(count)))
+    return columns, math.ceil(count / columns)
+
+
+def compose_mosaic(
+    contents: Sequence[bytes],
+    *,
+    width: int = DEFAULT_MOSAIC_WIDTH,
+    jpeg_quality: int = DEFAULT_JPEG_QUALITY,
+) -> OptimizedImage:
+    """Tile carousel images, in order, into one JPEG grid.
+
+    Runs in a worker process. Cells take the first image's aspect ratio,
+    as Instagram crops every carousel image to it, and each image is
+    center-cropped to fill its cell.
+    """
+    started = time.perf_counter()
+    columns, rows = mosaic_grid(len(contents))
+    cell_width = (width - MOSAIC_GAP * (columns - 1)) // columns
+    cell_height = None
+    canvas = None
+    for index, content in enumerate(contents):
+        with Image.open(io.BytesIO(content)) as image:
+            image.draft("RGB", (cell_width, cell_width * 2))
+            if cell_height is None:
+                aspect = image.height / image.width if image.width else 1.0
+                cell_height = max(1, round(cell_width * min(max(aspect, 0.5), 1.5)))
+                canvas = Image.new(
+                    "RGB",
+                    (width, rows * cell_height + MOSAIC_GAP * (rows - 1)),
+                    MOSAIC_BACKGROUND,
+                )
+            cell = ImageOps.fit(
+                image.convert("RGB"),
+                (cell_width, cell_height),
+                Image.Resampling.LANCZOS,
+            )
+        row, column = divmod(index, columns)
+        canvas.paste(
+            cell,
+            (column * (cell_width + MOSAIC_GAP), row * (cell_height + MOSAIC_GAP)),
+        )
+    output = io.BytesIO()
+    canvas.save(output, "JPEG", quality=jpeg_quality, optimize=True, progressive=True)
+    return OptimizedImage(
+        content=output.getvalue(),
+        content_type="image/jpeg",
+        original_bytes=sum(len(content) for content in contents),
+        encode_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+class MediaOptimizer:
+    """Shrink attachment images off the event loop before upload.
+
+    ``start`` forks every worker up front and must run before the event
+    loop and its helper threads exist, since forking a multi-threaded
+    process can deadlock the child; ``fork`` avoids re-running the bot's
+    entry script in each worker. Until then, and after the pool breaks,
+    images pass through untouched. Any decode, encode, or pool failure
+    keeps the original image. ``enabled`` only governs re-encoding:
+    mosaics are requested per link and run whenever Pillow is available.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        workers: int = DEFAULT_OPTIMIZER_WORKERS,
+        max_dimension: int = DEFAULT_MAX_DIMENSION,
+        jpeg_quality: int = DEFAULT_JPEG_QUALITY,
+        webp_quality: int = DEFAULT_WEBP_QUALITY,
+        min_png_bytes: int = DEFAULT_MIN_PNG_BYTES,
+    ):
+        self.available = optimizer_available()
+        self.enabled = bool(enabled) and self.available
+        if enabled and not self.available:
+            logging.warning("media_optimizer_unavailable: Pillow or fork is missing")
+        self.workers = max(1, int(workers))
+        self.options = {
+            "max_dimension": max(1, int(max_dimension)),
+            "jpeg_quality": min(max(int(jpeg_quality), 1), 95),
+            "webp_quality": min(max(int(webp_quality), 1), 100),
+            "min_png_bytes": max(0, int(min_png_bytes)),
+        }
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.pool_broken = False
+        self._encode_ms: deque[float] = deque(maxlen=ENCODE_SAMPLE_SIZE)
+        self.images = 0
+        self.optimized = 0
+        self.bytes_in = 0
+        self.bytes_saved = 0
+        self.failures = 0
+        self.mosaics = 0
+        self.mosaic_fallbacks = 0
+
+    def start(self) -> None:
+        """Fork the worker pool while the caller is still single-threaded."""
+        if not self.available or self._executor is not None or self.pool_broken:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+        # With ``fork`` the first submission launches every worker at once.
+        self._executor.submit(int)
+
+    async def optimize(self, content: bytes, content_type: str) -> Optional[OptimizedImage]:
+        if not self.enabled or self._executor is None:
+            return None
+        self.images += 1
+        self.bytes_in += len(content)
+        result = await self._run(
+            functools.partial(optimize_image, content, content_type, **self.options),
+            content_type,
+        )
+        if result is None:
+            return None
+        self.optimized += 1
+        self._record(result, content_type)
+        return result
+
+    async def mosaic(self, contents: Sequence[bytes]) -> Optional[OptimizedImage]:
+        """Compose carousel images into one grid; None if unavailable."""
+        if not contents:
+            return None
+        if self._executor is None:
+            self.mosaic_fallbacks += 1
+            return None
+        self.bytes_in += sum(len(content) for content in contents)
+        result = await self._run(
+            functools.partial(
+                compose_mosaic,
+                list(contents),
+                jpeg_quality=self.options["jpeg_quality"],
+            ),
+            "mosaic",
+        )
+        if result is None:
+            self.mosaic_fallbacks += 1
+            return None
+        self.mosaics += 1
+        self._record(result, "mosaic")
+        return result
+
+    async def _run(self, job, label: str) -> Optional[OptimizedImage]:
+        executor = self._executor
+        if executor is None:
+            return None
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, job)
+        except BrokenProcessPool:
+            self.failures += 1
+            if self._executor is executor:
+                # Re-forking from the running bot could deadlock, so the
+                # pool stays down and images pass through until restart.
+                self._executor = None
+                self.pool_broken = True
+                executor.shutdown(wait=False, cancel_futures=True)
+                logging.warning("media_optimizer_pool_broken")
+        except Exception as error:
+            self.failures += 1
+            logging.info("media_optimizer_skipped type=%s error=%s", label, error)
+        return None
+
+    def _record(self, result: OptimizedImage, label: str) -> None:
+        self.bytes_saved += max(0, result.original_bytes - len(result.content))
+        self._encode_ms.append(result.encode_ms)
+        logging.debug(
+            "media_optimized type=%s->%s bytes=%s->%s encode_ms=%.1f",
+            label,
+            result.content_type,
+            result.original_bytes,
+            len(result.content),
+            result.encode_ms,
+        )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def snapshot(self) -> MediaOptimizerSnapshot:
+        samples = sorted(self._encode_ms)
+        p95 = samples[max(0, math.ceil(len(samples) * 0.95) - 1)] if samples else 0
+        return MediaOptimizerSnapshot(
+            enabled=self.enabled,
+            images=self.images,
+            optimized=self.optimized,
+            bytes_in=self.bytes_in,
+            bytes_saved=self.bytes_saved,
+            encode_p95_ms=round(p95),
+            failures=self.failures,
+            mosaics=self.mosaics,
+            pool_broken=self.pool_broken,
+            available=self.available,
+            mosaic_fallbacks=self.mosaic_fallbacks,
+        )
+
+
+def _mosaic_fallback_label(count: int) -> str:
+    mosaic_label = "mosaic" if count == 1 else "mosaics"
+    return f"{count} {mosaic_label} sent as separate images"
+
+
+def format_media_optimizer_health(snapshot: MediaOptimizerSnapshot) -> str:
+    """Render image re-encoding savings for the Reliability page."""
+    if not snapshot.available:
+        line = "**Image optimization:** Unavailable (Pillow is not installed)"
+        if snapshot.mosaic_fallbacks:
+            line += f" · {_mosaic_fallback_label(snapshot.mosaic_fallbacks)}"
+        return line
+    if not snapshot.enabled and not snapshot.mosaics and not snapshot.mosaic_fallbacks:
+        return "**Image optimization:** Off"
+    saved_percent = (
+        round(snapshot.bytes_saved * 100 / snapshot.bytes_in) if snapshot.bytes_in else 0
+    )
+    parts = []
+    if snapshot.enabled:
+        parts.append(f"{snapshot.optimized} of {snapshot.images} images shrunk")
+    if snapshot.mosaics:
+        mosaic_label = "mosaic" if snapshot.mosaics == 1 else "mosaics"
+        parts.append(f"{snapshot.mosaics} carousel {mosaic_label}")
+    if snapshot.mosaic_fallbacks:
+        parts.append(_mosaic_fallback_label(snapshot.mosaic_fallbacks))
+    parts.append(
+        f"{snapshot.bytes_saved / (1024 * 1024):.1f} MB saved ({saved_percent}%)"
+    )
+    parts.append(f"p95 encode {snapshot.encode_p95_ms}ms")
+    if snapshot.pool_broken:
+        parts.append("worker pool stopped")
+    return f"**Image optimization:** {' · '.join(parts)}"
@@ -0,0 +1,118 @@
+"""Stream downloaded media into spooled temporary files for uploads."""
+
+from __future__ import annotations
+
+import io
+import tempfile
+import weakref
+from collections.abc import AsyncIterable, Callable, Iterable
+from typing import BinaryIO, Optional, Union
+
+import discord
+
+
+# Smaller media stays in memory; anything larger rolls over to an
+# unlinked temporary file so it never sits in the heap as one block.
+DEFAULT_SPOOL_MEMORY_BYTES = 512 * 1024
+SPOOL_CHUNK_BYTES = 64 * 1024
+
+
+class _Spool(tempfile.SpooledTemporaryFile):
+    # ``on_close`` also runs if the spool is collected unclosed, since
+    # ``discord.File`` stubs out ``close`` on the buffers it wraps.
+    def __init__(self, max_size: int, on_close: Optional[Callable[[], None]]):
+        super().__init__(max_size=max_size)
+        self._on_close = (
+            weakref.finalize(self, on_close) if on_close is not None else None
+        )
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            if self._on_close is not None:
+                self._on_close()
+
+
+async def spool_chunks(
+    chunks: AsyncIterable[bytes],
+    max_bytes: int,
+    *,
+    memory_bytes: int = DEFAULT_SPOOL_MEMORY_BYTES,
+    on_close: Optional[Callable[[], None]] = None,
+) -> Optional[tuple[BinaryIO, int]]:
+    """Write ``chunks`` to a spooled file rewound to its start.
+
+    Returns the file and its size, or None (with the file closed) once
+    the stream exceeds ``max_bytes``. ``on_close`` runs once when the
+    file is closed or garbage-collected.
+    """
+    spool = _Spool(memory_bytes, on_close)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                spool.close()
+                return None
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, size
+
+
+def media_size(content: Union[bytes, BinaryIO]) -> int:
+    """Return the byte length of in-memory or file-backed media."""
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        return len(content)
+    position = content.tell()
+    size = content.seek(0, io.SEEK_END)
+    content.seek(position)
+    return size
+
+
+def media_file(content: Union[bytes, BinaryIO], filename: str) -> discord.File:
+    """Wrap media in a ``discord.File`` without copying file-backed content."""
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        content = io.BytesIO(content)
+    return discord.File(content, filename=filename)
+
+
+def close_media(contents: Iterable[Union[bytes, BinaryIO]]) -> None:
+    for content in contents:
+        if not isinstance(content, (bytes, bytearray, memoryview)):
+            content.close()
+
+
+def rewrap_files(files: Iterable[discord.File]) -> list[discord.File]:
+    """Wrap already-sent attachments again so another send can upload them.
+
+    After a send, ``discord.File`` hands ``close`` back to the file, and
+    aiohttp closes its upload source once the next request finishes.
+    """
+    rewrapped = []
+    for file in files:
+        file.close()
+        file.reset()
+        rewrapped.append(
+            discord.File(
+                file.fp,
+                filename=file.filename,
+                spoiler=file.spoiler,
+                description=file.description,
+            )
+        )
+    return rewrapped
+
+
+def close_files(files: Iterable[discord.File]) -> None:
+    """Release the files behind delivered attachments.
+
+    ``discord.File`` never closes a caller's file object; ``close()`` only
+    hands its ``close`` method back, so the file is closed afterwards.
+    """
+    for file in files:
+        file.close()
+        file.fp.close()
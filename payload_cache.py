@@ -0,0 +1,401 @@
+"""Process-local TTL and byte-bounded LRU cache for rich-card payloads.
+
+Expired entries stay servable up to a hard-stale ceiling: callers get the
+old payload at once while one background fetch refreshes it, since only
+engagement counters drift between fetches of the same post. An optional
+``PayloadStore`` persists entries so a restart does not start cold.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from typing import Any, NamedTuple, Optional
+
+from conversion_telemetry import classify_build_failure
+from payload_store import DEFAULT_WARM_ENTRIES, PayloadStore
+from single_flight import SingleFlight
+
+
+DEFAULT_TTL_SECONDS = 300
+PLATFORM_TTL_SECONDS = {
+    "Twitter": 120,
+    "Instagram": 300,
+    "Reddit": 180,
+    "Threads": 300,
+    "Pixiv": 900,
+    "Bluesky": 300,
+    "Bilibili": 600,
+    "YouTube": 600,
+    "Pinterest": 900,
+    "TikTok": 300,
+    "Tumblr": 600,
+    "Twitch": 120,
+    "DeviantArt": 300,
+}
+DEFAULT_MAX_STALE_SECONDS = 3600
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+MAX_ENTRY_BYTES = 512 * 1024
+# Transient failures retry soon; posts that are gone or unrenderable stay
+# on the link fallback longer. Unexpected errors are never cached.
+FAILURE_TTL_SECONDS = {
+    "timeout": 20,
+    "network": 15,
+    "upstream_5xx": 30,
+    "rate_limited": 60,
+    "upstream_4xx": 120,
+    "invalid_response": 600,
+    "unexpected": 0,
+}
+GONE_STATUSES = frozenset({404, 410})
+GONE_TTL_SECONDS = 900
+MAX_FAILURE_ENTRIES = 4096
+
+
+class PayloadKey(NamedTuple):
+    service: str
+    canonical_url: str
+    language: Optional[str] = None
+    mode: Optional[str] = None
+    quality: Optional[str] = None
+
+
+@dataclass
+class _CacheEntry:
+    payload: Mapping[str, Any]
+    size: int
+    expires_at: float
+    stale_until: float
+
+
+class RecentFailureError(RuntimeError):
+    """Raised instead of refetching a post that failed moments ago."""
+
+    def __init__(self, category: str, status: Optional[int] = None):
+        super().__init__(f"source recently failed: {category}")
+        self.failure_category = category
+        self.status = status
+
+
+@dataclass(frozen=True)
+class PayloadCacheSnapshot:
+    entries: int
+    bytes_used: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    coalesced: int
+    inflight: int
+    stale_served: int
+    refreshes: int
+    store_hits: int
+    failures_cached: int
+    failure_hits: int
+
+
+def estimate_payload_bytes(payload: Mapping[str, Any]) -> int:
+    """Approximate retained size from the compact JSON encoding."""
+    try:
+        encoded = json.dumps(payload, separators=(",", ":"), default=str)
+    except (TypeError, ValueError):
+        return MAX_ENTRY_BYTES + 1
+    return len(encoded.encode("utf-8"))
+
+
+def failure_ttl_seconds(
+    error: BaseException,
+    ttl_seconds: Mapping[str, float] = FAILURE_TTL_SECONDS,
+) -> tuple[str, float]:
+    """Pick a negative-cache lifetime from the conversion failure category."""
+    category = classify_build_failure(error)
+    if category == "upstream_4xx" and getattr(error, "status", None) in GONE_STATUSES:
+        return category, GONE_TTL_SECONDS
+    return category, ttl_seconds.get(category, 0)
+
+
+def source_is_gone(error: BaseException) -> bool:
+    """Whether a fetch failure means cached payloads no longer describe the post."""
+    if isinstance(error, RecentFailureError):
+        return False
+    category = classify_build_failure(error)
+    if category == "upstream_4xx":
+        return getattr(error, "status", None) in GONE_STATUSES
+    return category == "invalid_response"
+
+
+class FailureCache:
+    """Remember recent per-post failures so reposts skip straight to links."""
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: Mapping[str, float] = FAILURE_TTL_SECONDS,
+        max_entries: int = MAX_FAILURE_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = dict(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[float, str, Optional[int]]] = OrderedDict()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, canonical_url: str, error: BaseException) -> None:
+        if isinstance(error, RecentFailureError):
+            return
+        category, ttl = failure_ttl_seconds(error, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        status = getattr(error, "status", None)
+        self._entries[canonical_url] = (
+            self.clock() + ttl,
+            category,
+            status if isinstance(status, int) else None,
+        )
+        self._entries.move_to_end(canonical_url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def raise_if_recent(self, canonical_url: str) -> None:
+        entry = self._entries.get(canonical_url)
+        if entry is None:
+            return
+        expires_at, category, status = entry
+        if expires_at <= self.clock():
+            self._entries.pop(canonical_url, None)
+            return
+        self.hits += 1
+        raise RecentFailureError(category, status)
+
+    def forget(self, canonical_url: str) -> bool:
+        return self._entries.pop(canonical_url, None) is not None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class PayloadCache:
+    """Share validated source payloads between identical link conversions."""
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: Mapping[str, float] = PLATFORM_TTL_SECONDS,
+        default_ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS,
+        failure_ttl_seconds: Mapping[str, float] = FAILURE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl_seconds = dict(ttl_seconds)
+        self.default_ttl_seconds = default_ttl_seconds
+        self.max_stale_seconds = max(0.0, float(max_stale_seconds))
+        self.clock = clock
+        self._entries: OrderedDict[PayloadKey, _CacheEntry] = OrderedDict()
+        self._bytes_used = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._stale_served = 0
+        self._refreshes = 0
+        self._flights: SingleFlight[Mapping[str, Any]] = SingleFlight()
+        self.failures = FailureCache(ttl_seconds=failure_ttl_seconds, clock=clock)
+        self.store: Optional[PayloadStore] = None
+        self._store_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl_for(self, service: str) -> float:
+        return self.ttl_seconds.get(service, self.default_ttl_seconds)
+
+    def get(self, key: PayloadKey) -> Optional[Mapping[str, Any]]:
+        """Return a fresh payload; expired entries count as misses."""
+        entry = self._lookup(key)
+        if entry is None or entry.expires_at <= self.clock():
+            self._misses += 1
+            return None
+        self._hits += 1
+        return entry.payload
+
+    def put(
+        self,
+        key: PayloadKey,
+        payload: Mapping[str, Any],
+        *,
+        ttl_seconds: Optional[float] = None,
+        persist: bool = True,
+    ) -> None:
+        size = estimate_payload_bytes(payload)
+        self._discard(key)
+        if size > MAX_ENTRY_BYTES or size > self.max_bytes:
+            return
+        if ttl_seconds is None:
+            ttl_seconds = self.ttl_for(key.service)
+        if ttl_seconds + self.max_stale_seconds <= 0:
+            return
+        if persist and self.store is not None:
+            self.store.save(key, payload, ttl_seconds)
+        expires_at = self.clock() + ttl_seconds
+        self._entries[key] = _CacheEntry(
+            payload=payload,
+            size=size,
+            expires_at=expires_at,
+            stale_until=expires_at + self.max_stale_seconds,
+        )
+        self._bytes_used += size
+        while self._bytes_used > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self._evictions += 1
+
+    def invalidate(self, canonical_url: str, *, service: Optional[str] = None) -> int:
+        """Drop every language, mode, and quality variant of one source post."""
+        stale = [
+            key
+            for key in self._entries
+            if key.canonical_url == canonical_url
+            and (service is None or key.service == service)
+        ]
+        for key in stale:
+            self._discard(key)
+        self.failures.forget(canonical_url)
+        if self.store is not None:
+            self.store.forget(canonical_url)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes_used = 0
+        self.failures.clear()
+
+    async def get_or_fetch(
+        self,
+        key: PayloadKey,
+        fetch: Callable[[], Awaitable[Mapping[str, Any]]],
+    ) -> Mapping[str, Any]:
+        """Serve a fresh entry or join the one in-flight fetch for this key.
+
+        An expired entry still inside the hard-stale ceiling is returned
+        immediately while a background fetch refreshes it. Raises
+        ``RecentFailureError`` without fetching when the same post failed
+        within its failure category's negative-cache window.
+        """
+        entry = self._lookup(key)
+        if entry is None and self.store is not None and key not in self._flights:
+            stored = await self.store.load(key)
+            if stored is not None:
+                self._store_hits += 1
+                self.put(key, stored.payload, ttl_seconds=stored.ttl_remaining, persist=False)
+                entry = self._lookup(key)
+        if entry is not None:
+            if self.store is not None:
+                self.store.touch(key)
+            if entry.expires_at > self.clock():
+                self._hits += 1
+                return entry.payload
+            self._stale_served += 1
+            self._revalidate(key, fetch)
+            return entry.payload
+        self._misses += 1
+        self.failures.raise_if_recent(key.canonical_url)
+        return await self._flights.run(
+            key,
+            lambda: self._fetch_and_store(key, fetch),
+        )
+
+    def attach_store(self, store: Optional[PayloadStore]) -> None:
+        self.store = store
+
+    async def warm(self, limit: int = DEFAULT_WARM_ENTRIES) -> int:
+        """Load the most recently used persisted entries into memory."""
+        if self.store is None:
+            return 0
+        rows = await self.store.load_recent(limit, max_stale_seconds=self.max_stale_seconds)
+        # Oldest first, so the most recently used rows end up least likely
+        # to be evicted when the memory budget is smaller than the warm set.
+        loaded = 0
+        for row in reversed(rows):
+            if len(row.key) != len(PayloadKey._fields):
+                continue
+            self.put(
+                PayloadKey(*row.key),
+                row.payload,
+                ttl_seconds=row.ttl_remaining,
+                persist=False,
+            )
+            loaded += 1
+        return loaded
+
+    def _revalidate(
+        self,
+        key: PayloadKey,
+        fetch: Callable[[], Awaitable[Mapping[str, Any]]],
+    ) -> None:
+        if key in self._flights:
+            return
+        try:
+            self.failures.raise_if_recent(key.canonical_url)
+        except RecentFailureError:
+            return
+        self._refreshes += 1
+        # The flight keeps the task referenced and observes its error; the
+        # stale payload keeps serving until a refresh lands or it ages out.
+        self._flights.start(key, lambda: self._fetch_and_store(key, fetch))
+
+    async def _fetch_and_store(
+        self,
+        key: PayloadKey,
+        fetch: Callable[[], Awaitable[Mapping[str, Any]]],
+    ) -> Mapping[str, Any]:
+        try:
+            payload = await fetch()
+        except Exception as error:
+            if source_is_gone(error):
+                # Deleted or unrenderable posts must not keep serving stale
+                # cards in any language, mode, or quality variant.
+                self.invalidate(key.canonical_url, service=key.service)
+            self.failures.record(key.canonical_url, error)
+            raise
+        self.failures.forget(key.canonical_url)
+        self.put(key, payload)
+        return payload
+
+    def snapshot(self) -> PayloadCacheSnapshot:
+        return PayloadCacheSnapshot(
+            entries=len(self._entries),
+            bytes_used=self._bytes_used,
+            max_bytes=self.max_bytes,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            coalesced=self._flights.coalesced,
+            inflight=len(self._flights),
+            stale_served=self._stale_served,
+            refreshes=self._refreshes,
+            store_hits=self._store_hits,
+            failures_cached=len(self.failures),
+            failure_hits=self.failures.hits,
+        )
+
+    def _lookup(self, key: PayloadKey) -> Optional[_CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.stale_until <= self.clock():
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _discard(self, key: PayloadKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes_used -= entry.size
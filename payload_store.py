@@ -0,0 +1,268 @@
+"""Optional SQLite second tier that keeps card payloads across restarts."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import zlib
+from collections.abc import Callable, Mapping
+from typing import Any, NamedTuple, Optional
+
+import aiosqlite
+
+
+DEFAULT_STORE_PATH = "fixembed_cache.db"
+DEFAULT_MAX_ROWS = 20000
+DEFAULT_FLUSH_INTERVAL_SECONDS = 5
+DEFAULT_WARM_ENTRIES = 2000
+PRUNE_INTERVAL_SECONDS = 600
+
+
+class StoredPayload(NamedTuple):
+    key: tuple
+    payload: Mapping[str, Any]
+    ttl_remaining: float
+
+
+def encode_payload(payload: Mapping[str, Any]) -> Optional[bytes]:
+    """Compress compact JSON; payloads that are not plain JSON stay memory-only."""
+    try:
+        encoded = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+    return zlib.compress(encoded.encode("utf-8"))
+
+
+def decode_payload(blob: bytes) -> Optional[Mapping[str, Any]]:
+    try:
+        payload = json.loads(zlib.decompress(blob).decode("utf-8"))
+    except (zlib.error, UnicodeDecodeError, ValueError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def _cache_key(key: tuple) -> str:
+    return json.dumps(list(key), separators=(",", ":"))
+
+
+def _decode_key(value: str) -> Optional[tuple]:
+    try:
+        parts = json.loads(value)
+    except ValueError:
+        return None
+    return tuple(parts) if isinstance(parts, list) else None
+
+
+async def init_payload_store(db) -> None:
+    await db.execute(
+        """CREATE TABLE IF NOT EXISTS card_payloads (
+            cache_key TEXT PRIMARY KEY,
+            canonical_url TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )"""
+    )
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS card_payloads_last_used "
+        "ON card_payloads (last_used)"
+    )
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS card_payloads_canonical_url "
+        "ON card_payloads (canonical_url)"
+    )
+    await db.commit()
+
+
+class PayloadStore:
+    """Persist payload-cache writes in batches and serve them back on misses.
+
+    Writes are buffered in memory and flushed by ``run`` so conversions never
+    wait on disk; expiry is stored as wall-clock time so it survives restarts.
+    """
+
+    def __init__(
+        self,
+        db,
+        *,
+        max_rows: int = DEFAULT_MAX_ROWS,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self.db = db
+        self.max_rows = max(1, int(max_rows))
+        self.wall_clock = wall_clock
+        self._pending: dict[str, tuple[str, bytes, float]] = {}
+        self._touched: set[str] = set()
+        self._forgotten: set[str] = set()
+        self.loads = 0
+        self.writes = 0
+        self.errors = 0
+
+    @classmethod
+    async def open(cls, path: str = DEFAULT_STORE_PATH, **options: Any) -> PayloadStore:
+        db = await aiosqlite.connect(path)
+        await init_payload_store(db)
+        return cls(db, **options)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending) + len(self._touched) + len(self._forgotten)
+
+    def save(self, key: tuple, payload: Mapping[str, Any], ttl_seconds: float) -> None:
+        blob = encode_payload(payload)
+        if blob is None:
+            return
+        self._pending[_cache_key(key)] = (
+            str(key[1]),
+            blob,
+            self.wall_clock() + ttl_seconds,
+        )
+
+    def touch(self, key: tuple) -> None:
+        self._touched.add(_cache_key(key))
+
+    def forget(self, canonical_url: str) -> None:
+        self._pending = {
+            cache_key: row
+            for cache_key, row in self._pending.items()
+            if row[0] != canonical_url
+        }
+        self._forgotten.add(canonical_url)
+
+    async def load(self, key: tuple) -> Optional[StoredPayload]:
+        cache_key = _cache_key(key)
+        pending = self._pending.get(cache_key)
+        if pending is not None:
+            row = (pending[1], pending[2])
+        elif str(key[1]) in self._forgotten:
+            # The DELETE is still buffered; the old row must not come back.
+            return None
+        else:
+            try:
+                cursor = await self.db.execute(
+                    "SELECT payload, expires_at FROM card_payloads WHERE cache_key = ?",
+                    (cache_key,),
+                )
+                row = await cursor.fetchone()
+            except sqlite3.Error:
+                self.errors += 1
+                logging.warning("payload_store_load_failed")
+                return None
+        if row is None:
+            return None
+        payload = decode_payload(row[0])
+        if payload is None:
+            return None
+        self.loads += 1
+        self._touched.add(cache_key)
+        return StoredPayload(key, payload, float(row[1]) - self.wall_clock())
+
+    async def load_recent(
+        self,
+        limit: int = DEFAULT_WARM_ENTRIES,
+        *,
+        max_stale_seconds: float = 0,
+    ) -> list[StoredPayload]:
+        """Return the most recently used rows that are still servable."""
+        now = self.wall_clock()
+        try:
+            cursor = await self.db.execute(
+                """SELECT cache_key, payload, expires_at FROM card_payloads
+                WHERE expires_at > ? ORDER BY last_used DESC LIMIT ?""",
+                (now - max_stale_seconds, max(0, int(limit))),
+            )
+            rows = await cursor.fetchall()
+        except sqlite3.Error:
+            self.errors += 1
+            logging.warning("payload_store_warm_load_failed")
+            return []
+        result = []
+        for cache_key, blob, expires_at in rows:
+            key = _decode_key(cache_key)
+            payload = decode_payload(blob)
+            if key is not None and payload is not None:
+                result.append(StoredPayload(key, payload, float(expires_at) - now))
+        return result
+
+    async def flush(self) -> int:
+        """Write buffered saves, touches, and deletions in one transaction."""
+        pending, self._pending = self._pending, {}
+        touched, self._touched = self._touched, set()
+        forgotten, self._forgotten = self._forgotten, set()
+        if not (pending or touched or forgotten):
+            return 0
+        now = self.wall_clock()
+        try:
+            if forgotten:
+                await self.db.executemany(
+                    "DELETE FROM card_payloads WHERE canonical_url = ?",
+                    [(canonical_url,) for canonical_url in forgotten],
+                )
+            if pending:
+                await self.db.executemany(
+                    """INSERT INTO card_payloads (
+                        cache_key, canonical_url, payload, expires_at, last_used
+                    ) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(cache_key) DO UPDATE SET
+                        payload = excluded.payload,
+                        expires_at = excluded.expires_at,
+                        last_used = excluded.last_used""",
+                    [
+                        (cache_key, canonical_url, blob, expires_at, now)
+                        for cache_key, (canonical_url, blob, expires_at) in pending.items()
+                    ],
+                )
+            touched.difference_update(pending)
+            if touched:
+                await self.db.executemany(
+                    "UPDATE card_payloads SET last_used = ? WHERE cache_key = ?",
+                    [(now, cache_key) for cache_key in touched],
+                )
+            await self.db.commit()
+        except sqlite3.Error:
+            self.errors += 1
+            logging.warning("payload_store_flush_failed rows=%s", len(pending))
+            return 0
+        self.writes += len(pending)
+        return len(pending)
+
+    async def prune(self, *, max_stale_seconds: float = 0) -> None:
+        """Drop rows past their stale ceiling and the least recently used excess."""
+        try:
+            await self.db.execute(
+                "DELETE FROM card_payloads WHERE expires_at <= ?",
+                (self.wall_clock() - max_stale_seconds,),
+            )
+            await self.db.execute(
+                """DELETE FROM card_payloads WHERE cache_key NOT IN (
+                    SELECT cache_key FROM card_payloads
+                    ORDER BY last_used DESC LIMIT ?
+                )""",
+                (self.max_rows,),
+            )
+            await self.db.commit()
+        except sqlite3.Error:
+            self.errors += 1
+            logging.warning("payload_store_prune_failed")
+
+    async def run(
+        self,
+        *,
+        interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        max_stale_seconds: float = 0,
+    ) -> None:
+        """Flush periodically until cancelled, pruning every few minutes."""
+        last_prune = time.monotonic()
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.flush()
+            if time.monotonic() - last_prune >= PRUNE_INTERVAL_SECONDS:
+                await self.prune(max_stale_seconds=max_stale_seconds)
+                last_prune = time.monotonic()
+
+    async def close(self) -> None:
+        await self.flush()
+        await self.db.close()
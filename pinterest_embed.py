@@ -5,10 +5,10 @@ from __future__ import annotations
 from typing import Any, Mapping, Optional
 from urllib.parse import quote
 
-import aiohttp
 import discord
 
 from embed_footer import FooterBranding, build_component_footer, translated_source_name
+from http_client import http_session
 from card_preferences import CardPreferences, apply_caption_preferences
 from timestamp_utils import parse_post_timestamp
 
@@ -105,15 +105,14 @@ def build_pinterest_layout(
     return view
 
 
-async def _fetch_pinterest_payload(
+async def fetch_pinterest_payload(
     source_url: str,
     translation_language: Optional[str] = None,
 ) -> Mapping[str, Any]:
     api_url = f"{FIXEMBED_API}?url={quote(source_url, safe='')}&renderer=components-v2"
     if translation_language:
         api_url += f"&lang={quote(translation_language, safe='')}"
-    timeout = aiohttp.ClientTimeout(total=15)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async with http_session("metadata") as session:
         async with session.get(api_url) as response:
             response.raise_for_status()
             body = await response.json()
@@ -130,5 +129,5 @@ async def fetch_pinterest_layout(
     *,
     translation_language: Optional[str] = None,
 ) -> discord.ui.LayoutView:
-    payload = await _fetch_pinterest_payload(source_url, translation_language)
+    payload = await fetch_pinterest_payload(source_url, translation_language)
     return build_pinterest_layout(payload, converted_url, footer_branding, card_preferences)
@@ -13,6 +13,7 @@ import discord
 
 from component_emojis import format_component_stats
 from embed_footer import FooterBranding, build_component_footer, translated_source_name
+from http_client import http_session
 from card_preferences import CardPreferences, apply_caption_preferences
 from timestamp_utils import parse_post_timestamp
 from pixiv_relay import PixivRelayService, UpstreamResponseError
@@ -281,7 +282,7 @@ def build_pixiv_layout(
     return view
 
 
-async def _fetch_pixiv_payload(
+async def fetch_pixiv_payload(
     source_url: str,
     translation_language: Optional[str] = None,
 ) -> Mapping[str, Any]:
@@ -304,8 +305,7 @@ async def _fetch_pixiv_payload(
     )
     if translation_language:
         api_url = f"{api_url}&lang={quote(translation_language, safe='')}"
-    timeout = aiohttp.ClientTimeout(total=15)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async with http_session("metadata") as session:
         async with session.get(api_url) as response:
             response.raise_for_status()
             body = await response.json()
@@ -358,7 +358,7 @@ async def fetch_pixiv_layout(
 ) -> discord.ui.LayoutView:
     """Fetch first-party metadata and return a Pixiv Components V2 card."""
     return build_pixiv_layout(
-        await _fetch_pixiv_payload(source_url, translation_language),
+        await fetch_pixiv_payload(source_url, translation_language),
         converted_url,
         footer_branding,
         card_preferences,
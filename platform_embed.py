@@ -6,12 +6,12 @@ from dataclasses import dataclass
 from typing import Any, Mapping, Optional
 from urllib.parse import urlencode
 
-import aiohttp
 import discord
 
 from card_preferences import CardPreferences, apply_caption_preferences
 from component_emojis import format_component_stats
 from embed_footer import FooterBranding, build_component_footer, translated_source_name
+from http_client import http_session
 from timestamp_utils import parse_post_timestamp
 
 
@@ -166,8 +166,7 @@ async def fetch_platform_payload(
     if language:
         query_params["lang"] = language
     query = urlencode(query_params)
-    timeout = aiohttp.ClientTimeout(total=15)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async with http_session("metadata") as session:
         async with session.get(f"{FIXEMBED_API}?{query}") as response:
             response.raise_for_status()
             body = await response.json()
@@ -0,0 +1,154 @@
+"""In-memory index of guilds holding an active Premium entitlement."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import AsyncIterable, Callable
+from typing import Optional
+
+
+DEFAULT_REFRESH_INTERVAL_SECONDS = 1800
+DEFAULT_RETRY_SECONDS = 30
+
+
+def _ends_at(entitlement) -> float:
+    ends_at = getattr(entitlement, "ends_at", None)
+    return math.inf if ends_at is None else ends_at.timestamp()
+
+
+class PremiumEntitlementIndex:
+    """Answer Premium lookups from memory instead of the entitlements API.
+
+    A full scan seeds the index, entitlement events keep it current, and
+    each entitlement's ``ends_at`` lapses on its own at lookup time.
+    Events that arrive while a scan is paging are replayed over its
+    result so the swap cannot resurrect or drop a just-changed grant.
+    Until a scan succeeds, ``load_guild`` fills in guilds one at a time.
+    """
+
+    def __init__(
+        self,
+        sku_id: Optional[int] = None,
+        *,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.sku_id = sku_id
+        self.clock = clock
+        self._guilds: dict[int, dict[int, float]] = {}
+        self._journal: Optional[list[tuple[object, bool]]] = None
+        self.loaded = False
+        self.refreshed_at: Optional[float] = None
+        self._checked: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    def knows(self, guild_id: int) -> bool:
+        """Whether ``is_premium`` is authoritative for this guild."""
+        return self.loaded or guild_id in self._checked
+
+    async def load_guild(self, guild_id: int, entitlements: AsyncIterable) -> bool:
+        """Apply one guild's entitlements before the first full scan."""
+        async for entitlement in entitlements:
+            self.apply(entitlement)
+        self._checked.add(guild_id)
+        return self.is_premium(guild_id)
+
+    def is_premium(self, guild_id: int) -> bool:
+        grants = self._guilds.get(guild_id)
+        if not grants:
+            return False
+        now = self.clock()
+        for entitlement_id, ends_at in list(grants.items()):
+            if ends_at <= now:
+                del grants[entitlement_id]
+        if not grants:
+            del self._guilds[guild_id]
+            return False
+        return True
+
+    def apply(self, entitlement, *, active: Optional[bool] = None) -> Optional[bool]:
+        """Record one entitlement event; return the guild's Premium state.
+
+        Returns None for entitlements that are not guild grants of the
+        Premium SKU.
+        """
+        if not self._tracks(entitlement):
+            return None
+        if active is None:
+            active = not getattr(entitlement, "deleted", False)
+        if self._journal is not None:
+            self._journal.append((entitlement, active))
+        self._record(self._guilds, entitlement, active)
+        return self.is_premium(int(entitlement.guild_id))
+
+    async def refresh(self, entitlements: AsyncIterable) -> int:
+        """Rebuild from a full scan; return the number of Premium guilds."""
+        self._journal = []
+        try:
+            guilds: dict[int, dict[int, float]] = {}
+            async for entitlement in entitlements:
+                if self._tracks(entitlement):
+                    self._record(
+                        guilds,
+                        entitlement,
+                        not getattr(entitlement, "deleted", False),
+                    )
+            for entitlement, active in self._journal:
+                self._record(guilds, entitlement, active)
+        finally:
+            self._journal = None
+        self._guilds = guilds
+        self.loaded = True
+        self._checked.clear()
+        self.refreshed_at = self.clock()
+        return len(guilds)
+
+    async def run(
+        self,
+        scan: Callable[[], AsyncIterable],
+        *,
+        interval_seconds: float = DEFAULT_REFRESH_INTERVAL_SECONDS,
+        retry_seconds: float = DEFAULT_RETRY_SECONDS,
+    ) -> None:
+        """Rescan periodically until cancelled to catch missed events.
+
+        Until a scan has succeeded, the first one runs immediately and
+        failures retry with doubling backoff capped at ``interval_seconds``.
+        """
+        delay = interval_seconds if self.loaded else 0
+        retry_delay = retry_seconds
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                guilds = await self.refresh(scan())
+            except Exception as error:
+                logging.exception("premium_entitlements_refresh_failed error=%s", error)
+                if self.loaded:
+                    delay = interval_seconds
+                else:
+                    delay = retry_delay
+                    retry_delay = min(retry_delay * 2, interval_seconds)
+            else:
+                logging.info("premium_entitlements_refreshed guilds=%s", guilds)
+                delay = interval_seconds
+
+    def _tracks(self, entitlement) -> bool:
+        if getattr(entitlement, "guild_id", None) is None:
+            return False
+        return self.sku_id is None or int(entitlement.sku_id) == int(self.sku_id)
+
+    def _record(self, guilds, entitlement, active: bool) -> None:
+        guild_id = int(entitlement.guild_id)
+        grants = guilds.get(guild_id, {})
+        ends_at = _ends_at(entitlement)
+        if active and ends_at > self.clock():
+            grants[int(entitlement.id)] = ends_at
+            guilds[guild_id] = grants
+            return
+        grants.pop(int(entitlement.id), None)
+        if not grants:
+            guilds.pop(guild_id, None)
@@ -0,0 +1,68 @@
+"""Micro-benchmark extract_supported_links on realistic message text.
+
+Reports a cold pass (memo cleared before every message, so each URL is
+parsed and canonicalized) and a warm pass (memo kept, as when a viral link
+is reposted across channels).
+Run from the repository root: python scripts/benchmark_link_extraction.py
+"""
+
+import argparse
+from pathlib import Path
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import link_utils  # noqa: E402
+from link_utils import extract_supported_links  # noqa: E402
+
+
+MESSAGES = (
+    "lmao https://x.com/fixembed/status/1790000000000000000",
+    "https://twitter.com/someone/status/1780000000000000000/photo/1 this one",
+    "check https://www.instagram.com/reel/C8abcdEFGh/?igsh=MWd2 and https://www.instagram.com/p/C7zyxWVuTs/",
+    "https://www.reddit.com/r/python/comments/1abcde/asyncio_tips/?utm_source=share",
+    "art dump https://www.pixiv.net/en/artworks/119000000 https://bsky.app/profile/a.bsky.social/post/3kabc",
+    "https://www.tiktok.com/@creator/video/7350000000000000000?is_from_webapp=1",
+    "clip of the night https://clips.twitch.tv/FunnyClipSlug-abc123",
+    "https://staff.tumblr.com/post/745000000000000000/hello-tumblr",
+    "<https://www.youtube.com/post/UgkxAbCdEf> suppressed on purpose",
+    "already fixed https://fxtwitter.com/someone/status/1770000000000000000",
+    "docs: https://docs.python.org/3/library/urllib.parse.html",
+    "new piece! https://www.deviantart.com/artist/art/Sunset-Study-1000000000",
+    "https://fixembed.app/embed?url=https%3A%2F%2Fx.com%2Fa%2Fstatus%2F1&v=154",
+    "no links here, just vibes",
+)
+
+
+def build_corpus(size, seed):
+    rng = random.Random(seed)
+    return [rng.choice(MESSAGES) for _ in range(size)]
+
+
+def run(corpus, *, cold):
+    started = time.perf_counter()
+    for text in corpus:
+        if cold:
+            link_utils._resolve_link.cache_clear()
+        extract_supported_links(text, include_preconverted=False, include_fixembed=False)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.messages, args.seed)
+    for label, cold in (("cold", True), ("warm", False)):
+        link_utils._resolve_link.cache_clear()
+        best = min(run(corpus, cold=cold) for _ in range(args.repeat))
+        print(f"{label}: {best / len(corpus) * 1e6:8.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
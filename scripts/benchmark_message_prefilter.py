@@ -0,0 +1,131 @@
+"""Compare per-message CPU cost of on_message's link-free rejection path.
+
+"before" replays the guild work on_message did for every message before it
+looked for links; "after" runs the substring and host pre-filter first.
+Run from the repository root: python scripts/benchmark_message_prefilter.py
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from card_preferences import preferences_from_settings  # noqa: E402
+from embed_footer import FooterBranding  # noqa: E402
+from link_utils import extract_supported_links, may_contain_supported_link  # noqa: E402
+from premium_controls import should_skip_automatic  # noqa: E402
+
+
+CHAT_LINES = (
+    "gm everyone",
+    "who is up for raids tonight? bring potions this time",
+    "lol that's exactly what happened last week",
+    "can someone pin the schedule for saturday",
+    "the patch notes are out, the new map looks great",
+    "brb dinner",
+    "docs are at https://docs.python.org/3/library/asyncio.html if anyone needs them",
+    "new commission sheet is up, DM me for slots!",
+)
+LINK_LINES = (
+    "look at this https://x.com/fixembed/status/1790000000000000000",
+    "https://www.instagram.com/p/C8abcdEFGh/ so good",
+    "https://www.reddit.com/r/python/comments/1abcde/asyncio_tips/",
+    "art dump https://www.pixiv.net/en/artworks/119000000 https://bsky.app/profile/a.bsky.social/post/3kabc",
+)
+SETTINGS = {
+    "enabled_services": ["Twitter", "Instagram", "Reddit", "Pixiv", "Bluesky"],
+    "mention_users": True,
+    "delete_original": True,
+    "delivery_mode": "suppress",
+    "media_quality": "balanced",
+    "card_show_stats": True,
+    "card_caption_mode": "full",
+    "ignored_user_ids": [1, 2, 3],
+    "ignored_role_ids": [4, 5],
+    "footer_branding_enabled": True,
+}
+
+
+def build_corpus(size, link_share, seed):
+    rng = random.Random(seed)
+    return [
+        rng.choice(LINK_LINES) if rng.random() < link_share else rng.choice(CHAT_LINES)
+        for _ in range(size)
+    ]
+
+
+def make_message(content):
+    author = SimpleNamespace(id=42, bot=False, roles=[SimpleNamespace(id=9)])
+    return SimpleNamespace(content=content, author=author)
+
+
+async def cached_premium_lookup(guild_id):
+    return bool(guild_id)
+
+
+async def guild_work(message):
+    settings = SETTINGS
+    settings.get("enabled_services")
+    settings.get("mention_users", True)
+    settings.get("delete_original", True)
+    settings.get("delivery_mode", "suppress")
+    settings.get("media_quality", "balanced")
+    premium = await cached_premium_lookup(1)
+    if should_skip_automatic(message, settings, premium=premium):
+        return []
+    FooterBranding(name="Guild", emoji="")
+    preferences_from_settings(settings, premium=premium)
+    return extract_supported_links(
+        message.content,
+        include_preconverted=False,
+        include_fixembed=False,
+    )
+
+
+async def before(messages):
+    for message in messages:
+        await guild_work(message)
+
+
+async def after(messages):
+    for message in messages:
+        if not may_contain_supported_link(message.content):
+            continue
+        await guild_work(message)
+
+
+def measure(label, runner, messages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        asyncio.run(runner(messages))
+        best = min(best, time.perf_counter() - started)
+    per_message = best / len(messages) * 1e6
+    print(f"{label:>6}: {per_message:8.2f} us/message")
+    return per_message
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--link-share", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    messages = [
+        make_message(content)
+        for content in build_corpus(args.messages, args.link_share, args.seed)
+    ]
+    baseline = measure("before", before, messages, args.repeat)
+    filtered = measure("after", after, messages, args.repeat)
+    print(f"speedup: {baseline / filtered:.1f}x at {args.link_share:.0%} link share")
+
+
+if __name__ == "__main__":
+    main()
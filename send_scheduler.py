@@ -0,0 +1,436 @@
+"""Per-channel token-bucket scheduler for outbound Discord sends."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+
+DEFAULT_SEND_WORKERS = 4
+# Discord allows five messages per five seconds in a channel.
+DEFAULT_CHANNEL_RATE = 1.0
+DEFAULT_CHANNEL_BURST = 5
+DEFAULT_GLOBAL_RATE = 25.0
+DEFAULT_GLOBAL_BURST = 25
+# Discord's bot-wide limit is 50 requests per second.
+DEFAULT_GLOBAL_RATE_CAP = 50.0
+DEFAULT_GLOBAL_RATE_FLOOR = 1.0
+DEFAULT_RATE_INCREASE = 0.1
+DEFAULT_RATE_DECREASE_FACTOR = 0.5
+DEFAULT_BACKOFF_COOLDOWN_SECONDS = 1.0
+BUCKET_PRUNE_INTERVAL_SECONDS = 60
+# discord.py logs this for every 429 it sleeps through before retrying.
+DISCORD_HTTP_LOGGER = "discord.http"
+DISCORD_RATE_LIMIT_MESSAGE = "We are being rate limited."
+PRIORITIES = ("interactive", "automatic", "background")
+DEFAULT_STARVATION_LIMIT = 8
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available; 0 when one is ready."""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self.refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.burst
+
+    def set_rate(self, rate: float, now: float) -> None:
+        self.refill(now)
+        self.rate = float(rate)
+
+
+class AimdRate:
+    """Additive-increase, multiplicative-decrease control of a bucket's rate.
+
+    Each successful send raises the rate by ``increase`` up to ``ceiling``;
+    a 429 or a timed-out send cuts it by ``decrease_factor`` down to ``floor``
+    and empties the bucket so the cut applies from the next send. One
+    backoff per ``cooldown_seconds`` absorbs the burst of 429s that sends
+    already in flight report together.
+    """
+
+    def __init__(
+        self,
+        bucket: TokenBucket,
+        *,
+        ceiling: float = DEFAULT_GLOBAL_RATE_CAP,
+        floor: float = DEFAULT_GLOBAL_RATE_FLOOR,
+        increase: float = DEFAULT_RATE_INCREASE,
+        decrease_factor: float = DEFAULT_RATE_DECREASE_FACTOR,
+        cooldown_seconds: float = DEFAULT_BACKOFF_COOLDOWN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bucket = bucket
+        self.ceiling = max(float(ceiling), float(floor))
+        self.floor = float(floor)
+        self.increase = float(increase)
+        self.decrease_factor = min(max(float(decrease_factor), 0.0), 1.0)
+        self.cooldown_seconds = float(cooldown_seconds)
+        self.clock = clock
+        self.backoffs = 0
+        self._last_backoff = -math.inf
+        bucket.set_rate(min(max(bucket.rate, self.floor), self.ceiling), clock())
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def succeeded(self) -> None:
+        if self.rate < self.ceiling:
+            self.bucket.set_rate(
+                min(self.ceiling, self.rate + self.increase), self.clock()
+            )
+
+    def rate_limited(self) -> None:
+        now = self.clock()
+        if now - self._last_backoff < self.cooldown_seconds:
+            return
+        self._last_backoff = now
+        self.backoffs += 1
+        self.bucket.set_rate(max(self.floor, self.rate * self.decrease_factor), now)
+        self.bucket.tokens = min(self.bucket.tokens, 0.0)
+
+
+class DiscordRateLimitSignal(logging.Handler):
+    """Report the 429s discord.py absorbs to an ``AimdRate``.
+
+    ``HTTPClient.request`` sleeps through a 429 and retries instead of
+    raising, so a rate-limited send usually ends in success or a timeout;
+    the warning it logs for each 429 is the dependable signal. Only
+    channel routes count, since those are what the scheduler paces.
+    """
+
+    def __init__(self, rate: AimdRate):
+        super().__init__(logging.WARNING)
+        self.rate = rate
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not str(record.msg).startswith(DISCORD_RATE_LIMIT_MESSAGE):
+            return
+        args = record.args if isinstance(record.args, tuple) else ()
+        if len(args) >= 2 and "/channels/" not in str(args[1]):
+            return
+        self.rate.rate_limited()
+
+
+def watch_discord_rate_limits(
+    rate: AimdRate,
+    logger: Optional[logging.Logger] = None,
+) -> DiscordRateLimitSignal:
+    handler = DiscordRateLimitSignal(rate)
+    (logger or logging.getLogger(DISCORD_HTTP_LOGGER)).addHandler(handler)
+    return handler
+
+
+@dataclass
+class _SendJob:
+    run: Callable[[], Awaitable[Any]]
+    completion: asyncio.Future
+    channel_key: Hashable
+    priority: str
+
+
+@dataclass
+class _ChannelQueue:
+    guild_key: Hashable
+    weight: float
+    jobs: deque[_SendJob]
+
+
+@dataclass
+class _GuildLane:
+    weight: float
+    channels: deque[Hashable]
+    deficit: float = 0.0
+    queued: int = 0
+
+
+@dataclass
+class _PriorityClass:
+    ready: deque[Hashable] = field(default_factory=deque)
+    lanes: dict[Hashable, _GuildLane] = field(default_factory=dict)
+    queued: int = 0
+
+
+class SendScheduler:
+    """Run queued sends on N workers under per-channel and global buckets.
+
+    Each channel is a FIFO with at most one send in flight, so messages in
+    a channel keep their order while different channels send in parallel.
+    Sends belong to a priority class (``PRIORITIES``, highest first) and
+    higher classes go first, except that after ``starvation_limit``
+    consecutive sends ahead of a waiting lower class, that class gets the
+    next slot. Within a class, guilds share workers by deficit
+    round-robin: each turn a guild earns its weight in sends, so a guild
+    pasting fifty links gets one slot per round like everyone else, and
+    channels inside a guild take turns. A worker with nothing sendable
+    sleeps until the earliest token or until new work arrives.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = DEFAULT_SEND_WORKERS,
+        channel_rate: float = DEFAULT_CHANNEL_RATE,
+        channel_burst: float = DEFAULT_CHANNEL_BURST,
+        global_rate: float = DEFAULT_GLOBAL_RATE,
+        global_burst: float = DEFAULT_GLOBAL_BURST,
+        global_rate_cap: float = DEFAULT_GLOBAL_RATE_CAP,
+        starvation_limit: int = DEFAULT_STARVATION_LIMIT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.workers = max(1, int(workers))
+        self.channel_rate = float(channel_rate)
+        self.channel_burst = float(channel_burst)
+        self.starvation_limit = max(1, int(starvation_limit))
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, global_burst, clock())
+        self.global_rate = AimdRate(
+            self.global_bucket, ceiling=global_rate_cap, clock=clock
+        )
+        self._classes = {priority: _PriorityClass() for priority in PRIORITIES}
+        self._queues: dict[tuple[str, Hashable], _ChannelQueue] = {}
+        self._in_flight: set[tuple[str, Hashable]] = set()
+        self._buckets: dict[Hashable, TokenBucket] = {}
+        self._streak = 0
+        self._last_served = PRIORITIES[0]
+        self._wake = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._last_prune = clock()
+
+    def qsize(self, priority: Optional[str] = None) -> int:
+        """Sends waiting for a worker, excluding those in flight."""
+        if priority is not None:
+            return self._classes[priority].queued
+        return sum(priority_class.queued for priority_class in self._classes.values())
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.workers)
+        ]
+
+    async def close(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def submit(
+        self,
+        channel_key: Hashable,
+        run: Callable[[], Awaitable[Any]],
+        completion: Optional[asyncio.Future] = None,
+        *,
+        guild_key: Optional[Hashable] = None,
+        weight: float = 1.0,
+        priority: str = "automatic",
+    ) -> asyncio.Future:
+        """Queue ``run`` behind earlier sends to the same channel.
+
+        ``weight`` is the guild's share of send slots per round relative to
+        other guilds; channels outside a guild form their own lane.
+        """
+        if priority not in self._classes:
+            raise ValueError(f"unknown send priority: {priority}")
+        if completion is None:
+            completion = asyncio.get_running_loop().create_future()
+        queue_key = (priority, channel_key)
+        queue = self._queues.get(queue_key)
+        if queue is None:
+            queue = self._queues[queue_key] = _ChannelQueue(
+                channel_key if guild_key is None else guild_key,
+                max(1.0, float(weight)),
+                deque(),
+            )
+            if queue_key not in self._in_flight:
+                self._mark_ready(queue_key)
+            else:
+                self._lane(priority, queue)
+        queue.jobs.append(_SendJob(run, completion, channel_key, priority))
+        self._classes[priority].lanes[queue.guild_key].queued += 1
+        self._classes[priority].queued += 1
+        self._wake.set()
+        return completion
+
+    def _lane(self, priority: str, queue: _ChannelQueue) -> _GuildLane:
+        priority_class = self._classes[priority]
+        lane = priority_class.lanes.get(queue.guild_key)
+        if lane is None:
+            lane = priority_class.lanes[queue.guild_key] = _GuildLane(
+                queue.weight, deque()
+            )
+            priority_class.ready.append(queue.guild_key)
+        lane.weight = queue.weight
+        return lane
+
+    def _mark_ready(self, queue_key: tuple[str, Hashable]) -> None:
+        priority, channel_key = queue_key
+        self._lane(priority, self._queues[queue_key]).channels.append(channel_key)
+
+    def _bucket(self, channel_key: Hashable, now: float) -> TokenBucket:
+        bucket = self._buckets.get(channel_key)
+        if bucket is None:
+            bucket = self._buckets[channel_key] = TokenBucket(
+                self.channel_rate, self.channel_burst, now
+            )
+        return bucket
+
+    def _claim_order(self) -> list[str]:
+        if self._streak < self.starvation_limit:
+            return list(PRIORITIES)
+        # Let the classes below the last one served go first once.
+        split = PRIORITIES.index(self._last_served) + 1
+        return list(PRIORITIES[split:] + PRIORITIES[:split])
+
+    def _claim(self) -> tuple[Optional[_SendJob], float]:
+        """Take the next sendable job, or report how long until one is."""
+        now = self.clock()
+        self._prune_buckets(now)
+        if not self.qsize():
+            return None, math.inf
+        global_wait = self.global_bucket.wait_time(now)
+        if global_wait > 0:
+            return None, global_wait
+        soonest = math.inf
+        for priority in self._claim_order():
+            job, wait = self._claim_from(priority, now)
+            if job is not None:
+                self.global_bucket.take(now)
+                self._record_served(priority)
+                return job, 0.0
+            soonest = min(soonest, wait)
+        return None, soonest
+
+    def _record_served(self, priority: str) -> None:
+        rank = PRIORITIES.index(priority)
+        lower_waiting = any(
+            self._classes[lower].queued for lower in PRIORITIES[rank + 1:]
+        )
+        # Counts consecutive sends that passed over a waiting lower class;
+        # while it is at the limit each passed-over class gets one slot.
+        self._streak = self._streak + 1 if lower_waiting else 0
+        self._last_served = priority
+
+    def _claim_from(self, priority: str, now: float) -> tuple[Optional[_SendJob], float]:
+        priority_class = self._classes[priority]
+        soonest = math.inf
+        for _ in range(len(priority_class.ready)):
+            guild_key = priority_class.ready[0]
+            lane = priority_class.lanes[guild_key]
+            if lane.deficit < 1:
+                lane.deficit += lane.weight
+            channel_key, wait = self._claim_channel(lane, now)
+            if channel_key is None:
+                soonest = min(soonest, wait)
+                priority_class.ready.rotate(-1)
+                continue
+            lane.deficit -= 1
+            lane.queued -= 1
+            if not lane.queued:
+                priority_class.ready.popleft()
+                del priority_class.lanes[guild_key]
+            elif lane.deficit < 1:
+                priority_class.ready.rotate(-1)
+            queue_key = (priority, channel_key)
+            queue = self._queues[queue_key]
+            job = queue.jobs.popleft()
+            if not queue.jobs:
+                del self._queues[queue_key]
+            self._in_flight.add(queue_key)
+            priority_class.queued -= 1
+            return job, 0.0
+        return None, soonest
+
+    def _claim_channel(
+        self, lane: _GuildLane, now: float
+    ) -> tuple[Optional[Hashable], float]:
+        soonest = math.inf
+        for _ in range(len(lane.channels)):
+            channel_key = lane.channels[0]
+            bucket = self._bucket(channel_key, now)
+            wait = bucket.wait_time(now)
+            if wait > 0:
+                soonest = min(soonest, wait)
+                lane.channels.rotate(-1)
+                continue
+            lane.channels.popleft()
+            bucket.take(now)
+            return channel_key, 0.0
+        return None, soonest
+
+    def _release(self, job: _SendJob) -> None:
+        queue_key = (job.priority, job.channel_key)
+        self._in_flight.discard(queue_key)
+        if queue_key in self._queues:
+            self._mark_ready(queue_key)
+            self._wake.set()
+
+    def _prune_buckets(self, now: float) -> None:
+        # A full bucket behaves exactly like a new one, so idle channels
+        # can be dropped without changing their next send.
+        if now - self._last_prune < BUCKET_PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        busy = {channel_key for _, channel_key in self._queues}
+        busy.update(channel_key for _, channel_key in self._in_flight)
+        for channel_key, bucket in list(self._buckets.items()):
+            if channel_key not in busy and bucket.is_full(now):
+                del self._buckets[channel_key]
+
+    async def _sleep(self, delay: float) -> None:
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(
+                self._wake.wait(),
+                timeout=None if math.isinf(delay) else delay,
+            )
+        except asyncio.TimeoutError:
+            pass
+
+    async def _work(self) -> None:
+        while True:
+            job, delay = self._claim()
+            if job is None:
+                await self._sleep(delay)
+                continue
+            try:
+                if not job.completion.done():
+                    result = await job.run()
+                    if not job.completion.done():
+                        job.completion.set_result(result)
+            except asyncio.CancelledError:
+                if not job.completion.done():
+                    job.completion.cancel()
+                raise
+            except Exception as error:
+                if not job.completion.done():
+                    job.completion.set_exception(error)
+            finally:
+                self._release(job)
@@ -0,0 +1,59 @@
+"""Coalesce concurrent identical upstream fetches into one shared task."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Let every concurrent caller for one key await the same upstream call."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Future[T]] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def clear(self) -> None:
+        """Forget pending calls without cancelling them (used by tests)."""
+        self._inflight.clear()
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        pending = self.start(key, fetch)
+        # A cancelled caller must not cancel the call other callers share.
+        return await asyncio.shield(pending)
+
+    def start(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[T]],
+    ) -> asyncio.Future[T]:
+        """Register the shared call now, without waiting for its result."""
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(fetch())
+            self._inflight[key] = pending
+            pending.add_done_callback(
+                lambda done, key=key: self._finished(key, done)
+            )
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return pending
+
+    def _finished(self, key: Hashable, done: asyncio.Future[T]) -> None:
+        if self._inflight.get(key) is done:
+            del self._inflight[key]
+        if not done.cancelled():
+            # Mark the error as observed even when every caller went away.
+            done.exception()
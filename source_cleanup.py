@@ -0,0 +1,148 @@
+"""Batch delete-mode source message removals into bulk deletes per channel."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import discord
+
+
+# Discord accepts 2-100 messages per bulk delete, none older than 14 days.
+BULK_DELETE_MAX_MESSAGES = 100
+BULK_DELETE_MAX_AGE_SECONDS = 14 * 24 * 60 * 60
+BULK_DELETE_AGE_MARGIN_SECONDS = 60
+DEFAULT_BATCH_WINDOW_SECONDS = 0.5
+
+ScheduleDelete = Callable[[Any, Callable[[], Awaitable[None]]], Awaitable[Any]]
+
+
+@dataclass
+class _Batch:
+    channel: Any
+    entries: list[tuple[Any, asyncio.Future]] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class SourceMessageCleaner:
+    """Collect source messages per channel and delete them together.
+
+    The first delete in a channel opens a ``window_seconds`` batch; the
+    batch flushes when the window ends or it reaches Discord's bulk limit.
+    Two or more recent messages go out as one ``delete_messages`` call,
+    anything else (or a bulk call Discord rejects for a reason other than
+    permissions) falls back to single deletes. Each caller awaits its own
+    message's result, so ``Forbidden`` and ``NotFound`` surface exactly as
+    they would from ``message.delete()``.
+
+    ``schedule(channel, flush)`` runs each flush, letting the send
+    scheduler pace deletes behind card sends; by default flushes run
+    immediately.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_seconds: float = DEFAULT_BATCH_WINDOW_SECONDS,
+        schedule: Optional[ScheduleDelete] = None,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self.window_seconds = max(0.0, float(window_seconds))
+        self.schedule = schedule
+        self.wall_clock = wall_clock
+        self._batches: dict[Hashable, _Batch] = {}
+        self._flushes: set[asyncio.Task] = set()
+        self.bulk_deletes = 0
+        self.bulk_deleted_messages = 0
+        self.single_deletes = 0
+
+    def pending(self) -> int:
+        return sum(len(batch.entries) for batch in self._batches.values())
+
+    async def delete(self, message) -> None:
+        channel = message.channel
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(channel.id)
+        if batch is None:
+            batch = self._batches[channel.id] = _Batch(channel)
+            batch.timer = loop.call_later(
+                self.window_seconds, self._flush, channel.id
+            )
+        completion = loop.create_future()
+        batch.entries.append((message, completion))
+        if len(batch.entries) >= BULK_DELETE_MAX_MESSAGES:
+            self._flush(channel.id)
+        await completion
+
+    async def close(self) -> None:
+        """Flush every open batch and wait for the deletes to finish."""
+        for channel_id in list(self._batches):
+            self._flush(channel_id)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _flush(self, channel_id: Hashable) -> None:
+        batch = self._batches.pop(channel_id, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._run(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _run(self, batch: _Batch) -> None:
+        async def flush() -> None:
+            await self._delete_batch(batch)
+
+        try:
+            if self.schedule is None:
+                await flush()
+            else:
+                await self.schedule(batch.channel, flush)
+        except Exception as error:
+            for _, completion in batch.entries:
+                if not completion.done():
+                    completion.set_exception(error)
+
+    def _bulk_eligible(self, message) -> bool:
+        created_at = getattr(message, "created_at", None)
+        if created_at is None:
+            return False
+        age = self.wall_clock() - created_at.timestamp()
+        return age < BULK_DELETE_MAX_AGE_SECONDS - BULK_DELETE_AGE_MARGIN_SECONDS
+
+    async def _delete_batch(self, batch: _Batch) -> None:
+        bulk = [entry for entry in batch.entries if self._bulk_eligible(entry[0])]
+        single = [entry for entry in batch.entries if entry not in bulk]
+        delete_messages = getattr(batch.channel, "delete_messages", None)
+        if len(bulk) >= 2 and delete_messages is not None:
+            try:
+                await delete_messages([message for message, _ in bulk])
+            except discord.Forbidden as error:
+                for _, completion in bulk:
+                    if not completion.done():
+                        completion.set_exception(error)
+            except (discord.HTTPException, discord.ClientException):
+                single = batch.entries
+            else:
+                self.bulk_deletes += 1
+                self.bulk_deleted_messages += len(bulk)
+                for _, completion in bulk:
+                    if not completion.done():
+                        completion.set_result(None)
+        else:
+            single = batch.entries
+        for message, completion in single:
+            try:
+                await message.delete()
+            except Exception as error:
+                if not completion.done():
+                    completion.set_exception(error)
+            else:
+                self.single_deletes += 1
+                if not completion.done():
+                    completion.set_result(None)
@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+
+from admission_control import (
+    AdmissionController,
+    format_admission_health,
+    sample_load,
+)
+
+
+class MutableClock:
+    def __init__(self):
+        self.value = 50.0
+
+    def __call__(self):
+        return self.value
+
+
+class AdmissionControllerTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = MutableClock()
+        self.controller = AdmissionController(
+            shed_queue_depth=100,
+            shed_p95_ms=10_000,
+            shed_loop_lag_ms=250,
+            recovery_fraction=0.4,
+            min_shed_seconds=10,
+            clock=self.clock,
+        )
+
+    def observe(self, queue_depth=0, p95_ms=0, loop_lag_ms=0):
+        self.controller.observe(
+            queue_depth=queue_depth,
+            p95_ms=p95_ms,
+            loop_lag_ms=loop_lag_ms,
+        )
+
+    def test_admits_cards_under_normal_load(self):
+        self.observe(queue_depth=99, p95_ms=9_000, loop_lag_ms=249)
+
+        self.assertTrue(self.controller.admit_cards(3))
+        self.assertEqual(self.controller.shed_links, 0)
+
+    def test_any_signal_over_threshold_sheds_and_counts_links(self):
+        self.observe(loop_lag_ms=300)
+
+        self.assertFalse(self.controller.admit_cards(2))
+        self.assertFalse(self.controller.admit_cards(1))
+        snapshot = self.controller.snapshot()
+        self.assertEqual(snapshot.reason, "loop_lag")
+        self.assertEqual(snapshot.shed_links, 3)
+        self.assertEqual(snapshot.shed_episodes, 1)
+
+    def test_latency_only_counts_while_sends_are_queued(self):
+        self.observe(queue_depth=0, p95_ms=60_000)
+        self.assertFalse(self.controller.shedding)
+
+        self.observe(queue_depth=1, p95_ms=60_000)
+        self.assertEqual(self.controller.reason, "latency")
+
+    def test_recovery_needs_hold_time_and_low_water_marks(self):
+        self.observe(queue_depth=150)
+
+        self.clock.value += 5
+        self.observe(queue_depth=0)
+        self.assertTrue(self.controller.shedding)
+
+        self.clock.value += 5
+        self.observe(queue_depth=41)
+        self.assertTrue(self.controller.shedding)
+
+        self.observe(queue_depth=40)
+        self.assertFalse(self.controller.shedding)
+        self.assertTrue(self.controller.admit_cards())
+
+    def test_format_reports_state_and_shed_count(self):
+        self.assertEqual(
+            format_admission_health(self.controller.snapshot()),
+            "**Load shedding:** Off · 0 links sent link-only in 0 episodes",
+        )
+        self.observe(queue_depth=100)
+        self.controller.admit_cards(1)
+
+        self.assertEqual(
+            format_admission_health(self.controller.snapshot()),
+            "**Load shedding:** Active (send backlog) · 1 link sent link-only in 1 episode",
+        )
+
+
+class SampleLoadTests(unittest.IsolatedAsyncioTestCase):
+    async def test_sampler_feeds_delivery_load_and_loop_lag(self):
+        controller = AdmissionController(shed_queue_depth=5)
+        sampler = asyncio.create_task(
+            sample_load(controller, lambda: (7, 120), interval_seconds=0.01)
+        )
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            sampler.cancel()
+
+        snapshot = controller.snapshot()
+        self.assertTrue(snapshot.shedding)
+        self.assertEqual(snapshot.queue_depth, 7)
+        self.assertEqual(snapshot.p95_ms, 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
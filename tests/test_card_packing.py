@@ -0,0 +1,98 @@
+import io
+import unittest
+from dataclasses import dataclass
+
+import discord
+
+from card_packing import MAX_MESSAGE_COMPONENTS, pack_cards, plan_card_packs
+
+
+@dataclass
+class Card:
+    view: discord.ui.LayoutView
+    fallback_url: str = "https://fixembed.app/x"
+    files: tuple = ()
+
+
+def card(text="caption", *, items=1, files=0):
+    children = [discord.ui.TextDisplay(text)]
+    children.extend(discord.ui.Separator() for _ in range(items - 1))
+    view = discord.ui.LayoutView(timeout=None)
+    view.add_item(discord.ui.Container(*children))
+    return Card(
+        view=view,
+        files=tuple(
+            discord.File(io.BytesIO(b"x"), filename=f"instagram-{index:02d}.jpg")
+            for index in range(1, files + 1)
+        ),
+    )
+
+
+class PlanCardPacksTests(unittest.TestCase):
+    def test_small_cards_share_one_message_in_order(self):
+        cards = [card(str(index)) for index in range(5)]
+
+        packs = plan_card_packs(cards)
+
+        self.assertEqual(packs, [cards])
+
+    def test_component_limit_starts_a_new_message(self):
+        # Each card is a container plus 15 children.
+        cards = [card(items=15) for _ in range(3)]
+
+        packs = plan_card_packs(cards)
+
+        self.assertEqual([len(pack) for pack in packs], [2, 1])
+        for pack in packs:
+            self.assertLessEqual(
+                sum(item.view.total_children_count for item in pack),
+                MAX_MESSAGE_COMPONENTS,
+            )
+
+    def test_text_limit_starts_a_new_message(self):
+        cards = [card("x" * 1500) for _ in range(3)]
+
+        self.assertEqual([len(pack) for pack in plan_card_packs(cards)], [2, 1])
+
+    def test_only_one_card_with_attachments_per_message(self):
+        cards = [card(files=3), card(), card(files=2), card()]
+
+        packs = plan_card_packs(cards)
+
+        self.assertEqual([len(pack) for pack in packs], [2, 2])
+
+
+class PackCardsTests(unittest.TestCase):
+    def test_merged_view_keeps_every_container_and_file(self):
+        cards = [card("first", files=2), card("second")]
+
+        (pack,) = pack_cards(cards)
+
+        self.assertEqual(len(pack.view.children), 2)
+        self.assertEqual(pack.files, cards[0].files)
+        contents = [
+            component["components"][0]["content"]
+            for component in pack.view.to_components()
+        ]
+        self.assertEqual(contents, ["first", "second"])
+        # The original views stay intact for the per-card fallback.
+        for original in cards:
+            (container,) = original.view.children
+            self.assertIs(container.view, original.view)
+            self.assertTrue(all(child.view is original.view for child in container.children))
+            self.assertNotIn(container, pack.view.children)
+        self.assertEqual(
+            cards[1].view.to_components()[0]["components"][0]["content"],
+            "second",
+        )
+
+    def test_single_card_reuses_its_own_view(self):
+        only = card()
+
+        (pack,) = pack_cards([only])
+
+        self.assertIs(pack.view, only.view)
+
+
+if __name__ == "__main__":
+    unittest.main()
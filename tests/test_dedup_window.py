@@ -0,0 +1,89 @@
+import unittest
+
+from dedup_window import DedupWindow, format_dedup_health
+
+
+class MutableClock:
+    def __init__(self):
+        self.value = 1000.0
+
+    def __call__(self):
+        return self.value
+
+
+KEY = (123, "https://x.com/fixembed/status/1")
+
+
+class DedupWindowTests(unittest.TestCase):
+    def test_marked_keys_are_seen_for_exactly_the_window(self):
+        clock = MutableClock()
+        window = DedupWindow(10, clock=clock)
+
+        self.assertFalse(window.seen(KEY))
+        window.mark(KEY)
+        clock.value += 9.9
+        self.assertTrue(window.seen(KEY))
+        clock.value += 0.1
+        self.assertFalse(window.seen(KEY))
+
+        snapshot = window.snapshot()
+        self.assertEqual((snapshot.hits, snapshot.misses), (1, 2))
+
+    def test_expired_entries_are_dropped_as_the_wheel_turns(self):
+        clock = MutableClock()
+        window = DedupWindow(10, clock=clock)
+        for index in range(100):
+            window.mark((1, index))
+
+        clock.value += 12
+        window.mark((2, "fresh"))
+
+        self.assertEqual(len(window), 1)
+
+    def test_long_idle_periods_clear_the_whole_wheel(self):
+        clock = MutableClock()
+        window = DedupWindow(10, clock=clock)
+        window.mark(KEY)
+
+        clock.value += 3600
+
+        self.assertEqual(window.snapshot().entries, 0)
+
+    def test_remarking_extends_the_window_without_duplicating_entries(self):
+        clock = MutableClock()
+        window = DedupWindow(10, clock=clock)
+        window.mark(KEY)
+        clock.value += 8
+        window.mark(KEY)
+        clock.value += 8
+
+        self.assertTrue(window.seen(KEY))
+        self.assertEqual(len(window), 1)
+
+    def test_hard_cap_evicts_the_oldest_entries_first(self):
+        clock = MutableClock()
+        window = DedupWindow(10, max_entries=2, clock=clock)
+        window.mark("oldest")
+        clock.value += 1
+        window.mark("middle")
+        window.mark("newest")
+
+        self.assertFalse(window.seen("oldest"))
+        self.assertTrue(window.seen("middle"))
+        self.assertTrue(window.seen("newest"))
+        self.assertEqual(window.snapshot().evictions, 1)
+
+    def test_health_line_reports_size_and_hits(self):
+        clock = MutableClock()
+        window = DedupWindow(10, max_entries=5, clock=clock)
+        window.mark(KEY)
+        window.seen(KEY)
+
+        self.assertEqual(
+            format_dedup_health(window.snapshot()),
+            "**Recent-link dedup:** 1/5 tracked · 1 duplicates skipped",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
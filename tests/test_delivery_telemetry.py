@@ -121,6 +121,106 @@ class DeliveryTelemetryTests(unittest.IsolatedAsyncioTestCase):
         self.assertIn("**Primary delivery issue:** Rate limited", text)
         self.assertIn("Process-scoped", text)
 
+    def test_rate_limit_outcomes_drive_the_send_rate_controller(self):
+        class Controller:
+            rate = 20.0
+            ceiling = 50.0
+            backoffs = 0
+
+            def succeeded(self):
+                self.rate += 1
+
+            def rate_limited(self):
+                self.backoffs += 1
+                self.rate /= 2
+
+        class RateLimited(Exception):
+            retry_after = 3.0
+
+        controller = Controller()
+        telemetry = DeliveryTelemetry(send_rate=controller)
+        telemetry.delivered(telemetry.queued("card"))
+        telemetry.link_rescued(telemetry.queued("card"), ResponseError(429))
+        telemetry.failed(telemetry.queued("link"), RateLimited())
+        telemetry.failed(telemetry.queued("link"), ResponseError(503))
+
+        snapshot = telemetry.snapshot()
+        self.assertEqual(snapshot.send_rate, 5.25)
+        self.assertEqual(snapshot.send_rate_cap, 50.0)
+        self.assertEqual(snapshot.rate_backoffs, 2)
+        self.assertIn(
+            "**Send rate:** 5.2/s of 50/s cap · 2 rate-limit backoffs",
+            format_delivery_health(snapshot, pending=0),
+        )
+
+    def test_timed_out_sends_count_as_congestion(self):
+        class Controller:
+            rate = 20.0
+            ceiling = 50.0
+            backoffs = 0
+
+            def succeeded(self):
+                pass
+
+            def rate_limited(self):
+                self.backoffs += 1
+
+        controller = Controller()
+        telemetry = DeliveryTelemetry(send_rate=controller)
+        telemetry.link_rescued(telemetry.queued("card"), asyncio.TimeoutError())
+
+        self.assertEqual(controller.backoffs, 1)
+
+    def test_queue_wait_is_tracked_per_priority_class(self):
+        clock = MutableClock()
+        telemetry = DeliveryTelemetry(clock=clock)
+        command = telemetry.queued("card", priority="interactive")
+        automatic = telemetry.queued("card")
+        unknown = telemetry.queued("link", priority="urgent")
+
+        clock.value += 0.02
+        telemetry.started(command)
+        clock.value += 1.5
+        telemetry.started(automatic)
+        telemetry.started(automatic)
+
+        snapshot = telemetry.snapshot()
+        self.assertEqual(unknown.priority, "automatic")
+        self.assertEqual(
+            snapshot.queue_wait_p95_ms,
+            {"interactive": 20, "automatic": 1520},
+        )
+        self.assertIn(
+            "**Queue wait p95:** Commands 20ms · Automatic 1520ms",
+            format_delivery_health(snapshot, pending=1),
+        )
+
+    def test_pending_depth_is_tracked_per_guild_until_completion(self):
+        telemetry = DeliveryTelemetry()
+        raid = [telemetry.queued("card", guild_id=1) for _ in range(3)]
+        calm = telemetry.queued("link", guild_id=2)
+
+        snapshot = telemetry.snapshot()
+        self.assertEqual(telemetry.pending_for(1), 3)
+        self.assertEqual(snapshot.busy_guilds, 2)
+        self.assertEqual(snapshot.max_guild_pending, 3)
+        self.assertIn(
+            "**Fair queue:** 1 pending here · deepest 3 across 2 busy servers",
+            format_delivery_health(snapshot, pending=4, guild_pending=1),
+        )
+
+        for ticket in raid:
+            telemetry.delivered(ticket)
+        telemetry.failed(calm, ResponseError(500))
+
+        snapshot = telemetry.snapshot()
+        self.assertEqual(telemetry.pending_for(1), 0)
+        self.assertEqual(snapshot.busy_guilds, 0)
+        self.assertNotIn(
+            "Fair queue",
+            format_delivery_health(snapshot, pending=0, guild_pending=0),
+        )
+
     def test_empty_format_does_not_claim_delivery_success(self):
         text = format_delivery_health(DeliveryTelemetry().snapshot(), pending=4)
 
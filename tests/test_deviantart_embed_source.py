@@ -12,6 +12,13 @@ from deviantart_embed import (
     _read_oembed_response,
     _request_deviantart_oembed_payload,
 )
+from payload_cache import (
+    GONE_TTL_SECONDS,
+    PayloadCache,
+    PayloadKey,
+    RecentFailureError,
+    failure_ttl_seconds,
+)
 
 
 SOURCE_URL = (
@@ -146,12 +153,10 @@ class DeviantArtSourceResponseTests(unittest.IsolatedAsyncioTestCase):
 
 class DeviantArtSourceCacheTests(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
-        deviantart_embed._payload_cache.clear()
-        deviantart_embed._negative_cache.clear()
-        deviantart_embed._inflight.clear()
-        deviantart_embed._rate_limited_until = float("-inf")
+        self.cache = PayloadCache()
+        self.key = PayloadKey("DeviantArt", SOURCE_URL)
 
-    async def test_coalesces_concurrent_misses_and_caches_success(self):
+    async def test_shared_cache_coalesces_concurrent_misses_and_caches_success(self):
         release = asyncio.Event()
 
         async def request(_source_url):
@@ -159,39 +164,75 @@ class DeviantArtSourceCacheTests(unittest.IsolatedAsyncioTestCase):
             return {"title": "Lunar eclipse"}
 
         direct_request = AsyncMock(side_effect=request)
+
+        def fetch():
+            return _fetch_deviantart_oembed_payload(SOURCE_URL)
+
         with patch(
             "deviantart_embed._request_deviantart_oembed_payload",
             direct_request,
         ):
-            first = asyncio.create_task(
-                _fetch_deviantart_oembed_payload(SOURCE_URL)
-            )
-            second = asyncio.create_task(
-                _fetch_deviantart_oembed_payload(SOURCE_URL)
-            )
+            first = asyncio.create_task(self.cache.get_or_fetch(self.key, fetch))
+            second = asyncio.create_task(self.cache.get_or_fetch(self.key, fetch))
             await asyncio.sleep(0)
             release.set()
             first_payload, second_payload = await asyncio.gather(first, second)
-            cached_payload = await _fetch_deviantart_oembed_payload(SOURCE_URL)
+            cached_payload = await self.cache.get_or_fetch(self.key, fetch)
 
         direct_request.assert_awaited_once()
         self.assertIs(first_payload, second_payload)
         self.assertIs(first_payload, cached_payload)
 
-    async def test_negatively_caches_source_failures(self):
+    async def test_fetch_keeps_no_module_cache_of_its_own(self):
+        direct_request = AsyncMock(return_value={"title": "Lunar eclipse"})
+        with patch(
+            "deviantart_embed._request_deviantart_oembed_payload",
+            direct_request,
+        ):
+            await _fetch_deviantart_oembed_payload(SOURCE_URL)
+            await _fetch_deviantart_oembed_payload(SOURCE_URL)
+
+        self.assertEqual(direct_request.await_count, 2)
+
+    async def test_deleted_deviation_drops_every_cached_variant(self):
+        translated = PayloadKey("DeviantArt", SOURCE_URL, "en")
+        self.cache.put(translated, {"title": "Lunar eclipse"})
         direct_request = AsyncMock(
-            side_effect=DeviantArtSourceError("DeviantArt returned 404")
+            side_effect=DeviantArtSourceError("DeviantArt returned 404", status=404)
         )
+
+        def fetch():
+            return _fetch_deviantart_oembed_payload(SOURCE_URL)
+
         with patch(
             "deviantart_embed._request_deviantart_oembed_payload",
             direct_request,
         ):
             with self.assertRaises(DeviantArtSourceError):
-                await _fetch_deviantart_oembed_payload(SOURCE_URL)
-            with self.assertRaises(DeviantArtSourceError):
-                await _fetch_deviantart_oembed_payload(SOURCE_URL)
+                await self.cache.get_or_fetch(self.key, fetch)
+            with self.assertRaises(RecentFailureError):
+                await self.cache.get_or_fetch(translated, fetch)
 
         direct_request.assert_awaited_once()
+        self.assertIsNone(self.cache.get(translated))
+
+    def test_source_errors_carry_failure_categories(self):
+        self.assertEqual(
+            failure_ttl_seconds(DeviantArtRateLimitError(120))[0],
+            "rate_limited",
+        )
+        self.assertEqual(
+            failure_ttl_seconds(
+                DeviantArtSourceError("DeviantArt returned 404", status=404)
+            ),
+            ("upstream_4xx", GONE_TTL_SECONDS),
+        )
+        self.assertEqual(
+            failure_ttl_seconds(
+                DeviantArtSourceError("DeviantArt returned invalid metadata")
+            )[0],
+            "invalid_response",
+        )
 
 
 if __name__ == "__main__":
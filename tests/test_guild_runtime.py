@@ -0,0 +1,106 @@
+import dataclasses
+import unittest
+from types import SimpleNamespace
+
+from embed_footer import FooterBranding
+from guild_runtime import GuildRuntimeConfigs, build_guild_runtime_config
+from premium_controls import should_skip_automatic
+
+
+DEFAULT_SERVICES = ["Twitter", "Instagram", "Reddit"]
+
+
+def build(settings, *, premium=True, channel_rules=None):
+    return build_guild_runtime_config(
+        7,
+        settings,
+        premium=premium,
+        default_enabled_services=DEFAULT_SERVICES,
+        channel_rules=channel_rules or {},
+        footer_branding=FooterBranding(name="Guild"),
+    )
+
+
+def author(user_id, *role_ids):
+    return SimpleNamespace(
+        id=user_id,
+        roles=[SimpleNamespace(id=role_id) for role_id in role_ids],
+    )
+
+
+class GuildRuntimeConfigTests(unittest.TestCase):
+    def test_config_is_frozen(self):
+        config = build({})
+
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            config.delivery_mode = "delete"
+        with self.assertRaises(TypeError):
+            config.channel_rules[(1, "Twitter")] = False
+
+    def test_settings_defaults_match_on_message(self):
+        config = build({})
+
+        self.assertEqual(config.enabled_services, frozenset(DEFAULT_SERVICES))
+        self.assertTrue(config.mention_users)
+        self.assertTrue(config.delete_original)
+        self.assertEqual(config.delivery_mode, "suppress")
+        self.assertEqual(config.media_quality, "balanced")
+
+    def test_channel_rules_override_enabled_services(self):
+        config = build(
+            {"enabled_services": ["Twitter"]},
+            channel_rules={(10, "Twitter"): "off", (10, "Reddit"): "on"},
+        )
+
+        self.assertFalse(config.service_enabled(10, "Twitter"))
+        self.assertTrue(config.service_enabled(10, "Reddit"))
+        self.assertTrue(config.service_enabled(11, "Twitter"))
+        self.assertFalse(config.service_enabled(11, "Reddit"))
+
+    def test_skips_author_matches_premium_controls(self):
+        settings = {"ignored_user_ids": ["5"], "ignored_role_ids": [9]}
+        cases = [author(5), author(6, 9), author(6, 8), author(6)]
+
+        for premium in (True, False):
+            config = build(settings, premium=premium)
+            for case in cases:
+                message = SimpleNamespace(author=case)
+                self.assertEqual(
+                    config.skips_author(case),
+                    should_skip_automatic(message, settings, premium=premium),
+                )
+
+    def test_card_preferences_follow_premium_state(self):
+        settings = {"card_show_stats": False}
+
+        self.assertFalse(build(settings, premium=True).card_preferences.show_stats)
+        self.assertTrue(build(settings, premium=False).card_preferences.show_stats)
+
+
+class GuildRuntimeConfigsTests(unittest.TestCase):
+    def test_get_returns_cached_config_until_invalidated(self):
+        configs = GuildRuntimeConfigs()
+        config = configs.put(build({}))
+
+        self.assertIs(configs.get(7, premium=True), config)
+        configs.invalidate(7)
+        self.assertIsNone(configs.get(7, premium=True))
+
+    def test_premium_change_misses_the_cache(self):
+        configs = GuildRuntimeConfigs()
+        configs.put(build({}, premium=False))
+
+        self.assertIsNone(configs.get(7, premium=True))
+
+    def test_clear_drops_every_guild(self):
+        configs = GuildRuntimeConfigs()
+        configs.put(build({}))
+
+        configs.clear()
+
+        self.assertEqual(len(configs), 0)
+        self.assertEqual(configs.builds, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
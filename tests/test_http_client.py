@@ -0,0 +1,73 @@
+import unittest
+
+import aiohttp
+
+from http_client import (
+    REQUEST_PROFILES,
+    ProfiledSession,
+    SharedHttpClient,
+    request_profile,
+)
+
+
+class RecordingSession:
+    def __init__(self):
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        return "response"
+
+
+class SharedHttpClientTests(unittest.IsolatedAsyncioTestCase):
+    async def test_reuses_one_pooled_session_until_closed(self):
+        client = SharedHttpClient(max_connections_per_host=4)
+        await client.open()
+        try:
+            async with client.session("metadata") as first:
+                async with client.session("carousel") as second:
+                    self.assertIsInstance(first, ProfiledSession)
+                    self.assertIs(first._session, second._session)
+            pooled = first._session
+            await client.open()
+            self.assertIs(client._session, pooled)
+            self.assertEqual(pooled.connector.limit_per_host, 4)
+        finally:
+            await client.close()
+
+        self.assertFalse(client.is_open)
+        self.assertTrue(pooled.closed)
+        await client.close()
+
+    async def test_falls_back_to_short_lived_session_before_open(self):
+        client = SharedHttpClient()
+
+        async with client.session("video") as session:
+            self.assertIsInstance(session, aiohttp.ClientSession)
+            self.assertEqual(session.timeout.total, 60)
+
+        self.assertTrue(session.closed)
+
+    def test_profiled_requests_apply_timeout_and_merge_headers(self):
+        recording = RecordingSession()
+        session = ProfiledSession(recording, REQUEST_PROFILES["deviantart"])
+
+        session.get("https://example.test", headers={"Accept": "text/html"})
+        session.get(
+            "https://example.test/other",
+            timeout=aiohttp.ClientTimeout(total=1),
+        )
+
+        (_, _, first), (_, _, second) = recording.requests
+        self.assertEqual(first["timeout"].total, 8)
+        self.assertEqual(first["headers"]["Accept"], "text/html")
+        self.assertIn("FixEmbed", first["headers"]["User-Agent"])
+        self.assertEqual(second["timeout"].total, 1)
+
+    def test_rejects_unknown_profiles(self):
+        with self.assertRaises(ValueError):
+            request_profile("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
 import asyncio
+import tempfile
 import unittest
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
 from urllib.parse import parse_qs, urlsplit
 
@@ -14,6 +16,43 @@ from instagram_embed import (
     build_instagram_layout,
     fetch_instagram_delivery,
 )
+from media_budget import MediaBudget, MediaBudgetExhausted
+from media_cache import MediaCache
+from media_optimizer import OptimizedImage
+from media_spool import close_files, media_file
+
+
+class _ImageContent:
+    def __init__(self, body):
+        self.body = body
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+
+class _ImageResponse:
+    def __init__(self, body, content_length=None):
+        self.headers = {"Content-Type": "image/jpeg"}
+        self.content_length = content_length
+        self.content = _ImageContent(body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        return False
+
+    def raise_for_status(self):
+        return None
+
+
+class _ImageSession:
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url):
+        return self.response
 
 
 class _ProfileResponse:
@@ -319,6 +358,32 @@ class InstagramEmbedTests(unittest.TestCase):
         )
         self.assertNotIn(payload["caption"], gallery["items"][0]["description"])
 
+    def test_components_v2_delivery_attaches_spooled_downloads_without_copying(self):
+        payload = {
+            "url": "https://www.instagram.com/p/Spooled/",
+            "images": [
+                "https://scontent.example.cdninstagram.com/carousel-1.jpg",
+                "https://scontent.example.cdninstagram.com/carousel-2.png",
+            ],
+        }
+        spools = [tempfile.SpooledTemporaryFile(), tempfile.SpooledTemporaryFile()]
+        for spool in spools:
+            spool.write(b"image")
+            spool.seek(0)
+
+        delivery = build_instagram_delivery(
+            payload,
+            [(spools[0], "image/jpeg"), (spools[1], "image/png")],
+        )
+
+        self.assertEqual([file.fp for file in delivery.files], spools)
+        self.assertEqual(
+            [file.filename for file in delivery.files],
+            ["instagram-01.jpg", "instagram-02.png"],
+        )
+        close_files(delivery.files)
+        self.assertTrue(all(spool.closed for spool in spools))
+
     def test_fetch_delivery_preserves_extracted_carousel_order(self):
         image_urls = [
             f"https://scontent.example.cdninstagram.com/carousel-{index}.jpg"
@@ -337,7 +402,7 @@ class InstagramEmbedTests(unittest.TestCase):
 
         with (
             patch(
-                "instagram_embed._fetch_instagram_payload",
+                "instagram_embed.fetch_instagram_payload",
                 AsyncMock(return_value=payload),
             ),
             patch(
@@ -349,13 +414,233 @@ class InstagramEmbedTests(unittest.TestCase):
                 fetch_instagram_delivery(payload["url"])
             )
 
-        download_carousel.assert_awaited_once_with(tuple(image_urls))
+        download_carousel.assert_awaited_once_with(tuple(image_urls), None, None, None)
         gallery = delivery.layout.to_components()[0]["components"][1]
         self.assertEqual(
             [item["media"]["url"] for item in gallery["items"]],
             [f"attachment://instagram-{index:02d}.jpg" for index in range(1, 11)],
         )
 
+    def test_carousel_download_holds_its_size_in_the_media_budget_until_closed(self):
+        budget = MediaBudget(instagram_embed.INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES)
+        session = _ImageSession(_ImageResponse(b"image-bytes"))
+
+        async def download():
+            return await instagram_embed._download_instagram_image(
+                session,
+                "https://scontent.example.cdninstagram.com/carousel-1.jpg",
+                budget,
+            )
+
+        spool, content_type = asyncio.run(download())
+
+        self.assertEqual(content_type, "image/jpeg")
+        self.assertEqual(budget.used_bytes, len(b"image-bytes"))
+        close_files([media_file(spool, "instagram-01.jpg")])
+        self.assertEqual(budget.used_bytes, 0)
+
+    def test_carousel_download_reuses_cached_media_for_reposts(self):
+        budget = MediaBudget(instagram_embed.INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES)
+        cache = MediaCache()
+        source_url = "https://scontent.example.cdninstagram.com/carousel-1.jpg"
+
+        async def download_twice():
+            first = await instagram_embed._download_instagram_image(
+                _ImageSession(_ImageResponse(b"image-bytes")),
+                source_url,
+                budget,
+                cache,
+            )
+            second = await instagram_embed._download_instagram_image(
+                _ImageSession(None),
+                source_url,
+                budget,
+                cache,
+            )
+            return first, second
+
+        (spool, _), (cached, content_type) = asyncio.run(download_twice())
+
+        self.assertEqual(spool.read(), b"image-bytes")
+        self.assertEqual(cached, b"image-bytes")
+        self.assertEqual(content_type, "image/jpeg")
+        self.assertEqual(cache.snapshot().hits, 1)
+
+    def test_carousel_download_skips_caching_images_larger_than_the_cache(self):
+        cache = MediaCache(max_bytes=4)
+        source_url = "https://scontent.example.cdninstagram.com/carousel-1.jpg"
+
+        with patch.object(cache, "put", AsyncMock()) as put:
+            spool, _ = asyncio.run(
+                instagram_embed._download_instagram_image(
+                    _ImageSession(_ImageResponse(b"image-bytes")),
+                    source_url,
+                    None,
+                    cache,
+                )
+            )
+
+        put.assert_not_awaited()
+        self.assertEqual(spool.read(), b"image-bytes")
+
+    def test_carousel_download_attaches_and_caches_the_optimized_image(self):
+        budget = MediaBudget(instagram_embed.INSTAGRAM_ATTACHMENT_MAX_FILE_BYTES)
+        cache = MediaCache()
+        optimizer = SimpleNamespace(
+            enabled=True,
+            optimize=AsyncMock(
+                return_value=OptimizedImage(b"webp", "image/webp", 11, 1.0)
+            ),
+        )
+        source_url = "https://scontent.example.cdninstagram.com/carousel-1.jpg"
+
+        spool, content_type = asyncio.run(
+            instagram_embed._download_instagram_image(
+                _ImageSession(_ImageResponse(b"image-bytes")),
+                source_url,
+                budget,
+                cache,
+                optimizer,
+            )
+        )
+
+        optimizer.optimize.assert_awaited_once_with(b"image-bytes", "image/jpeg")
+        self.assertEqual((spool.read(), content_type), (b"webp", "image/webp"))
+        self.assertEqual(budget.used_bytes, len(b"webp"))
+        cached = asyncio.run(
+            cache.get(
+                instagram_embed._relay_instagram_media_url(source_url) + "#optimized"
+            )
+        )
+        self.assertEqual(cached, (b"webp", "image/webp"))
+
+    def test_unoptimized_mosaic_inputs_are_not_reused_for_optimized_reposts(self):
+        cache = MediaCache()
+        optimizer = SimpleNamespace(
+            enabled=True,
+            optimize=AsyncMock(
+                return_value=OptimizedImage(b"webp", "image/webp", 11, 1.0)
+            ),
+        )
+        source_url = "https://scontent.example.cdninstagram.com/carousel-1.jpg"
+
+        async def download_for_mosaic_then_repost():
+            await instagram_embed._download_instagram_image(
+                _ImageSession(_ImageResponse(b"image-bytes")),
+                source_url,
+                None,
+                cache,
+            )
+            return await instagram_embed._download_instagram_image(
+                _ImageSession(_ImageResponse(b"image-bytes")),
+                source_url,
+                None,
+                cache,
+                optimizer,
+            )
+
+        spool, content_type = asyncio.run(download_for_mosaic_then_repost())
+
+        optimizer.optimize.assert_awaited_once_with(b"image-bytes", "image/jpeg")
+        self.assertEqual((spool.read(), content_type), (b"webp", "image/webp"))
+
+    def test_mosaic_delivery_attaches_one_composed_grid(self):
+        payload = {
+            "url": "https://www.instagram.com/p/Mosaic/",
+            "images": [
+                f"https://scontent.example.cdninstagram.com/carousel-{index}.jpg"
+                for index in range(1, 4)
+            ],
+        }
+        downloads = tuple((f"image-{index}".encode(), "image/jpeg") for index in range(1, 4))
+        optimizer = SimpleNamespace(
+            mosaic=AsyncMock(return_value=OptimizedImage(b"grid", "image/jpeg", 21, 1.0))
+        )
+
+        with patch(
+            "instagram_embed._download_instagram_carousel",
+            AsyncMock(return_value=downloads),
+        ) as download_carousel:
+            delivery = asyncio.run(
+                instagram_embed.prepare_instagram_delivery(
+                    payload,
+                    media_optimizer=optimizer,
+                    mosaic=True,
+                )
+            )
+
+        download_carousel.assert_awaited_once_with(
+            tuple(payload["images"]), None, None, None
+        )
+        optimizer.mosaic.assert_awaited_once_with([content for content, _ in downloads])
+        self.assertEqual([file.filename for file in delivery.files], ["instagram-mosaic.jpg"])
+        gallery = delivery.layout.to_components()[0]["components"][1]
+        self.assertEqual(
+            [(item["media"]["url"], item["description"]) for item in gallery["items"]],
+            [("attachment://instagram-mosaic.jpg", "Instagram carousel of 3 images")],
+        )
+
+    def test_mosaic_falls_back_to_separate_attachments_without_a_grid(self):
+        payload = {
+            "url": "https://www.instagram.com/p/Mosaic/",
+            "images": [
+                "https://scontent.example.cdninstagram.com/carousel-1.jpg",
+                "https://scontent.example.cdninstagram.com/carousel-2.jpg",
+            ],
+        }
+        downloads = ((b"image-1", "image/jpeg"), (b"image-2", "image/jpeg"))
+        optimizer = SimpleNamespace(mosaic=AsyncMock(return_value=None))
+
+        with patch(
+            "instagram_embed._download_instagram_carousel",
+            AsyncMock(return_value=downloads),
+        ), self.assertLogs(level="INFO") as logs:
+            delivery = asyncio.run(
+                instagram_embed.prepare_instagram_delivery(
+                    payload,
+                    media_optimizer=optimizer,
+                    mosaic=True,
+                )
+            )
+
+        self.assertEqual(
+            [file.filename for file in delivery.files],
+            ["instagram-01.jpg", "instagram-02.jpg"],
+        )
+        self.assertIn("Instagram mosaic sent as separate attachments", logs.output[-1])
+
+    def test_fetch_delivery_keeps_remote_gallery_when_media_budget_is_exhausted(self):
+        payload = {
+            "url": "https://www.instagram.com/p/BudgetFull/",
+            "images": [
+                "https://scontent.example.cdninstagram.com/carousel-1.jpg",
+                "https://scontent.example.cdninstagram.com/carousel-2.jpg",
+            ],
+        }
+
+        with (
+            patch(
+                "instagram_embed.fetch_instagram_payload",
+                AsyncMock(return_value=payload),
+            ),
+            patch(
+                "instagram_embed._download_instagram_carousel",
+                AsyncMock(side_effect=MediaBudgetExhausted()),
+            ),
+        ):
+            delivery = asyncio.run(
+                fetch_instagram_delivery(payload["url"], media_budget=MediaBudget())
+            )
+
+        self.assertEqual(delivery.files, ())
+        gallery = delivery.layout.to_components()[0]["components"][1]
+        self.assertTrue(
+            all(
+                item["media"]["url"].startswith("https://fixembed.app/proxy/instagram?")
+                for item in gallery["items"]
+            )
+        )
+
     def test_fetch_delivery_preserves_single_image_remote_delivery(self):
         image_url = "https://scontent.example.cdninstagram.com/single.jpg"
         payload = {
@@ -366,7 +651,7 @@ class InstagramEmbedTests(unittest.TestCase):
 
         with (
             patch(
-                "instagram_embed._fetch_instagram_payload",
+                "instagram_embed.fetch_instagram_payload",
                 AsyncMock(return_value=payload),
             ),
             patch(
@@ -410,7 +695,7 @@ class InstagramEmbedTests(unittest.TestCase):
 
         with (
             patch(
-                "instagram_embed._fetch_instagram_payload",
+                "instagram_embed.fetch_instagram_payload",
                 AsyncMock(return_value=payload),
             ),
             patch(
@@ -0,0 +1,135 @@
+import asyncio
+import contextlib
+import unittest
+
+from link_fanout import gather_bounded, stream_bounded
+
+
+class GatherBoundedTests(unittest.IsolatedAsyncioTestCase):
+    async def test_results_follow_job_order_not_completion_order(self):
+        async def build(value, delay):
+            await asyncio.sleep(delay)
+            return value
+
+        results = await gather_bounded(
+            [
+                lambda: build("first", 0.02),
+                lambda: build("second", 0),
+                lambda: build("third", 0.01),
+            ]
+        )
+
+        self.assertEqual(results, ["first", "second", "third"])
+
+    async def test_failures_stay_in_their_own_slot(self):
+        async def fail():
+            raise ValueError("did not return metadata")
+
+        async def succeed():
+            return "card"
+
+        results = await gather_bounded([succeed, fail, succeed])
+
+        self.assertEqual(results[0], "card")
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], "card")
+
+    async def test_concurrency_never_exceeds_the_limit(self):
+        running = 0
+        peak = 0
+
+        async def build():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await gather_bounded([build] * 6, limit=2)
+
+        self.assertEqual(peak, 2)
+
+    async def test_total_latency_is_the_slowest_build_not_the_sum(self):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        await gather_bounded([lambda: asyncio.sleep(0.05)] * 4)
+
+        self.assertLess(loop.time() - started, 0.15)
+
+
+class StreamBoundedTests(unittest.IsolatedAsyncioTestCase):
+    async def test_first_result_ships_before_slower_later_builds_finish(self):
+        release = asyncio.Event()
+        shipped = []
+
+        async def slow():
+            await release.wait()
+            return "slow"
+
+        async def fast():
+            return "fast"
+
+        async with contextlib.aclosing(stream_bounded([fast, slow, fast])) as stream:
+            async for batch in stream:
+                shipped.append(batch)
+                release.set()
+
+        self.assertEqual(shipped[0], [(0, "fast")])
+        self.assertEqual(shipped[1], [(1, "slow"), (2, "fast")])
+
+    async def test_closing_early_cancels_unshipped_builds(self):
+        blocked = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def hang():
+            try:
+                await blocked.wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def fast():
+            return "fast"
+
+        async with contextlib.aclosing(stream_bounded([fast, hang])) as stream:
+            async for _ in stream:
+                break
+        await asyncio.sleep(0)
+
+        self.assertTrue(cancelled.is_set())
+
+    async def test_closing_early_discards_results_that_never_ship(self):
+        discarded = []
+
+        async def first():
+            return "first"
+
+        async def finishes_after_cancel():
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                return "late"
+
+        async def already_built():
+            return "built"
+
+        async def fail():
+            raise ValueError("did not return metadata")
+
+        async with contextlib.aclosing(
+            stream_bounded(
+                [first, finishes_after_cancel, already_built, fail],
+                discard=discarded.append,
+            )
+        ) as stream:
+            async for _ in stream:
+                await asyncio.sleep(0)
+                break
+        await asyncio.sleep(0.01)
+
+        self.assertCountEqual(discarded, ["late", "built"])
+
+
+if __name__ == "__main__":
+    unittest.main()
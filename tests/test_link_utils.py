@@ -1,6 +1,16 @@
 import unittest
 
-from link_utils import build_automatic_url, build_fixembed_url, chunk_lines, extract_supported_links, social_service
+import link_utils
+from link_utils import (
+    CANONICALIZERS,
+    SERVICE_HOSTS,
+    build_automatic_url,
+    build_fixembed_url,
+    chunk_lines,
+    extract_supported_links,
+    may_contain_supported_link,
+    social_service,
+)
 
 
 class SocialServiceTests(unittest.TestCase):
@@ -228,6 +238,20 @@ class SocialServiceTests(unittest.TestCase):
             "https://fixembed.app/embed?url=https%3A%2F%2Fx.com%2Fopenai%2Fstatus%2F456&v=154&lang=es&mode=mosaic",
         )
 
+    def test_instagram_mosaic_modifier_is_parsed_but_kept_out_of_fixembed_urls(self):
+        post, reel = extract_supported_links(
+            "https://www.instagram.com/p/ABC123/mosaic "
+            "https://www.instagram.com/reel/DEF456/mosaic"
+        )
+
+        self.assertEqual(post.mode, "mosaic")
+        self.assertEqual(post.canonical_url, "https://www.instagram.com/p/ABC123/")
+        self.assertIsNone(reel.mode)
+        self.assertEqual(
+            build_fixembed_url(post),
+            "https://fixembed.app/embed?url=https%3A%2F%2Fwww.instagram.com%2Fp%2FABC123%2F&v=154",
+        )
+
     def test_automatic_twitter_provider_can_use_fxtwitter_without_changing_manual_links(self):
         link = extract_supported_links("https://x.com/openai/status/123/fr/gallery")[0]
 
@@ -257,5 +281,76 @@ class SocialServiceTests(unittest.TestCase):
         self.assertEqual("\n".join(chunks), "\n".join(lines))
 
 
+class CanonicalizationTableTests(unittest.TestCase):
+    def test_every_service_host_has_a_canonicalizer(self):
+        self.assertEqual(set(CANONICALIZERS), set(SERVICE_HOSTS))
+
+    def test_memoized_links_keep_each_occurrence_position(self):
+        url = "https://x.com/fixembed/status/1/ja"
+        text = f"{url} and again {url}"
+
+        links = extract_supported_links(text)
+
+        self.assertEqual(
+            [(link.start, link.end) for link in links],
+            [(0, len(url)), (len(url) + 11, len(text))],
+        )
+        self.assertEqual({link.language for link in links}, {"ja"})
+
+    def test_repeated_urls_are_resolved_from_the_memo(self):
+        link_utils._resolve_link.cache_clear()
+        url = "https://www.reddit.com/r/python/comments/abc/title/"
+
+        extract_supported_links(f"{url} {url}")
+        extract_supported_links(url)
+
+        info = link_utils._resolve_link.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
+
+    def test_malformed_authorities_are_ignored_instead_of_raising(self):
+        self.assertEqual(extract_supported_links("https://[x.com/status/1"), [])
+
+
+class PrefilterTests(unittest.TestCase):
+    SUPPORTED_MESSAGES = (
+        "look https://x.com/fixembed/status/1",
+        "HTTPS://TWITTER.COM/FixEmbed/status/1/ja",
+        "Https://www.instagram.com/p/ABC123/",
+        "<https://old.reddit.com/r/python/comments/abc/title/>",
+        "https://www.pixiv.net/en/artworks/123",
+        "https://www.threads.com/@user/post/abc",
+        "https://bsky.app/profile/a.bsky.social/post/3k",
+        "https://b23.tv/BV1xx",
+        "https://www.youtube.com/post/Ugkx",
+        "https://pin.it/AbC",
+        "https://vm.tiktok.com/ZMabc/",
+        "https://staff.tumblr.com/post/123/slug",
+        "https://clips.twitch.tv/Slug-1",
+        "https://www.deviantart.com/team/art/Work-1",
+        "https://fixembed.app/embed?url=https%3A%2F%2Fx.com%2Fa%2Fstatus%2F1",
+        "already converted https://fxtwitter.com/a/status/1",
+    )
+
+    def test_accepts_every_message_with_a_supported_or_proxy_link(self):
+        for text in self.SUPPORTED_MESSAGES:
+            with self.subTest(text=text):
+                self.assertTrue(may_contain_supported_link(text))
+
+    def test_rejects_text_without_known_links(self):
+        for text in (
+            "gm everyone, who is up for raids tonight?",
+            "the docs live at https://docs.python.org/3/",
+            "mail me at someone@example.com",
+            "https://inbox.company.example/x",
+        ):
+            with self.subTest(text=text):
+                self.assertFalse(may_contain_supported_link(text))
+
+    def test_never_rejects_a_message_that_yields_links(self):
+        for text in self.SUPPORTED_MESSAGES:
+            if extract_supported_links(text, include_suppressed=True):
+                self.assertTrue(may_contain_supported_link(text))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import unittest
+
+from media_budget import (
+    MediaBudget,
+    MediaBudgetExhausted,
+    format_media_budget_health,
+)
+
+
+class MediaBudgetTests(unittest.IsolatedAsyncioTestCase):
+    async def test_reservations_within_budget_are_granted_immediately(self):
+        budget = MediaBudget(100)
+
+        first = await budget.reserve(60)
+        second = await budget.reserve(40)
+
+        self.assertEqual(budget.used_bytes, 100)
+        self.assertEqual(budget.snapshot().reservations, 2)
+        first.release()
+        second.release()
+        self.assertEqual(budget.used_bytes, 0)
+        self.assertEqual(budget.peak_bytes, 100)
+
+    async def test_waiter_is_admitted_when_bytes_are_released(self):
+        budget = MediaBudget(100, wait_seconds=1)
+        held = await budget.reserve(80)
+
+        waiting = asyncio.create_task(budget.reserve(50))
+        await asyncio.sleep(0)
+        self.assertEqual(budget.snapshot().waiting, 1)
+        held.release()
+        reservation = await waiting
+
+        self.assertEqual(reservation.nbytes, 50)
+        self.assertEqual(budget.used_bytes, 50)
+
+    async def test_shrink_returns_unused_bytes(self):
+        budget = MediaBudget(100, wait_seconds=1)
+        held = await budget.reserve(100)
+
+        waiting = asyncio.create_task(budget.reserve(30))
+        await asyncio.sleep(0)
+        held.shrink(70)
+        await waiting
+
+        self.assertEqual(budget.used_bytes, 100)
+
+    async def test_waiters_are_admitted_in_arrival_order(self):
+        budget = MediaBudget(100, wait_seconds=1)
+        held = await budget.reserve(90)
+        large = asyncio.create_task(budget.reserve(60))
+        await asyncio.sleep(0)
+
+        small = asyncio.create_task(budget.reserve(5))
+        await asyncio.sleep(0)
+        self.assertFalse(small.done())
+        held.release()
+        await asyncio.gather(large, small)
+
+        self.assertEqual(budget.used_bytes, 65)
+
+    async def test_timeout_raises_exhausted(self):
+        budget = MediaBudget(100, wait_seconds=0.01)
+        await budget.reserve(100)
+
+        with self.assertRaises(MediaBudgetExhausted):
+            await budget.reserve(1)
+
+        snapshot = budget.snapshot()
+        self.assertEqual(snapshot.exhausted, 1)
+        self.assertEqual(snapshot.waiting, 0)
+
+    async def test_abandoned_head_unblocks_smaller_waiters(self):
+        budget = MediaBudget(100, wait_seconds=1)
+        await budget.reserve(90)
+        large = asyncio.create_task(budget.reserve(60))
+        await asyncio.sleep(0)
+        small = asyncio.create_task(budget.reserve(5))
+        await asyncio.sleep(0)
+
+        large.cancel()
+        await asyncio.sleep(0)
+
+        self.assertEqual((await small).nbytes, 5)
+
+    async def test_oversized_request_is_refused(self):
+        budget = MediaBudget(100)
+
+        with self.assertRaises(MediaBudgetExhausted):
+            await budget.reserve(101)
+
+    async def test_release_is_idempotent(self):
+        budget = MediaBudget(100)
+        reservation = await budget.reserve(10)
+
+        reservation.release()
+        reservation.release()
+
+        self.assertTrue(reservation.released)
+        self.assertEqual(budget.used_bytes, 0)
+        self.assertEqual(budget.reservations, 0)
+
+    async def test_host_slot_caps_concurrent_downloads(self):
+        budget = MediaBudget(per_host_limit=2)
+
+        self.assertIs(budget.host_slot("relay"), budget.host_slot("relay"))
+        self.assertIsNot(budget.host_slot("relay"), budget.host_slot("other"))
+        async with budget.host_slot("relay"), budget.host_slot("relay"):
+            self.assertTrue(budget.host_slot("relay").locked())
+
+
+class MediaBudgetFormatTests(unittest.TestCase):
+    def test_format_reports_usage_and_refusals(self):
+        budget = MediaBudget(4 * 1024 * 1024)
+        budget.used_bytes = 1024 * 1024
+        budget.peak_bytes = 3 * 1024 * 1024
+        budget.exhausted = 1
+
+        self.assertEqual(
+            format_media_budget_health(budget.snapshot()),
+            "**Media budget:** 1.0 MB of 4.0 MB in use (peak 3.0 MB) · "
+            "0 waiting · 1 download refused",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
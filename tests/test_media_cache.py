@@ -0,0 +1,123 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from media_cache import MediaCache, format_media_cache_health
+
+
+class MediaCacheTests(unittest.IsolatedAsyncioTestCase):
+    async def test_memory_hit_returns_the_cached_bytes(self):
+        cache = MediaCache(max_bytes=100)
+        content = b"image"
+
+        await cache.put("relay/a", content, "image/jpeg")
+        cached = await cache.get("relay/a")
+
+        self.assertEqual(cached, (content, "image/jpeg"))
+        self.assertIs(cached[0], content)
+        self.assertEqual(cache.snapshot().hits, 1)
+
+    async def test_miss_is_counted(self):
+        cache = MediaCache(max_bytes=100)
+
+        self.assertIsNone(await cache.get("relay/missing"))
+        self.assertEqual(cache.snapshot().misses, 1)
+
+    async def test_least_recently_used_entry_is_evicted_by_bytes(self):
+        cache = MediaCache(max_bytes=10)
+        await cache.put("a", b"aaaa", "image/jpeg")
+        await cache.put("b", b"bbbb", "image/jpeg")
+        await cache.get("a")
+
+        await cache.put("c", b"cccc", "image/jpeg")
+
+        self.assertIsNotNone(await cache.get("a"))
+        self.assertIsNone(await cache.get("b"))
+        snapshot = cache.snapshot()
+        self.assertEqual(snapshot.bytes_used, 8)
+        self.assertEqual(snapshot.evictions, 1)
+
+    async def test_oversized_entry_is_not_cached(self):
+        cache = MediaCache(max_bytes=4)
+
+        await cache.put("a", b"too large", "image/jpeg")
+
+        self.assertEqual(len(cache), 0)
+
+    async def test_replacing_a_key_keeps_byte_count_exact(self):
+        cache = MediaCache(max_bytes=100)
+
+        await cache.put("a", b"aaaa", "image/jpeg")
+        await cache.put("a", b"aa", "image/png")
+
+        self.assertEqual(cache.snapshot().bytes_used, 2)
+        self.assertEqual((await cache.get("a"))[1], "image/png")
+
+
+class MediaCacheDiskTierTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = Path(self.directory.name)
+
+    async def test_evicted_entries_spill_to_disk_and_are_read_back(self):
+        cache = MediaCache(max_bytes=4, disk_path=self.path)
+        await cache.put("a", b"aaaa", "image/jpeg")
+        await cache.put("b", b"bbbb", "image/png")
+
+        content, content_type = await cache.get("a")
+
+        with content:
+            self.assertEqual(content.read(), b"aaaa")
+        self.assertEqual(content_type, "image/jpeg")
+        snapshot = cache.snapshot()
+        self.assertEqual(snapshot.disk_entries, 1)
+        self.assertEqual(snapshot.disk_hits, 1)
+
+    async def test_disk_tier_is_bounded_by_bytes(self):
+        cache = MediaCache(max_bytes=4, disk_path=self.path, disk_max_bytes=4)
+        for key in ("a", "b", "c"):
+            await cache.put(key, key.encode() * 4, "image/jpeg")
+
+        self.assertIsNone(await cache.get("a"))
+        self.assertEqual(cache.snapshot().disk_bytes_used, 4)
+        self.assertEqual(len(list(self.path.iterdir())), 1)
+
+    async def test_startup_clears_orphaned_files(self):
+        (self.path / "stale.media").write_bytes(b"old")
+
+        MediaCache(disk_path=self.path)
+
+        self.assertEqual(list(self.path.iterdir()), [])
+
+    async def test_missing_disk_file_is_a_miss(self):
+        cache = MediaCache(max_bytes=4, disk_path=self.path)
+        await cache.put("a", b"aaaa", "image/jpeg")
+        await cache.put("b", b"bbbb", "image/jpeg")
+        for spilled in self.path.iterdir():
+            spilled.unlink()
+
+        self.assertIsNone(await cache.get("a"))
+        self.assertEqual(cache.snapshot().disk_entries, 0)
+
+
+class MediaCacheFormatTests(unittest.TestCase):
+    def test_format_reports_hit_rate_and_tiers(self):
+        cache = MediaCache(max_bytes=4 * 1024 * 1024)
+
+        async def exercise():
+            await cache.put("a", b"a" * 1024 * 1024, "image/jpeg")
+            await cache.get("a")
+            await cache.get("b")
+
+        asyncio.run(exercise())
+
+        self.assertEqual(
+            format_media_cache_health(cache.snapshot()),
+            "**Media cache:** 50% hits · 1 image, 1.0 of 4.0 MB in memory",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
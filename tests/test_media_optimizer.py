@@ -0,0 +1,199 @@
+import asyncio
+import functools
+import io
+import os
+import random
+import unittest
+from unittest.mock import patch
+
+from media_optimizer import (
+    MOSAIC_GAP,
+    MediaOptimizer,
+    compose_mosaic,
+    format_media_optimizer_health,
+    mosaic_grid,
+    optimize_image,
+    optimizer_available,
+)
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def encode(size, image_format, *, mode="RGB", noisy=True):
+    image = Image.new(mode, size, (120, 80, 200, 128)[: len(mode)])
+    if noisy:
+        generator = random.Random(7)
+        image.putdata(
+            [
+                tuple(generator.randrange(256) for _ in mode)
+                for _ in range(size[0] * size[1])
+            ]
+        )
+    output = io.BytesIO()
+    image.save(output, image_format)
+    return output.getvalue()
+
+
+def decoded_size(content):
+    with Image.open(io.BytesIO(content)) as image:
+        return image.size
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class OptimizeImageTests(unittest.TestCase):
+    def test_large_opaque_png_becomes_smaller_jpeg(self):
+        content = encode((200, 150), "PNG")
+
+        result = optimize_image(content, "image/png", min_png_bytes=0)
+
+        self.assertEqual(result.content_type, "image/jpeg")
+        self.assertLess(len(result.content), len(content))
+        self.assertEqual(result.original_bytes, len(content))
+        self.assertEqual(decoded_size(result.content), (200, 150))
+
+    def test_transparent_png_becomes_webp(self):
+        content = encode((200, 150), "PNG", mode="RGBA")
+
+        result = optimize_image(content, "image/png", min_png_bytes=0)
+
+        self.assertEqual(result.content_type, "image/webp")
+
+    def test_oversized_image_is_downscaled_keeping_aspect_ratio(self):
+        content = encode((400, 200), "JPEG", noisy=False)
+
+        result = optimize_image(content, "image/jpeg", max_dimension=100)
+
+        self.assertEqual(decoded_size(result.content), (100, 50))
+
+    def test_small_png_and_display_sized_jpeg_are_left_alone(self):
+        self.assertIsNone(optimize_image(encode((20, 20), "PNG"), "image/png"))
+        self.assertIsNone(optimize_image(encode((20, 20), "JPEG"), "image/jpeg"))
+
+    def test_gifs_keep_their_animation(self):
+        content = encode((400, 200), "GIF", noisy=False)
+
+        self.assertIsNone(optimize_image(content, "image/gif", max_dimension=100))
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class ComposeMosaicTests(unittest.TestCase):
+    def test_grid_is_near_square(self):
+        self.assertEqual(
+            [mosaic_grid(count) for count in (2, 3, 4, 5, 9, 10)],
+            [(2, 1), (2, 2), (2, 2), (3, 2), (3, 3), (4, 3)],
+        )
+
+    def test_carousel_becomes_one_smaller_jpeg_grid(self):
+        contents = [encode((300, 300), "PNG") for _ in range(5)]
+
+        result = compose_mosaic(contents, width=400)
+
+        self.assertEqual(result.content_type, "image/jpeg")
+        self.assertEqual(result.original_bytes, sum(map(len, contents)))
+        self.assertLess(len(result.content), result.original_bytes)
+        cell = (400 - MOSAIC_GAP * 2) // 3
+        self.assertEqual(decoded_size(result.content), (400, cell * 2 + MOSAIC_GAP))
+
+    def test_cells_follow_the_first_image_aspect_ratio(self):
+        contents = [encode((400, 200), "JPEG", noisy=False)] * 2
+
+        result = compose_mosaic(contents, width=400 + MOSAIC_GAP)
+
+        self.assertEqual(decoded_size(result.content), (400 + MOSAIC_GAP, 100))
+
+
+@unittest.skipUnless(optimizer_available(), "Pillow or fork is unavailable")
+class MediaOptimizerTests(unittest.IsolatedAsyncioTestCase):
+    def started(self, **options):
+        optimizer = MediaOptimizer(workers=1, **options)
+        optimizer.start()
+        self.addCleanup(optimizer.close)
+        return optimizer
+
+    async def test_optimizes_in_a_worker_and_tracks_savings(self):
+        optimizer = self.started(min_png_bytes=0)
+        content = encode((200, 150), "PNG")
+
+        result = await optimizer.optimize(content, "image/png")
+
+        snapshot = optimizer.snapshot()
+        self.assertEqual(result.content_type, "image/jpeg")
+        self.assertEqual(snapshot.optimized, 1)
+        self.assertEqual(snapshot.bytes_saved, len(content) - len(result.content))
+        self.assertGreaterEqual(snapshot.encode_p95_ms, 0)
+
+    async def test_mosaic_runs_in_a_worker_and_is_counted(self):
+        optimizer = self.started(enabled=False)
+
+        result = await optimizer.mosaic([encode((100, 100), "PNG")] * 2)
+
+        self.assertEqual(result.content_type, "image/jpeg")
+        self.assertEqual(optimizer.snapshot().mosaics, 1)
+        self.assertIn(
+            "1 carousel mosaic",
+            format_media_optimizer_health(optimizer.snapshot()),
+        )
+
+    async def test_undecodable_images_keep_the_original(self):
+        optimizer = self.started()
+
+        self.assertIsNone(await optimizer.optimize(b"not an image", "image/png"))
+        self.assertEqual(optimizer.snapshot().failures, 1)
+
+    async def test_unstarted_optimizer_does_not_fork(self):
+        optimizer = MediaOptimizer(workers=1, min_png_bytes=0)
+
+        self.assertIsNone(await optimizer.optimize(encode((200, 150), "PNG"), "image/png"))
+        self.assertIsNone(await optimizer.mosaic([encode((100, 100), "PNG")] * 2))
+        self.assertEqual(optimizer.snapshot().failures, 0)
+        self.assertEqual(optimizer.snapshot().mosaic_fallbacks, 1)
+        self.assertIn(
+            "1 mosaic sent as separate images",
+            format_media_optimizer_health(optimizer.snapshot()),
+        )
+
+    async def test_broken_pool_is_shut_down_and_not_reforked(self):
+        optimizer = self.started(min_png_bytes=0)
+
+        self.assertIsNone(
+            await optimizer._run(functools.partial(os._exit, 1), "crash")
+        )
+        self.assertIsNone(await optimizer.optimize(encode((200, 150), "PNG"), "image/png"))
+        optimizer.start()
+
+        snapshot = optimizer.snapshot()
+        self.assertTrue(snapshot.pool_broken)
+        self.assertEqual(snapshot.failures, 1)
+        self.assertIsNone(optimizer._executor)
+        self.assertIn("worker pool stopped", format_media_optimizer_health(snapshot))
+
+
+class MediaOptimizerDisabledTests(unittest.TestCase):
+    def test_disabled_optimizer_passes_images_through(self):
+        with patch("media_optimizer.optimizer_available", return_value=True):
+            optimizer = MediaOptimizer(enabled=False)
+
+        self.assertIsNone(asyncio.run(optimizer.optimize(b"image", "image/png")))
+        self.assertEqual(optimizer.snapshot().images, 0)
+        self.assertEqual(
+            format_media_optimizer_health(optimizer.snapshot()),
+            "**Image optimization:** Off",
+        )
+
+    def test_missing_pillow_is_reported_instead_of_off(self):
+        with patch("media_optimizer.optimizer_available", return_value=False):
+            with self.assertLogs(level="WARNING"):
+                optimizer = MediaOptimizer(enabled=True)
+
+        self.assertFalse(optimizer.enabled)
+        self.assertEqual(
+            format_media_optimizer_health(optimizer.snapshot()),
+            "**Image optimization:** Unavailable (Pillow is not installed)",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import io
+import unittest
+
+import discord
+
+from media_spool import close_files, media_file, media_size, rewrap_files, spool_chunks
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+class SpoolChunksTests(unittest.IsolatedAsyncioTestCase):
+    async def test_small_media_stays_in_memory(self):
+        spool, size = await spool_chunks(chunks(b"ab", b"cd"), 10, memory_bytes=10)
+
+        self.assertEqual(size, 4)
+        self.assertFalse(spool._rolled)
+        self.assertEqual(spool.read(), b"abcd")
+
+    async def test_large_media_rolls_over_to_disk(self):
+        spool, size = await spool_chunks(chunks(b"x" * 8, b"y" * 8), 100, memory_bytes=10)
+
+        self.assertEqual(size, 16)
+        self.assertTrue(spool._rolled)
+        self.assertEqual(spool.read(), b"x" * 8 + b"y" * 8)
+        spool.close()
+
+    async def test_oversized_media_returns_none(self):
+        self.assertIsNone(await spool_chunks(chunks(b"abc", b"def"), 5))
+
+    async def test_on_close_runs_once(self):
+        closed = []
+        spool, _ = await spool_chunks(
+            chunks(b"abc"), 10, on_close=lambda: closed.append(True)
+        )
+
+        spool.close()
+        spool.close()
+
+        self.assertEqual(closed, [True])
+
+    async def test_on_close_runs_when_an_oversized_stream_is_dropped(self):
+        closed = []
+
+        await spool_chunks(chunks(b"abcdef"), 5, on_close=lambda: closed.append(True))
+
+        self.assertEqual(closed, [True])
+
+    async def test_failed_stream_propagates(self):
+        async def broken():
+            yield b"abc"
+            raise asyncio.TimeoutError
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await spool_chunks(broken(), 10)
+
+
+class MediaFileTests(unittest.TestCase):
+    def test_media_size_keeps_file_position(self):
+        content = io.BytesIO(b"abcdef")
+        content.seek(2)
+
+        self.assertEqual(media_size(content), 6)
+        self.assertEqual(content.tell(), 2)
+        self.assertEqual(media_size(b"abc"), 3)
+
+    def test_media_file_wraps_bytes_and_files(self):
+        content = io.BytesIO(b"abc")
+
+        self.assertIs(media_file(content, "a.jpg").fp, content)
+        self.assertEqual(media_file(b"abc", "b.jpg").fp.read(), b"abc")
+
+    def test_close_files_closes_caller_owned_buffers(self):
+        content = io.BytesIO(b"abc")
+        file = discord.File(content, filename="a.jpg")
+
+        file.fp.close()
+        self.assertFalse(content.closed)
+        close_files([file])
+
+        self.assertTrue(content.closed)
+
+    def test_rewrapped_files_survive_another_upload(self):
+        content = io.BytesIO(b"abc")
+        file = discord.File(content, filename="a.jpg")
+        content.read()
+        file.close()
+
+        (again,) = rewrap_files([file])
+        again.fp.close()
+
+        self.assertFalse(content.closed)
+        self.assertEqual((again.filename, again.fp.read()), ("a.jpg", b"abc"))
+        close_files([again])
+        self.assertTrue(content.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,310 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+
+from conversion_telemetry import classify_build_failure
+from payload_cache import (
+    GONE_TTL_SECONDS,
+    PayloadCache,
+    PayloadKey,
+    RecentFailureError,
+    estimate_payload_bytes,
+)
+
+
+class MutableClock:
+    def __init__(self):
+        self.value = 100.0
+
+    def __call__(self):
+        return self.value
+
+
+TWEET = PayloadKey("Twitter", "https://x.com/fixembed/status/1", "en", None, "balanced")
+REDDIT = PayloadKey("Reddit", "https://www.reddit.com/r/python/comments/abc/")
+
+
+class UpstreamError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class PayloadCacheTests(unittest.TestCase):
+    def test_reuses_payload_until_platform_ttl_expires(self):
+        clock = MutableClock()
+        cache = PayloadCache(
+            ttl_seconds={"Twitter": 60},
+            max_stale_seconds=0,
+            clock=clock,
+        )
+        payload = {"authorName": "FixEmbed"}
+
+        cache.put(TWEET, payload)
+        clock.value += 59
+        self.assertIs(cache.get(TWEET), payload)
+        clock.value += 1
+        self.assertIsNone(cache.get(TWEET))
+
+        snapshot = cache.snapshot()
+        self.assertEqual((snapshot.hits, snapshot.misses), (1, 1))
+        self.assertEqual(snapshot.entries, 0)
+        self.assertEqual(snapshot.bytes_used, 0)
+
+    def test_uses_default_ttl_for_unlisted_services(self):
+        clock = MutableClock()
+        cache = PayloadCache(ttl_seconds={}, default_ttl_seconds=10, clock=clock)
+
+        cache.put(REDDIT, {"title": "post"})
+        clock.value += 10
+
+        self.assertIsNone(cache.get(REDDIT))
+
+    def test_evicts_least_recently_used_entries_beyond_byte_budget(self):
+        payload = {"title": "x" * 100}
+        entry_bytes = estimate_payload_bytes(payload)
+        cache = PayloadCache(max_bytes=entry_bytes * 2)
+        keys = [
+            PayloadKey("Reddit", f"https://www.reddit.com/r/a/comments/{index}/")
+            for index in range(3)
+        ]
+
+        cache.put(keys[0], payload)
+        cache.put(keys[1], payload)
+        cache.get(keys[0])
+        cache.put(keys[2], payload)
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertEqual(cache.snapshot().evictions, 1)
+        self.assertEqual(cache.snapshot().bytes_used, entry_bytes * 2)
+
+    def test_skips_payloads_larger_than_the_budget(self):
+        cache = PayloadCache(max_bytes=10)
+
+        cache.put(REDDIT, {"title": "longer than ten bytes"})
+
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_drops_every_variant_of_a_source_post(self):
+        cache = PayloadCache()
+        translated = TWEET._replace(language="ja")
+        cache.put(TWEET, {"title": "en"})
+        cache.put(translated, {"title": "ja"})
+        cache.put(REDDIT, {"title": "other"})
+
+        removed = cache.invalidate(TWEET.canonical_url)
+
+        self.assertEqual(removed, 2)
+        self.assertIsNone(cache.get(translated))
+        self.assertIsNotNone(cache.get(REDDIT))
+        self.assertEqual(cache.invalidate(REDDIT.canonical_url, service="Twitter"), 0)
+
+    def test_get_or_fetch_fetches_once_then_serves_from_cache(self):
+        cache = PayloadCache()
+        fetch = AsyncMock(return_value={"title": "post"})
+
+        async def scenario():
+            first = await cache.get_or_fetch(REDDIT, fetch)
+            second = await cache.get_or_fetch(REDDIT, fetch)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+
+        fetch.assert_awaited_once()
+        self.assertIs(first, second)
+
+    def test_concurrent_misses_share_one_upstream_fetch(self):
+        cache = PayloadCache()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            return {"title": "viral"}
+
+        async def scenario():
+            return await asyncio.gather(
+                *(cache.get_or_fetch(REDDIT, fetch) for _ in range(10))
+            )
+
+        results = asyncio.run(scenario())
+
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(cache.snapshot().coalesced, 9)
+        self.assertEqual(cache.snapshot().inflight, 0)
+
+    def test_failed_fetches_are_not_cached(self):
+        cache = PayloadCache()
+        fetch = AsyncMock(side_effect=ValueError("missing metadata"))
+
+        with self.assertRaises(ValueError):
+            asyncio.run(cache.get_or_fetch(REDDIT, fetch))
+
+        self.assertEqual(len(cache), 0)
+
+
+
+class StaleWhileRevalidateTests(unittest.IsolatedAsyncioTestCase):
+    async def test_serves_stale_payload_while_one_background_refresh_runs(self):
+        clock = MutableClock()
+        cache = PayloadCache(ttl_seconds={"Reddit": 60}, clock=clock)
+        release = asyncio.Event()
+        calls = 0
+
+        async def refresh():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"title": "post", "score": 2}
+
+        cache.put(REDDIT, {"title": "post", "score": 1})
+        clock.value += 61
+
+        first = await cache.get_or_fetch(REDDIT, refresh)
+        second = await cache.get_or_fetch(REDDIT, refresh)
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertEqual((first["score"], second["score"]), (1, 1))
+        self.assertEqual(calls, 1)
+        self.assertEqual((await cache.get_or_fetch(REDDIT, refresh))["score"], 2)
+        snapshot = cache.snapshot()
+        self.assertEqual((snapshot.stale_served, snapshot.refreshes), (2, 1))
+
+    async def test_entries_past_the_hard_stale_ceiling_are_refetched_inline(self):
+        clock = MutableClock()
+        cache = PayloadCache(
+            ttl_seconds={"Reddit": 60},
+            max_stale_seconds=30,
+            clock=clock,
+        )
+        cache.put(REDDIT, {"title": "old"})
+        clock.value += 90
+
+        payload = await cache.get_or_fetch(REDDIT, AsyncMock(return_value={"title": "new"}))
+
+        self.assertEqual(payload, {"title": "new"})
+        self.assertEqual(cache.snapshot().stale_served, 0)
+
+    async def test_failed_refresh_keeps_serving_stale_payload(self):
+        clock = MutableClock()
+        cache = PayloadCache(ttl_seconds={"Reddit": 60}, clock=clock)
+        fetch = AsyncMock(side_effect=asyncio.TimeoutError())
+        cache.put(REDDIT, {"title": "post"})
+        clock.value += 61
+
+        await cache.get_or_fetch(REDDIT, fetch)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertEqual(await cache.get_or_fetch(REDDIT, fetch), {"title": "post"})
+        self.assertEqual(fetch.await_count, 1)
+        self.assertEqual(cache.snapshot().failures_cached, 1)
+
+    async def test_refresh_of_a_deleted_post_drops_every_variant(self):
+        clock = MutableClock()
+        cache = PayloadCache(ttl_seconds={"Twitter": 60}, clock=clock)
+        fetch = AsyncMock(side_effect=UpstreamError(404))
+        japanese = TWEET._replace(language="ja")
+        cache.put(TWEET, {"title": "en"})
+        cache.put(japanese, {"title": "ja"})
+        clock.value += 61
+
+        await cache.get_or_fetch(TWEET, fetch)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertEqual(len(cache), 0)
+        for key in (TWEET, japanese):
+            with self.assertRaises(RecentFailureError):
+                await cache.get_or_fetch(key, fetch)
+        self.assertEqual(fetch.await_count, 1)
+        self.assertEqual(cache.snapshot().stale_served, 1)
+
+    async def test_invalid_refresh_drops_the_stale_payload(self):
+        clock = MutableClock()
+        cache = PayloadCache(ttl_seconds={"Reddit": 60}, clock=clock)
+        cache.put(REDDIT, {"title": "post"})
+        clock.value += 61
+
+        await cache.get_or_fetch(
+            REDDIT, AsyncMock(side_effect=ValueError("did not return Reddit metadata"))
+        )
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        self.assertIsNone(cache.get(REDDIT))
+        self.assertEqual(cache.snapshot().failures_cached, 1)
+
+
+class FailureCacheTests(unittest.TestCase):
+    def test_recent_failure_skips_refetch_until_category_ttl_expires(self):
+        clock = MutableClock()
+        cache = PayloadCache(failure_ttl_seconds={"timeout": 20}, clock=clock)
+        fetch = AsyncMock(side_effect=asyncio.TimeoutError())
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(cache.get_or_fetch(REDDIT, fetch))
+        clock.value += 19
+        with self.assertRaises(RecentFailureError) as raised:
+            asyncio.run(cache.get_or_fetch(REDDIT._replace(language="ja"), fetch))
+        clock.value += 1
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(cache.get_or_fetch(REDDIT, fetch))
+
+        self.assertEqual(fetch.await_count, 2)
+        self.assertEqual(classify_build_failure(raised.exception), "timeout")
+        self.assertEqual(cache.snapshot().failure_hits, 1)
+
+    def test_gone_posts_are_remembered_longer_than_server_errors(self):
+        clock = MutableClock()
+        cache = PayloadCache(clock=clock)
+        gone = PayloadKey("Reddit", "https://www.reddit.com/r/a/comments/gone/")
+
+        for key, status in ((gone, 404), (REDDIT, 503)):
+            with self.assertRaises(UpstreamError):
+                asyncio.run(
+                    cache.get_or_fetch(key, AsyncMock(side_effect=UpstreamError(status)))
+                )
+        clock.value += 60
+        fetch = AsyncMock(return_value={"title": "back"})
+
+        self.assertEqual(asyncio.run(cache.get_or_fetch(REDDIT, fetch)), {"title": "back"})
+        with self.assertRaises(RecentFailureError) as raised:
+            asyncio.run(cache.get_or_fetch(gone, fetch))
+        self.assertEqual(raised.exception.status, 404)
+        clock.value += GONE_TTL_SECONDS
+        asyncio.run(cache.get_or_fetch(gone, fetch))
+        self.assertEqual(fetch.await_count, 2)
+
+    def test_unexpected_errors_are_not_remembered(self):
+        cache = PayloadCache()
+        fetch = AsyncMock(side_effect=[RuntimeError("bug"), {"title": "post"}])
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(cache.get_or_fetch(REDDIT, fetch))
+
+        self.assertEqual(asyncio.run(cache.get_or_fetch(REDDIT, fetch)), {"title": "post"})
+
+    def test_invalidate_clears_remembered_failures(self):
+        cache = PayloadCache()
+        with self.assertRaises(ValueError):
+            asyncio.run(
+                cache.get_or_fetch(
+                    REDDIT,
+                    AsyncMock(side_effect=ValueError("did not return Reddit metadata")),
+                )
+            )
+
+        cache.invalidate(REDDIT.canonical_url)
+
+        self.assertEqual(cache.snapshot().failures_cached, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
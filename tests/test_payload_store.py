@@ -0,0 +1,207 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from payload_cache import PayloadCache, PayloadKey
+from payload_store import PayloadStore, decode_payload, encode_payload
+
+
+class MutableClock:
+    def __init__(self, value=100.0):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+
+REDDIT = PayloadKey("Reddit", "https://www.reddit.com/r/python/comments/abc/")
+TWEET = PayloadKey("Twitter", "https://x.com/fixembed/status/1", "en", None, "balanced")
+
+
+class PayloadStoreTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / "fixembed_cache.db")
+        self.wall = MutableClock(1_000_000.0)
+
+    async def asyncTearDown(self):
+        self.directory.cleanup()
+
+    async def open_store(self, **options):
+        return await PayloadStore.open(self.path, wall_clock=self.wall, **options)
+
+    async def test_flushed_payloads_survive_reopening(self):
+        store = await self.open_store()
+        store.save(REDDIT, {"title": "post", "score": 3}, 60)
+        self.assertEqual(await store.flush(), 1)
+        await store.close()
+
+        self.wall.value += 10
+        reopened = await self.open_store()
+        stored = await reopened.load(REDDIT)
+        await reopened.close()
+
+        self.assertEqual(stored.payload, {"title": "post", "score": 3})
+        self.assertEqual(stored.ttl_remaining, 50)
+
+    async def test_unflushed_writes_are_served_from_the_buffer(self):
+        store = await self.open_store()
+        store.save(REDDIT, {"title": "post"}, 60)
+
+        stored = await store.load(REDDIT)
+        await store.close()
+
+        self.assertEqual(stored.payload, {"title": "post"})
+
+    async def test_forget_removes_every_variant_of_a_post(self):
+        store = await self.open_store()
+        store.save(TWEET, {"title": "en"}, 60)
+        store.save(TWEET._replace(language="ja"), {"title": "ja"}, 60)
+        await store.flush()
+
+        store.forget(TWEET.canonical_url)
+        await store.flush()
+
+        self.assertIsNone(await store.load(TWEET))
+        self.assertIsNone(await store.load(TWEET._replace(language="ja")))
+        await store.close()
+
+    async def test_forgotten_rows_are_not_loaded_before_the_flush(self):
+        store = await self.open_store()
+        store.save(TWEET, {"title": "en"}, 60)
+        await store.flush()
+
+        store.forget(TWEET.canonical_url)
+        self.assertIsNone(await store.load(TWEET))
+        await store.flush()
+
+        self.assertIsNone(await store.load(TWEET))
+        await store.close()
+
+    async def test_saving_one_variant_keeps_the_others_forgotten(self):
+        store = await self.open_store()
+        japanese = TWEET._replace(language="ja")
+        store.save(TWEET, {"title": "en"}, 60)
+        store.save(japanese, {"title": "ja"}, 60)
+        await store.flush()
+
+        store.forget(TWEET.canonical_url)
+        store.save(TWEET, {"title": "fresh"}, 60)
+        self.assertIsNone(await store.load(japanese))
+        await store.flush()
+
+        self.assertEqual((await store.load(TWEET)).payload, {"title": "fresh"})
+        self.assertIsNone(await store.load(japanese))
+        await store.close()
+
+    async def test_warm_load_prefers_recently_used_servable_rows(self):
+        store = await self.open_store()
+        keys = [
+            PayloadKey("Reddit", f"https://www.reddit.com/r/a/comments/{index}/")
+            for index in range(3)
+        ]
+        for index, key in enumerate(keys):
+            store.save(key, {"title": str(index)}, 60 if index else -120)
+            await store.flush()
+            self.wall.value += 1
+
+        recent = await store.load_recent(5, max_stale_seconds=60)
+        await store.close()
+
+        self.assertEqual([row.key for row in recent], [tuple(keys[2]), tuple(keys[1])])
+
+    async def test_prune_caps_rows_by_last_use(self):
+        store = await self.open_store(max_rows=1)
+        store.save(REDDIT, {"title": "old"}, 60)
+        await store.flush()
+        self.wall.value += 1
+        store.save(TWEET, {"title": "new"}, 60)
+        await store.flush()
+
+        await store.prune()
+
+        self.assertIsNone(await store.load(REDDIT))
+        self.assertIsNotNone(await store.load(TWEET))
+        await store.close()
+
+    def test_non_json_payloads_are_not_persisted(self):
+        self.assertIsNone(encode_payload({"value": object()}))
+        self.assertEqual(decode_payload(encode_payload({"a": "é"})), {"a": "é"})
+        self.assertIsNone(decode_payload(b"not compressed"))
+
+
+class PayloadCacheStoreTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / "fixembed_cache.db")
+        self.wall = MutableClock(1_000_000.0)
+
+    async def asyncTearDown(self):
+        self.directory.cleanup()
+
+    async def test_restart_warm_loads_payloads_without_refetching(self):
+        first = PayloadCache()
+        first.attach_store(await PayloadStore.open(self.path, wall_clock=self.wall))
+        await first.get_or_fetch(REDDIT, lambda: asyncio.sleep(0, {"title": "post"}))
+        await first.store.close()
+
+        restarted = PayloadCache()
+        restarted.attach_store(await PayloadStore.open(self.path, wall_clock=self.wall))
+        self.assertEqual(await restarted.warm(), 1)
+
+        async def unexpected_fetch():
+            raise AssertionError("warm entry should be served")
+
+        payload = await restarted.get_or_fetch(REDDIT, unexpected_fetch)
+        await restarted.store.close()
+        self.assertEqual(payload, {"title": "post"})
+
+    async def test_memory_miss_loads_from_store_before_fetching(self):
+        store = await PayloadStore.open(self.path, wall_clock=self.wall)
+        store.save(REDDIT, {"title": "stored"}, 60)
+        await store.flush()
+        cache = PayloadCache()
+        cache.attach_store(store)
+
+        async def unexpected_fetch():
+            raise AssertionError("stored entry should be served")
+
+        payload = await cache.get_or_fetch(REDDIT, unexpected_fetch)
+        await store.close()
+
+        self.assertEqual(payload, {"title": "stored"})
+        self.assertEqual(cache.snapshot().store_hits, 1)
+
+    async def test_invalidate_forgets_persisted_variants(self):
+        store = await PayloadStore.open(self.path, wall_clock=self.wall)
+        cache = PayloadCache()
+        cache.attach_store(store)
+        cache.put(REDDIT, {"title": "post"})
+
+        cache.invalidate(REDDIT.canonical_url)
+        await store.flush()
+
+        self.assertIsNone(await store.load(REDDIT))
+        await store.close()
+
+    async def test_invalidated_post_is_refetched_before_the_flush(self):
+        store = await PayloadStore.open(self.path, wall_clock=self.wall)
+        store.save(REDDIT, {"title": "old"}, 60)
+        await store.flush()
+        cache = PayloadCache()
+        cache.attach_store(store)
+
+        cache.invalidate(REDDIT.canonical_url)
+        payload = await cache.get_or_fetch(
+            REDDIT, lambda: asyncio.sleep(0, {"title": "new"})
+        )
+        await store.flush()
+
+        self.assertEqual(payload, {"title": "new"})
+        self.assertEqual((await store.load(REDDIT)).payload, {"title": "new"})
+        await store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -162,7 +162,7 @@ class PixivEmbedFetchTests(unittest.IsolatedAsyncioTestCase):
             "metadata",
             AsyncMock(return_value=metadata),
         ):
-            payload = await pixiv_embed._fetch_pixiv_payload(
+            payload = await pixiv_embed.fetch_pixiv_payload(
                 "https://www.pixiv.net/artworks/101844438"
             )
 
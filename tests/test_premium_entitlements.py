@@ -0,0 +1,179 @@
+import asyncio
+import unittest
+from unittest import mock
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import aiohttp
+
+from premium_entitlements import PremiumEntitlementIndex
+
+
+SKU_ID = 99
+
+
+class MutableClock:
+    def __init__(self, value=1_000_000.0):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+
+def entitlement(entitlement_id, guild_id, *, sku_id=SKU_ID, ends_at=None, deleted=False):
+    return SimpleNamespace(
+        id=entitlement_id,
+        guild_id=guild_id,
+        sku_id=sku_id,
+        ends_at=(
+            None
+            if ends_at is None
+            else datetime.fromtimestamp(ends_at, tz=timezone.utc)
+        ),
+        deleted=deleted,
+    )
+
+
+async def scan(*entitlements, gate=None):
+    for item in entitlements:
+        if gate is not None:
+            await gate.wait()
+        yield item
+
+
+class PremiumEntitlementIndexTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = MutableClock()
+        self.index = PremiumEntitlementIndex(SKU_ID, clock=self.clock)
+
+    async def test_refresh_loads_active_guild_grants(self):
+        loaded = await self.index.refresh(
+            scan(
+                entitlement(1, 10),
+                entitlement(2, 20, sku_id=5),
+                entitlement(3, None),
+                entitlement(4, 30, deleted=True),
+            )
+        )
+
+        self.assertEqual(loaded, 1)
+        self.assertTrue(self.index.loaded)
+        self.assertTrue(self.index.is_premium(10))
+        self.assertFalse(self.index.is_premium(20))
+        self.assertFalse(self.index.is_premium(30))
+
+    async def test_grants_lapse_at_ends_at(self):
+        self.index.apply(entitlement(1, 10, ends_at=self.clock.value + 60))
+
+        self.assertTrue(self.index.is_premium(10))
+        self.clock.value += 60
+        self.assertFalse(self.index.is_premium(10))
+        self.assertEqual(len(self.index), 0)
+
+    async def test_guild_stays_premium_while_any_grant_is_active(self):
+        self.index.apply(entitlement(1, 10))
+        self.index.apply(entitlement(2, 10))
+
+        self.assertTrue(self.index.apply(entitlement(1, 10), active=False))
+        self.assertFalse(self.index.apply(entitlement(2, 10), active=False))
+
+    async def test_other_skus_are_ignored(self):
+        self.assertIsNone(self.index.apply(entitlement(1, 10, sku_id=5)))
+        self.assertFalse(self.index.is_premium(10))
+
+    async def test_events_during_a_scan_survive_the_swap(self):
+        gate = asyncio.Event()
+        refresh = asyncio.create_task(
+            self.index.refresh(scan(entitlement(1, 10), gate=gate))
+        )
+        await asyncio.sleep(0)
+
+        self.index.apply(entitlement(1, 10), active=False)
+        self.index.apply(entitlement(2, 20))
+        gate.set()
+        await refresh
+
+        self.assertFalse(self.index.is_premium(10))
+        self.assertTrue(self.index.is_premium(20))
+
+    async def test_failed_scan_keeps_the_previous_index(self):
+        self.index.apply(entitlement(1, 10))
+
+        async def broken():
+            yield entitlement(2, 20)
+            raise RuntimeError("scan failed")
+
+        with self.assertRaises(RuntimeError):
+            await self.index.refresh(broken())
+
+        self.assertTrue(self.index.is_premium(10))
+        self.assertFalse(self.index.is_premium(20))
+        self.assertFalse(self.index.loaded)
+
+    async def test_guilds_loaded_before_the_first_scan_are_known(self):
+        self.assertFalse(self.index.knows(10))
+
+        self.assertTrue(await self.index.load_guild(10, scan(entitlement(1, 10))))
+        self.assertFalse(await self.index.load_guild(20, scan()))
+
+        self.assertTrue(self.index.knows(10))
+        self.assertTrue(self.index.knows(20))
+        self.assertFalse(self.index.knows(30))
+        await self.index.refresh(scan(entitlement(1, 10)))
+        self.assertTrue(self.index.knows(30))
+
+    async def test_run_survives_unexpected_scan_errors(self):
+        attempts = 0
+
+        def malformed_scan():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                return scan(SimpleNamespace(id=1, guild_id=10, sku_id="not-a-sku"))
+            return scan(entitlement(1, 10))
+
+        delays = []
+
+        async def record_sleep(delay):
+            delays.append(delay)
+            if len(delays) > 2:
+                raise asyncio.CancelledError
+
+        with mock.patch("premium_entitlements.asyncio.sleep", record_sleep):
+            with self.assertLogs(level="ERROR"):
+                with self.assertRaises(asyncio.CancelledError):
+                    await self.index.run(malformed_scan, interval_seconds=600, retry_seconds=5)
+
+        self.assertEqual(attempts, 2)
+        self.assertTrue(self.index.is_premium(10))
+
+    async def test_run_retries_a_failed_first_scan_with_backoff(self):
+        attempts = 0
+
+        def flaky_scan():
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise aiohttp.ClientError("entitlements unavailable")
+            return scan(entitlement(1, 10))
+
+        delays = []
+        real_sleep = asyncio.sleep
+
+        async def record_sleep(delay):
+            delays.append(delay)
+            if len(delays) > 3:
+                raise asyncio.CancelledError
+            await real_sleep(0)
+
+        with mock.patch("premium_entitlements.asyncio.sleep", record_sleep):
+            with self.assertRaises(asyncio.CancelledError):
+                await self.index.run(flaky_scan, interval_seconds=600, retry_seconds=5)
+
+        self.assertEqual(delays, [0, 5, 10, 600])
+        self.assertTrue(self.index.loaded)
+        self.assertTrue(self.index.is_premium(10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -45,6 +45,30 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
         )
         self.assertGreaterEqual(silent_sends, 2)
 
+    def test_rejected_card_packs_requeue_each_card_as_its_own_send(self):
+        main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
+        pack_section = main_source.split("async def send_card_pack(", 1)[1].split(
+            "async def rate_limited_send(", 1
+        )[0]
+
+        self.assertIn("outcome = await schedule_delivery(ticket, channel.id, primary_send)", pack_section)
+        self.assertIn("await rate_limited_send(", pack_section)
+        self.assertIn("files=rewrap_files(card.files)", pack_section)
+        self.assertNotIn("fallback_send", pack_section)
+        self.assertIn("delivery_outcomes.extend(", main_source)
+
+    def test_streamed_cards_release_attachments_that_never_ship(self):
+        main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
+        stream_section = main_source.split("pending_cards = []", 1)[1].split(
+            "if effective_delivery_mode == \"delete\":", 1
+        )[0]
+
+        self.assertIn("discard=release_delivery,", stream_section)
+        finally_section = stream_section.split("finally:", 1)[1]
+        self.assertIn("for delivery in pending_cards:", finally_section)
+        self.assertIn("for _, delivery in batch:", finally_section)
+        self.assertIn("release_delivery(delivery)", finally_section)
+
     def test_settings_workflow_uses_components_v2_without_legacy_embeds(self):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
         settings_section = main_source.split("# Components V2 settings implementation used", 1)[1].split(
@@ -102,7 +126,7 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
 
         self.assertIn("from delivery_telemetry import (", main_source)
-        self.assertIn("delivery_telemetry = DeliveryTelemetry()", main_source)
+        self.assertIn("delivery_telemetry = DeliveryTelemetry(send_rate=SEND_QUEUE.global_rate)", main_source)
         self.assertIn("ticket = delivery_telemetry.queued(", main_source)
         self.assertIn("await deliver_with_fallback(", main_source)
         self.assertIn("completion = asyncio.get_running_loop().create_future()", main_source)
@@ -160,7 +184,8 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
             'label="Translation", description="Translate every supported platform",',
             main_source,
         )
-        self.assertIn("should_skip_automatic(message, guild_settings, premium=premium)", main_source)
+        self.assertIn("runtime = get_guild_runtime_config(message.guild, premium)", main_source)
+        self.assertIn("if runtime.skips_author(message.author):", main_source)
         self.assertGreaterEqual(main_source.count("card_preferences,"), 9)
         self.assertIn("def with_translation_language(item, guild_settings):", main_source)
         self.assertGreaterEqual(
@@ -227,7 +252,7 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
         self.assertIn("include_fixembed=False", main_source)
         self.assertNotIn("download_instagram_video", main_source)
         self.assertNotIn("video_file = discord.File(", main_source)
-        self.assertIn("fetch_instagram_delivery", main_source)
+        self.assertIn("prepare_instagram_delivery", main_source)
         self.assertIn("component_layouts", main_source)
         self.assertIn("view=delivery.view", main_source)
         self.assertIn("files=delivery.files", main_source)
@@ -239,7 +264,7 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
 
         self.assertIn("from twitter_embed import build_twitter_layout, fetch_twitter_payload", main_source)
         self.assertIn('elif item.service == "Twitter":', main_source)
-        self.assertIn("payload = await fetch_twitter_payload(", main_source)
+        self.assertIn("return await fetch_twitter_payload(", main_source)
         self.assertIn("translation_language,", main_source)
         self.assertIn("item.mode,", main_source)
         self.assertIn("fixed_url = build_fixembed_url(translated_item, media_quality)", main_source)
@@ -250,9 +275,9 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
     def test_reddit_uses_components_v2_without_uploading_media(self):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
 
-        self.assertIn("from reddit_embed import fetch_reddit_layout", main_source)
+        self.assertIn("from reddit_embed import build_reddit_layout, fetch_reddit_payload", main_source)
         self.assertIn('elif item.service == "Reddit":', main_source)
-        self.assertIn("fetch_reddit_layout(", main_source)
+        self.assertIn("fetch_reddit_payload(", main_source)
         self.assertIn("component_layouts.append(delivery)", main_source)
         self.assertIn("fallback_content=delivery.fallback_url", main_source)
         self.assertNotIn("download_reddit", main_source)
@@ -260,9 +285,9 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
     def test_threads_uses_components_v2_without_uploading_media(self):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
 
-        self.assertIn("from threads_embed import fetch_threads_layout", main_source)
+        self.assertIn("from threads_embed import build_threads_layout, fetch_threads_payload", main_source)
         self.assertIn('elif item.service == "Threads":', main_source)
-        self.assertIn("fetch_threads_layout(", main_source)
+        self.assertIn("fetch_threads_payload(", main_source)
         self.assertIn("component_layouts.append(delivery)", main_source)
         self.assertIn("fallback_content=delivery.fallback_url", main_source)
         self.assertNotIn("download_threads", main_source)
@@ -270,9 +295,9 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
     def test_bluesky_uses_components_v2_without_uploading_media(self):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
 
-        self.assertIn("from bluesky_embed import fetch_bluesky_layout", main_source)
+        self.assertIn("from bluesky_embed import build_bluesky_layout, fetch_bluesky_payload", main_source)
         self.assertIn('elif item.service == "Bluesky":', main_source)
-        self.assertIn("fetch_bluesky_layout(", main_source)
+        self.assertIn("fetch_bluesky_payload(", main_source)
         self.assertIn("component_layouts.append(delivery)", main_source)
         self.assertIn("fallback_content=delivery.fallback_url", main_source)
         self.assertNotIn("download_bluesky", main_source)
@@ -280,13 +305,13 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
     def test_pixiv_uses_components_v2_without_uploading_media(self):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
 
-        self.assertIn("from pixiv_embed import fetch_pixiv_layout", main_source)
+        self.assertIn("from pixiv_embed import build_pixiv_layout, fetch_pixiv_payload", main_source)
         self.assertIn("from pixiv_relay import start_pixiv_relay", main_source)
         self.assertIn('os.getenv("PIXIV_RELAY_ENABLED") == "1"', main_source)
         self.assertIn('getattr(client, "pixiv_relay_runner", None) is None', main_source)
         self.assertIn("client.pixiv_relay_runner = await start_pixiv_relay()", main_source)
         self.assertIn('elif item.service == "Pixiv":', main_source)
-        self.assertIn("fetch_pixiv_layout(", main_source)
+        self.assertIn("fetch_pixiv_payload(", main_source)
         self.assertIn("component_layouts.append(delivery)", main_source)
         self.assertIn("fallback_content=delivery.fallback_url", main_source)
         self.assertNotIn("download_pixiv", main_source)
@@ -294,9 +319,9 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
     def test_bilibili_uses_components_v2_without_uploading_media(self):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
 
-        self.assertIn("from bilibili_embed import fetch_bilibili_layout", main_source)
+        self.assertIn("from bilibili_embed import build_bilibili_layout, fetch_bilibili_payload", main_source)
         self.assertIn('elif item.service == "Bilibili":', main_source)
-        self.assertIn("fetch_bilibili_layout(", main_source)
+        self.assertIn("fetch_bilibili_payload(", main_source)
         self.assertIn("component_layouts.append(delivery)", main_source)
         self.assertIn("fallback_content=delivery.fallback_url", main_source)
         self.assertNotIn("download_bilibili", main_source)
@@ -304,9 +329,9 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
     def test_youtube_community_posts_use_components_v2_without_uploading_media(self):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
 
-        self.assertIn("from youtube_embed import fetch_youtube_community_layout", main_source)
+        self.assertIn("from youtube_embed import (\n    build_youtube_community_layout,\n    fetch_youtube_community_payload,\n)", main_source)
         self.assertIn('elif item.service == "YouTube":', main_source)
-        self.assertIn("fetch_youtube_community_layout(", main_source)
+        self.assertIn("fetch_youtube_community_payload(", main_source)
         self.assertIn("component_layouts.append(delivery)", main_source)
         self.assertIn("fallback_content=delivery.fallback_url", main_source)
         self.assertNotIn("download_youtube", main_source)
@@ -314,22 +339,30 @@ class DiscordRuntimeCompatibilityTests(unittest.TestCase):
     def test_pinterest_pins_use_components_v2_without_uploading_media(self):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
 
-        self.assertIn("from pinterest_embed import fetch_pinterest_layout", main_source)
+        self.assertIn("from pinterest_embed import build_pinterest_layout, fetch_pinterest_payload", main_source)
         self.assertIn('elif item.service == "Pinterest":', main_source)
-        self.assertIn("fetch_pinterest_layout(", main_source)
+        self.assertIn("fetch_pinterest_payload(", main_source)
         self.assertNotIn("download_pinterest", main_source)
 
     def test_new_social_platforms_use_components_v2_without_uploading_media(self):
         main_source = Path(__file__).resolve().parents[1].joinpath("main.py").read_text(encoding="utf-8")
 
-        for service, module_name, fetch_name in (
-            ("TikTok", "tiktok_embed", "fetch_tiktok_layout"),
-            ("Tumblr", "tumblr_embed", "fetch_tumblr_layout"),
-            ("Twitch", "twitch_embed", "fetch_twitch_layout"),
-            ("DeviantArt", "deviantart_embed", "fetch_deviantart_layout"),
+        for service, module_name, build_name, fetch_name in (
+            ("TikTok", "tiktok_embed", "build_tiktok_layout", "fetch_tiktok_payload"),
+            ("Tumblr", "tumblr_embed", "build_tumblr_layout", "fetch_tumblr_payload"),
+            ("Twitch", "twitch_embed", "build_twitch_layout", "fetch_twitch_payload"),
+            (
+                "DeviantArt",
+                "deviantart_embed",
+                "build_deviantart_layout",
+                "fetch_deviantart_card_payload",
+            ),
         ):
             with self.subTest(service=service):
-                self.assertIn(f"from {module_name} import {fetch_name}", main_source)
+                self.assertIn(
+                    f"from {module_name} import {build_name}, {fetch_name}",
+                    main_source,
+                )
                 self.assertIn(f'elif item.service == "{service}":', main_source)
                 self.assertIn(f"{fetch_name}(", main_source)
                 self.assertNotIn(f"download_{service.lower()}", main_source)
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import logging
+import unittest
+
+from discord.http import HTTPClient, Route
+
+from send_scheduler import (
+    AimdRate,
+    SendScheduler,
+    TokenBucket,
+    watch_discord_rate_limits,
+)
+
+
+class MutableClock:
+    def __init__(self, value=100.0):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+
+async def noop():
+    return "sent"
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_wait_time_is_exact_time_to_next_token(self):
+        bucket = TokenBucket(rate=2, burst=1, now=0)
+
+        self.assertEqual(bucket.wait_time(0), 0)
+        bucket.take(0)
+        self.assertAlmostEqual(bucket.wait_time(0), 0.5)
+        self.assertAlmostEqual(bucket.wait_time(0.25), 0.25)
+        self.assertEqual(bucket.wait_time(0.5), 0)
+
+    def test_refill_is_capped_at_burst(self):
+        bucket = TokenBucket(rate=10, burst=3, now=0)
+        bucket.take(0)
+
+        bucket.refill(60)
+
+        self.assertEqual(bucket.tokens, 3)
+        self.assertTrue(bucket.is_full(60))
+
+
+class AimdRateTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = MutableClock()
+        self.bucket = TokenBucket(rate=10, burst=10, now=self.clock())
+        self.rate = AimdRate(
+            self.bucket,
+            ceiling=12,
+            floor=2,
+            increase=0.5,
+            decrease_factor=0.5,
+            cooldown_seconds=1,
+            clock=self.clock,
+        )
+
+    def test_successes_raise_the_rate_additively_up_to_the_cap(self):
+        for _ in range(3):
+            self.rate.succeeded()
+        self.assertEqual(self.rate.rate, 11.5)
+
+        for _ in range(10):
+            self.rate.succeeded()
+        self.assertEqual(self.rate.rate, 12)
+
+    def test_rate_limits_cut_multiplicatively_once_per_cooldown(self):
+        self.rate.rate_limited()
+        self.rate.rate_limited()
+
+        self.assertEqual(self.rate.rate, 5)
+        self.assertEqual(self.rate.backoffs, 1)
+        self.assertLessEqual(self.bucket.tokens, 0)
+
+        self.clock.value += 1
+        self.rate.rate_limited()
+        self.clock.value += 1
+        self.rate.rate_limited()
+
+        self.assertEqual(self.rate.rate, 2)
+        self.assertEqual(self.rate.backoffs, 3)
+
+
+class _DiscordResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.headers = {"content-type": "application/json", "Via": "1.1 google"}
+        self.body = json.dumps(body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        return False
+
+    async def text(self, encoding=None):
+        return self.body
+
+
+class _DiscordSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def request(self, method, url, **kwargs):
+        return self.responses.pop(0)
+
+
+class DiscordRateLimitSignalTests(unittest.IsolatedAsyncioTestCase):
+    async def test_a_429_retried_inside_discord_py_backs_the_rate_off(self):
+        clock = MutableClock()
+        rate = AimdRate(TokenBucket(rate=20, burst=20, now=clock()), clock=clock)
+        logger = logging.getLogger("discord.http")
+        handler = watch_discord_rate_limits(rate)
+        self.addCleanup(logger.removeHandler, handler)
+        http = HTTPClient(asyncio.get_running_loop())
+        http._HTTPClient__session = _DiscordSession(
+            _DiscordResponse(429, {"retry_after": 0, "global": False}),
+            _DiscordResponse(200, {"id": "1"}),
+        )
+        # What ``static_login`` sets up alongside the session.
+        http._global_over = asyncio.Event()
+        http._global_over.set()
+
+        sent = await http.request(
+            Route("POST", "/channels/{channel_id}/messages", channel_id=1),
+            json={"content": "card"},
+        )
+
+        self.assertEqual(sent, {"id": "1"})
+        self.assertEqual(rate.backoffs, 1)
+        self.assertEqual(rate.rate, 10)
+
+    async def test_429s_outside_channel_routes_are_ignored(self):
+        rate = AimdRate(TokenBucket(rate=20, burst=20, now=0), clock=lambda: 0)
+        logger = logging.getLogger("discord.http")
+        handler = watch_discord_rate_limits(rate)
+        self.addCleanup(logger.removeHandler, handler)
+
+        logger.warning(
+            "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.",
+            "GET",
+            "https://discord.com/api/v10/applications/1/entitlements",
+            1.0,
+        )
+
+        self.assertEqual(rate.backoffs, 0)
+
+
+class ClaimTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = MutableClock()
+        self.scheduler = SendScheduler(
+            channel_rate=1,
+            channel_burst=2,
+            global_rate=100,
+            global_burst=100,
+            clock=self.clock,
+        )
+
+    async def test_busy_channel_does_not_block_other_channels(self):
+        for _ in range(3):
+            self.scheduler.submit("busy", noop)
+        self.scheduler.submit("quiet", noop)
+
+        claimed = []
+        for _ in range(3):
+            job, _ = self.scheduler._claim()
+            claimed.append(job.channel_key)
+            self.scheduler._release(job)
+
+        self.assertEqual(claimed, ["busy", "quiet", "busy"])
+        job, delay = self.scheduler._claim()
+        self.assertIsNone(job)
+        self.assertAlmostEqual(delay, 1.0)
+        self.assertEqual(self.scheduler.qsize(), 1)
+
+    async def test_one_send_in_flight_per_channel(self):
+        self.scheduler.submit("channel", noop)
+        self.scheduler.submit("channel", noop)
+
+        first, _ = self.scheduler._claim()
+        second, delay = self.scheduler._claim()
+
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        self.assertEqual(delay, float("inf"))
+
+    async def test_global_bucket_caps_all_channels(self):
+        scheduler = SendScheduler(
+            global_rate=4, global_burst=1, clock=self.clock
+        )
+        scheduler.submit("a", noop)
+        scheduler.submit("b", noop)
+
+        self.assertIsNotNone(scheduler._claim()[0])
+        job, delay = scheduler._claim()
+
+        self.assertIsNone(job)
+        self.assertAlmostEqual(delay, 0.25)
+
+    async def test_idle_full_buckets_are_pruned(self):
+        self.scheduler.submit("channel", noop)
+        job, _ = self.scheduler._claim()
+        self.scheduler._release(job)
+
+        self.clock.value += 120
+        self.scheduler._claim()
+
+        self.assertEqual(self.scheduler._buckets, {})
+
+
+class FairQueueTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.scheduler = SendScheduler(
+            channel_rate=1000,
+            channel_burst=1000,
+            global_rate=1000,
+            global_burst=1000,
+            clock=MutableClock(),
+        )
+
+    def drain(self):
+        order = []
+        while True:
+            job, _ = self.scheduler._claim()
+            if job is None:
+                return order
+            order.append(job.channel_key)
+            self.scheduler._release(job)
+
+    async def test_bursting_guild_takes_turns_with_other_guilds(self):
+        for _ in range(5):
+            self.scheduler.submit("raid-channel", noop, guild_key="raid")
+        self.scheduler.submit("calm-channel", noop, guild_key="calm")
+        self.scheduler.submit("other-channel", noop, guild_key="other")
+
+        order = self.drain()
+
+        self.assertEqual(order[:3], ["raid-channel", "calm-channel", "other-channel"])
+        self.assertEqual(order[3:], ["raid-channel"] * 4)
+
+    async def test_weight_grants_extra_slots_per_round(self):
+        for _ in range(4):
+            self.scheduler.submit("premium", noop, guild_key="p", weight=2)
+            self.scheduler.submit("free", noop, guild_key="f")
+
+        order = self.drain()
+
+        self.assertEqual(
+            order[:6],
+            ["premium", "premium", "free", "premium", "premium", "free"],
+        )
+
+    async def test_channels_within_a_guild_take_turns(self):
+        for _ in range(2):
+            self.scheduler.submit("a", noop, guild_key="guild")
+            self.scheduler.submit("b", noop, guild_key="guild")
+
+        self.assertEqual(self.drain(), ["a", "b", "a", "b"])
+
+
+class PriorityTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.scheduler = SendScheduler(
+            channel_rate=1000,
+            channel_burst=1000,
+            global_rate=1000,
+            global_burst=1000,
+            starvation_limit=3,
+            clock=MutableClock(),
+        )
+
+    def drain(self):
+        order = []
+        while True:
+            job, _ = self.scheduler._claim()
+            if job is None:
+                return order
+            order.append(job.priority[0])
+            self.scheduler._release(job)
+
+    async def test_interactive_sends_jump_the_automatic_backlog(self):
+        for _ in range(3):
+            self.scheduler.submit("channel", noop)
+        self.scheduler.submit("interaction", noop, priority="interactive")
+
+        self.assertEqual(self.drain(), ["i", "a", "a", "a"])
+        self.assertEqual(self.scheduler.qsize(), 0)
+
+    async def test_lower_classes_get_a_slot_after_the_starvation_limit(self):
+        for index in range(8):
+            self.scheduler.submit(("interaction", index), noop, priority="interactive")
+        self.scheduler.submit("channel", noop)
+        self.scheduler.submit("sweep", noop, priority="background")
+
+        self.assertEqual(
+            "".join(self.drain()),
+            "iiiabiiiii",
+        )
+
+    async def test_unknown_priority_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.scheduler.submit("channel", noop, priority="urgent")
+
+
+class WorkerTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.scheduler = SendScheduler(
+            workers=3,
+            channel_rate=1000,
+            channel_burst=1000,
+            global_rate=1000,
+            global_burst=1000,
+        )
+        self.scheduler.start()
+
+    async def asyncTearDown(self):
+        await self.scheduler.close()
+
+    async def test_channel_order_is_preserved_across_workers(self):
+        sent = []
+
+        def job(value, delay):
+            async def run():
+                await asyncio.sleep(delay)
+                sent.append(value)
+                return value
+            return run
+
+        futures = [
+            self.scheduler.submit("channel", job(index, 0.01 * (3 - index)))
+            for index in range(3)
+        ]
+
+        self.assertEqual(await asyncio.gather(*futures), [0, 1, 2])
+        self.assertEqual(sent, [0, 1, 2])
+
+    async def test_channels_send_concurrently(self):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+
+        await asyncio.gather(
+            *(self.scheduler.submit(channel, slow) for channel in "abc")
+        )
+
+        self.assertLess(loop.time() - started, 0.12)
+
+    async def test_failures_reach_the_caller(self):
+        async def broken():
+            raise RuntimeError("send failed")
+
+        with self.assertRaises(RuntimeError):
+            await self.scheduler.submit("channel", broken)
+        self.assertEqual(await self.scheduler.submit("channel", noop), "sent")
+
+    async def test_idle_worker_wakes_at_the_next_token(self):
+        scheduler = SendScheduler(
+            workers=1, channel_rate=20, channel_burst=1
+        )
+        scheduler.start()
+        try:
+            loop = asyncio.get_running_loop()
+            await scheduler.submit("channel", noop)
+            started = loop.time()
+            await scheduler.submit("channel", noop)
+            elapsed = loop.time() - started
+        finally:
+            await scheduler.close()
+
+        self.assertGreaterEqual(elapsed, 0.04)
+        self.assertLess(elapsed, 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+
+from single_flight import SingleFlight
+
+
+class SingleFlightTests(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_callers_share_one_call(self):
+        flights = SingleFlight()
+        release = asyncio.Event()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"title": "viral"}
+
+        waiters = [
+            asyncio.create_task(flights.run("post", fetch))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        self.assertEqual(len(flights), 1)
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        self.assertEqual(calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual((flights.started, flights.coalesced), (1, 4))
+        self.assertEqual(len(flights), 0)
+
+    async def test_errors_reach_every_waiter_and_next_call_retries(self):
+        flights = SingleFlight()
+        release = asyncio.Event()
+        attempts = 0
+
+        async def fetch():
+            nonlocal attempts
+            attempts += 1
+            await release.wait()
+            raise ValueError("upstream unavailable")
+
+        waiters = [
+            asyncio.create_task(flights.run("post", fetch))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        with self.assertRaises(ValueError):
+            await flights.run("post", fetch)
+        self.assertEqual(attempts, 2)
+
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "payload"
+
+        first = asyncio.create_task(flights.run("post", fetch))
+        second = asyncio.create_task(flights.run("post", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        self.assertEqual(await second, "payload")
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+
+    async def test_distinct_keys_run_independently(self):
+        flights = SingleFlight()
+
+        async def fetch(value):
+            return value
+
+        results = await asyncio.gather(
+            flights.run("a", lambda: fetch("a")),
+            flights.run("b", lambda: fetch("b")),
+        )
+
+        self.assertEqual(results, ["a", "b"])
+        self.assertEqual(flights.coalesced, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import discord
+
+from source_cleanup import BULK_DELETE_MAX_MESSAGES, SourceMessageCleaner
+
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def http_error(error_type, status):
+    return error_type(SimpleNamespace(status=status, reason="error"), "error")
+
+
+class FakeChannel:
+    def __init__(self, channel_id=1, bulk_error=None):
+        self.id = channel_id
+        self.bulk_error = bulk_error
+        self.bulk_calls = []
+
+    async def delete_messages(self, messages):
+        self.bulk_calls.append([message.id for message in messages])
+        if self.bulk_error is not None:
+            raise self.bulk_error
+
+
+class FakeMessage:
+    def __init__(self, message_id, channel, *, age=timedelta(seconds=5), error=None):
+        self.id = message_id
+        self.channel = channel
+        self.created_at = NOW - age
+        self.error = error
+        self.deleted = False
+
+    async def delete(self):
+        if self.error is not None:
+            raise self.error
+        self.deleted = True
+
+
+def cleaner(**kwargs):
+    kwargs.setdefault("window_seconds", 0)
+    return SourceMessageCleaner(wall_clock=NOW.timestamp, **kwargs)
+
+
+class SourceMessageCleanerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_messages_in_one_window_share_a_bulk_delete(self):
+        channel = FakeChannel()
+        source_cleanup = cleaner()
+        messages = [FakeMessage(message_id, channel) for message_id in (1, 2, 3)]
+
+        await asyncio.gather(*(source_cleanup.delete(message) for message in messages))
+
+        self.assertEqual(channel.bulk_calls, [[1, 2, 3]])
+        self.assertFalse(any(message.deleted for message in messages))
+        self.assertEqual(source_cleanup.bulk_deletes, 1)
+        self.assertEqual(source_cleanup.bulk_deleted_messages, 3)
+
+    async def test_lone_message_uses_a_single_delete(self):
+        channel = FakeChannel()
+        source_cleanup = cleaner()
+        message = FakeMessage(1, channel)
+
+        await source_cleanup.delete(message)
+
+        self.assertEqual(channel.bulk_calls, [])
+        self.assertTrue(message.deleted)
+        self.assertEqual(source_cleanup.single_deletes, 1)
+
+    async def test_channels_are_batched_separately(self):
+        first, second = FakeChannel(1), FakeChannel(2)
+        source_cleanup = cleaner()
+
+        await asyncio.gather(
+            source_cleanup.delete(FakeMessage(1, first)),
+            source_cleanup.delete(FakeMessage(2, second)),
+            source_cleanup.delete(FakeMessage(3, first)),
+        )
+
+        self.assertEqual(first.bulk_calls, [[1, 3]])
+        self.assertEqual(second.bulk_calls, [])
+
+    async def test_messages_near_the_age_limit_are_deleted_singly(self):
+        channel = FakeChannel()
+        source_cleanup = cleaner()
+        old = FakeMessage(1, channel, age=timedelta(days=14))
+        recent = [FakeMessage(message_id, channel) for message_id in (2, 3)]
+
+        await asyncio.gather(
+            *(source_cleanup.delete(message) for message in [old, *recent])
+        )
+
+        self.assertEqual(channel.bulk_calls, [[2, 3]])
+        self.assertTrue(old.deleted)
+
+    async def test_rejected_bulk_delete_falls_back_to_single_deletes(self):
+        channel = FakeChannel(bulk_error=http_error(discord.HTTPException, 400))
+        source_cleanup = cleaner()
+        messages = [FakeMessage(message_id, channel) for message_id in (1, 2)]
+
+        await asyncio.gather(*(source_cleanup.delete(message) for message in messages))
+
+        self.assertTrue(all(message.deleted for message in messages))
+        self.assertEqual(source_cleanup.bulk_deletes, 0)
+        self.assertEqual(source_cleanup.single_deletes, 2)
+
+    async def test_forbidden_bulk_delete_reaches_every_caller(self):
+        channel = FakeChannel(bulk_error=http_error(discord.Forbidden, 403))
+        source_cleanup = cleaner()
+        messages = [FakeMessage(message_id, channel) for message_id in (1, 2)]
+
+        results = await asyncio.gather(
+            *(source_cleanup.delete(message) for message in messages),
+            return_exceptions=True,
+        )
+
+        self.assertTrue(all(isinstance(result, discord.Forbidden) for result in results))
+        self.assertFalse(any(message.deleted for message in messages))
+
+    async def test_single_delete_errors_reach_only_their_caller(self):
+        channel = FakeChannel(bulk_error=http_error(discord.HTTPException, 400))
+        source_cleanup = cleaner()
+        gone = FakeMessage(1, channel, error=http_error(discord.NotFound, 404))
+        kept = FakeMessage(2, channel)
+
+        results = await asyncio.gather(
+            source_cleanup.delete(gone),
+            source_cleanup.delete(kept),
+            return_exceptions=True,
+        )
+
+        self.assertIsInstance(results[0], discord.NotFound)
+        self.assertIsNone(results[1])
+        self.assertTrue(kept.deleted)
+
+    async def test_full_batch_flushes_before_the_window_ends(self):
+        channel = FakeChannel()
+        source_cleanup = cleaner(window_seconds=60)
+        messages = [
+            FakeMessage(message_id, channel)
+            for message_id in range(BULK_DELETE_MAX_MESSAGES + 1)
+        ]
+
+        deletes = [
+            asyncio.create_task(source_cleanup.delete(message)) for message in messages
+        ]
+        await asyncio.gather(*deletes[:BULK_DELETE_MAX_MESSAGES])
+
+        self.assertEqual(len(channel.bulk_calls), 1)
+        self.assertEqual(len(channel.bulk_calls[0]), BULK_DELETE_MAX_MESSAGES)
+        self.assertEqual(source_cleanup.pending(), 1)
+        await source_cleanup.close()
+        await deletes[-1]
+        self.assertTrue(messages[-1].deleted)
+
+    async def test_schedule_runs_each_flush(self):
+        channel = FakeChannel()
+        scheduled = []
+
+        async def schedule(target, flush):
+            scheduled.append(target)
+            return await flush()
+
+        source_cleanup = cleaner(schedule=schedule)
+        await asyncio.gather(
+            source_cleanup.delete(FakeMessage(1, channel)),
+            source_cleanup.delete(FakeMessage(2, channel)),
+        )
+
+        self.assertEqual(scheduled, [channel])
+        self.assertEqual(channel.bulk_calls, [[1, 2]])
+
+    async def test_schedule_failure_fails_the_batch(self):
+        async def schedule(target, flush):
+            raise RuntimeError("scheduler closed")
+
+        source_cleanup = cleaner(schedule=schedule)
+
+        with self.assertRaises(RuntimeError):
+            await source_cleanup.delete(FakeMessage(1, FakeChannel()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -34,6 +34,18 @@ def build_tiktok_layout(
         card_preferences,
     )
 
+
+async def fetch_tiktok_payload(
+    source_url: str,
+    translation_language: Optional[str] = None,
+) -> Mapping[str, Any]:
+    return await fetch_platform_payload(
+        source_url,
+        TIKTOK_SPEC.api_name,
+        translation_language,
+    )
+
+
 async def fetch_tiktok_layout(
     source_url: str,
     converted_url: Optional[str] = None,
@@ -43,11 +55,7 @@ async def fetch_tiktok_layout(
     translation_language: Optional[str] = None,
 ) -> discord.ui.LayoutView:
     return build_tiktok_layout(
-        await fetch_platform_payload(
-            source_url,
-            TIKTOK_SPEC.api_name,
-            translation_language,
-        ),
+        await fetch_tiktok_payload(source_url, translation_language),
         converted_url,
         footer_branding,
         card_preferences,
@@ -35,6 +35,18 @@ def build_twitch_layout(
         card_preferences,
     )
 
+
+async def fetch_twitch_payload(
+    source_url: str,
+    translation_language: Optional[str] = None,
+) -> Mapping[str, Any]:
+    return await fetch_platform_payload(
+        source_url,
+        TWITCH_SPEC.api_name,
+        translation_language,
+    )
+
+
 async def fetch_twitch_layout(
     source_url: str,
     converted_url: Optional[str] = None,
@@ -44,11 +56,7 @@ async def fetch_twitch_layout(
     translation_language: Optional[str] = None,
 ) -> discord.ui.LayoutView:
     return build_twitch_layout(
-        await fetch_platform_payload(
-            source_url,
-            TWITCH_SPEC.api_name,
-            translation_language,
-        ),
+        await fetch_twitch_payload(source_url, translation_language),
         converted_url,
         footer_branding,
         card_preferences,
@@ -6,11 +6,11 @@ import re
 from typing import Any, Mapping, Optional
 from urllib.parse import urlencode
 
-import aiohttp
 import discord
 
 from component_emojis import application_emoji, format_component_stats
 from embed_footer import FooterBranding, build_component_footer, translated_source_name
+from http_client import http_session
 from card_preferences import CardPreferences, apply_caption_preferences
 from timestamp_utils import parse_post_timestamp
 
@@ -256,8 +256,7 @@ async def fetch_twitter_payload(
     if mode:
         query["mode"] = mode
     api_url = f"{FIXEMBED_API}?{urlencode(query)}"
-    timeout = aiohttp.ClientTimeout(total=15)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async with http_session("metadata") as session:
         async with session.get(api_url) as response:
             response.raise_for_status()
             body = await response.json()
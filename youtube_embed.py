@@ -5,11 +5,11 @@ from __future__ import annotations
 from typing import Any, Mapping, Optional
 from urllib.parse import quote
 
-import aiohttp
 import discord
 
 from component_emojis import format_component_stats
 from embed_footer import FooterBranding, build_component_footer, translated_source_name
+from http_client import http_session
 from card_preferences import CardPreferences, apply_caption_preferences
 from timestamp_utils import parse_post_timestamp
 
@@ -106,15 +106,14 @@ def build_youtube_community_layout(
     return view
 
 
-async def _fetch_youtube_community_payload(
+async def fetch_youtube_community_payload(
     source_url: str,
     translation_language: Optional[str] = None,
 ) -> Mapping[str, Any]:
     api_url = f"{FIXEMBED_API}?url={quote(source_url, safe='')}&renderer=components-v2"
     if translation_language:
         api_url += f"&lang={quote(translation_language, safe='')}"
-    timeout = aiohttp.ClientTimeout(total=15)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
+    async with http_session("metadata") as session:
         async with session.get(api_url) as response:
             response.raise_for_status()
             body = await response.json()
@@ -133,7 +132,7 @@ async def fetch_youtube_community_layout(
     translation_language: Optional[str] = None,
 ) -> discord.ui.LayoutView:
     """Fetch metadata and return a YouTube community-post Components V2 card."""
-    payload = await _fetch_youtube_community_payload(
+    payload = await fetch_youtube_community_payload(
         source_url,
         translation_language,
     )